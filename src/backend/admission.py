@@ -0,0 +1,139 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Admission control and load shedding for try-on work
+
+Tracks admitted-but-unfinished work, estimates how long a new request
+would queue from an EWMA of recent service times, and rejects it up front
+when that wait would exceed the latency budget from the SLO.
+"""
+
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+DEFAULT_SLO_FILE = "governance/slo/slo.yaml"
+DEFAULT_LATENCY_BUDGET = 0.150
+
+_DURATION = re.compile(r"^\s*([\d.]+)\s*(ms|s)?\s*$")
+
+
+def load_latency_budget(
+    path: Union[str, Path, None] = None, key: str = "api_latency_p95"
+) -> float:
+    """
+    Read a latency target (in seconds) from ``slo.yaml``
+
+    Only the flat ``key: <number>[ms|s]`` form used by the SLO file is
+    understood; a missing file or key falls back to 150 ms.
+    """
+    path = Path(path or os.getenv("SLO_FILE", DEFAULT_SLO_FILE))
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return DEFAULT_LATENCY_BUDGET
+    for line in lines:
+        name, sep, value = line.partition(":")
+        if not sep or name.strip() != key:
+            continue
+        m = _DURATION.match(value)
+        if m:
+            amount = float(m.group(1))
+            return amount / 1000.0 if m.group(2) in (None, "ms") else amount
+    return DEFAULT_LATENCY_BUDGET
+
+
+class Overloaded(Exception):
+    """Raised when admitting a request would break the latency budget"""
+
+    def __init__(self, predicted: float, retry_after: int):
+        super().__init__(f"predicted queue wait {predicted * 1000:.0f}ms over budget")
+        self.predicted = predicted
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Predictive admission for a pool of ``concurrency`` workers
+
+    With ``n`` requests already admitted, a new one waits for
+    ``n // concurrency`` waves of work before it starts, so its predicted
+    queue wait is ``(n // concurrency) * ewma_service_time``. An idle pool
+    always admits, so a slow model cannot lock the pool out.
+
+    ``inflight`` / ``queue_depth`` are optional gauges and ``rejections`` an
+    optional counter.
+    """
+
+    def __init__(
+        self,
+        latency_budget: float,
+        concurrency: int,
+        alpha: float = 0.2,
+        inflight: Optional[Any] = None,
+        queue_depth: Optional[Any] = None,
+        rejections: Optional[Any] = None,
+    ):
+        self.latency_budget = latency_budget
+        self.concurrency = max(1, concurrency)
+        self.alpha = alpha
+        self._inflight_gauge = inflight
+        self._queue_gauge = queue_depth
+        self._rejections = rejections
+        self._inflight = 0
+        self._service_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _predict(self, inflight: int) -> float:
+        if self._service_time is None:
+            return 0.0
+        return (inflight // self.concurrency) * self._service_time
+
+    def _publish(self) -> None:
+        if self._inflight_gauge is not None:
+            self._inflight_gauge.set(self._inflight)
+        if self._queue_gauge is not None:
+            self._queue_gauge.set(max(0, self._inflight - self.concurrency))
+
+    def acquire(self) -> None:
+        """Admit one request or raise :class:`Overloaded`"""
+        with self._lock:
+            predicted = self._predict(self._inflight)
+            if predicted > self.latency_budget:
+                if self._rejections is not None:
+                    self._rejections.inc()
+                # Roughly how long until enough work drains to fit the budget
+                retry_after = max(1, math.ceil(predicted - self.latency_budget))
+                raise Overloaded(predicted, retry_after)
+            self._inflight += 1
+            self._publish()
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        """Finish one admitted request, feeding its service time to the EWMA"""
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+            if service_time is not None:
+                if self._service_time is None:
+                    self._service_time = service_time
+                else:
+                    self._service_time += self.alpha * (
+                        service_time - self._service_time
+                    )
+            self._publish()
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def service_time(self) -> Optional[float]:
+        """Current EWMA of service times, ``None`` before the first sample"""
+        return self._service_time
+
+    def predicted_wait(self) -> float:
+        """Queue wait a request admitted now is expected to see"""
+        with self._lock:
+            return self._predict(self._inflight)
@@ -0,0 +1,130 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Dynamic micro-batching for try-on inference
+
+Independent requests are collected until either ``max_batch_size`` items are
+waiting or the oldest one has waited ``max_wait`` seconds, then run as a
+single batched call whose results are fanned back out to each caller.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects items from many threads and runs them through ``batch_fn``
+
+    ``batch_fn`` receives a list of items and must return a list of the same
+    length; an entry that is an exception instance fails only that caller.
+    If ``batch_fn`` itself raises, every caller in the batch gets the error.
+
+    Optional ``batch_size_histogram`` / ``queue_wait_histogram`` are any
+    objects with an ``observe(value)`` method (e.g. Prometheus histograms).
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.01,
+        batch_size_histogram: Optional[Any] = None,
+        queue_wait_histogram: Optional[Any] = None,
+        name: str = "micro-batcher",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_size_histogram = batch_size_histogram
+        self.queue_wait_histogram = queue_wait_histogram
+        self.name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name=self.name, daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Enqueue ``item``; the returned future resolves to its result"""
+        fut: Future = Future()
+        self._ensure_started()
+        self._queue.put((item, fut, time.monotonic()))
+        return fut
+
+    def __call__(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Submit ``item`` and block until its result is available"""
+        return self.submit(item).result(timeout=timeout)
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            # The wait window is measured from the oldest request's arrival
+            deadline = first[2] + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        nxt = self._queue.get(timeout=remaining)
+                    else:
+                        nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: list) -> None:
+        started = time.monotonic()
+        if self.batch_size_histogram is not None:
+            self.batch_size_histogram.observe(len(batch))
+        if self.queue_wait_histogram is not None:
+            for _, _, enqueued in batch:
+                self.queue_wait_histogram.observe(started - enqueued)
+
+        items = [item for item, _, _ in batch]
+        try:
+            results = list(self.batch_fn(items))
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"batch_fn returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+
+        for (_, fut, _), res in zip(batch, results):
+            if isinstance(res, BaseException):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush queued items and stop the dispatcher; a later submit restarts it"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
@@ -0,0 +1,235 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Content-addressed result cache for try-on outputs
+
+Results are keyed by a hash of the input image, the model version and the
+normalized options. Lookups go to a size-bounded in-memory LRU tier first,
+then to an optional on-disk tier that survives restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+def _normalize(value: Any) -> Any:
+    """Drop ``None`` values and empty containers so equivalent options hash equally"""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            v = _normalize(v)
+            if v is None or v == {} or v == []:
+                continue
+            out[str(k)] = v
+        return out
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(
+    image: Union[bytes, str, None], model: str, options: Optional[Dict[str, Any]]
+) -> str:
+    """
+    Stable content key for a try-on request
+
+    ``image`` is either the raw image bytes or an already-computed identity
+    for them (a content digest, or the source URL when bytes are unavailable).
+    """
+    if isinstance(image, bytes):
+        image_id = "sha256:" + hashlib.sha256(image).hexdigest()
+    else:
+        image_id = image or ""
+    canonical = json.dumps(
+        {"image": image_id, "model": model, "options": _normalize(options or {})},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _encode(value: Dict[str, Any]) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+class MemoryTier:
+    """Thread-safe LRU bounded by the total encoded size of its entries"""
+
+    def __init__(self, max_bytes: int, on_evict=None):
+        self.max_bytes = max_bytes
+        self._on_evict = on_evict
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, value: Dict[str, Any], size: int) -> None:
+        if size > self.max_bytes:
+            return
+        evicted = 0
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, old_size) = self._data.popitem(last=False)
+                self._bytes -= old_size
+                evicted += 1
+        if evicted and self._on_evict:
+            self._on_evict(evicted)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskTier:
+    """
+    One JSON file per key under ``root``, written atomically
+
+    When ``max_bytes`` is set the oldest files are removed once the tier
+    grows past it, down to 90% of the budget.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: int = 0, on_evict=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        self._bytes = sum(p.stat().st_size for p in self.root.glob("*/*.json"))
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._path(key).read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, encoded: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        tmp.write_bytes(encoded)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes += len(encoded) - old_size
+            over = self.max_bytes and self._bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            files = []
+            for p in self.root.glob("*/*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, p))
+            files.sort()
+            target = int(self.max_bytes * 0.9)
+            total = sum(size for _, size, _ in files)
+            evicted = 0
+            for _, size, p in files:
+                if total <= target:
+                    break
+                try:
+                    p.unlink()
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+            self._bytes = total
+        if evicted and self._on_evict:
+            self._on_evict(evicted)
+
+
+class ResultCache:
+    """
+    Two-tier try-on result cache
+
+    ``hits`` / ``evictions`` are optional Prometheus counters labelled by
+    ``tier``; ``misses`` is an unlabelled counter. Disk hits are promoted
+    into memory.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[Union[str, Path]] = None,
+        max_disk_bytes: int = 0,
+        hits=None,
+        misses=None,
+        evictions=None,
+    ):
+        # Resolve label children once so the lookup path does no label work
+        self._hit_mem = hits.labels(tier="memory") if hits is not None else None
+        self._hit_disk = hits.labels(tier="disk") if hits is not None else None
+        self._misses = misses
+        evict_mem = evictions.labels(tier="memory") if evictions is not None else None
+        evict_disk = evictions.labels(tier="disk") if evictions is not None else None
+        self.memory = MemoryTier(
+            max_memory_bytes, on_evict=evict_mem.inc if evict_mem else None
+        )
+        self.disk = (
+            DiskTier(
+                disk_dir,
+                max_bytes=max_disk_bytes,
+                on_evict=evict_disk.inc if evict_disk else None,
+            )
+            if disk_dir
+            else None
+        )
+
+    @property
+    def touches_disk(self) -> bool:
+        """Whether lookups may block on file I/O"""
+        return self.disk is not None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up ``key`` in memory, then on disk; counts a miss if both miss"""
+        value = self.memory.get(key)
+        if value is not None:
+            if self._hit_mem:
+                self._hit_mem.inc()
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                if self._hit_disk:
+                    self._hit_disk.inc()
+                self.memory.put(key, value, len(_encode(value)))
+                return value
+        if self._misses is not None:
+            self._misses.inc()
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        encoded = _encode(value)
+        self.memory.put(key, value, len(encoded))
+        if self.disk is not None:
+            self.disk.put(key, encoded)
@@ -0,0 +1,234 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Celery application for offloading try-on inference to worker processes
+
+``celery -A src.backend.celery_app worker`` runs the try-on model chain
+outside the API tier so inference scales by adding workers. Interactive
+requests and bulk catalog work use separate queues, so a large catalog
+import cannot starve user-facing jobs; start dedicated workers per queue
+with ``-Q tryon.interactive`` / ``-Q tryon.catalog``.
+
+Tasks are long and GPU-bound, so each worker process reserves one message
+at a time (``prefetch_multiplier=1``) and acknowledges it only after the
+task finishes (``acks_late``): a crashed worker's task is redelivered
+instead of lost, and idle workers are never starved by a busy one's
+prefetched backlog.
+
+A payload may carry an image as ``payload["image_handle"]``, the JSON form
+of a :class:`~src.backend.shm_transport.ImageHandle`, instead of pixels
+in the message: the worker maps the segment for the duration of the
+inference (see :func:`shared_image` for the sending side). Producer and
+worker must share ``/dev/shm`` (same host; ``ipc`` in docker-compose).
+
+With ``CELERY_MEMORY_TRANSPORT=true`` (or ``CELERY_BROKER_URL=memory://``)
+broker and result backend live in process memory, and
+:func:`local_worker` runs a worker on threads, so the whole submit →
+route → execute → result path can be load-tested without Redis.
+"""
+
+import os
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from celery import Celery, group
+from kombu import Exchange, Queue
+
+from src.backend.shm_transport import ImageHandle, SharedImageStore, open_image
+
+INTERACTIVE_QUEUE = "tryon.interactive"
+CATALOG_QUEUE = "tryon.catalog"
+QUEUE_NAMES = (INTERACTIVE_QUEUE, CATALOG_QUEUE)
+
+# Payload key of an ImageHandle dict; the worker passes the mapped pixels
+# to the model chain as ``payload["image"]``
+IMAGE_HANDLE_KEY = "image_handle"
+
+# Payloads per catalog task: each chunk is one batched model call
+CATALOG_CHUNK_SIZE = int(os.getenv("TRYON_CATALOG_CHUNK_SIZE", "8"))
+
+app = Celery("modamoda")
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "false").lower() in {"1", "true", "yes"}
+
+
+def configure(celery: Celery = app, memory: Optional[bool] = None) -> Celery:
+    """
+    Apply broker, routing and execution settings to ``celery``
+
+    ``memory`` forces (or disables) the in-memory transport; by default it
+    follows ``CELERY_MEMORY_TRANSPORT`` and the broker URL. Call before the
+    first task is sent: connections are created lazily from this config.
+    """
+    broker = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+    backend = os.getenv("CELERY_RESULT_BACKEND", broker)
+    if memory is None:
+        memory = _env_flag("CELERY_MEMORY_TRANSPORT") or broker.startswith("memory:")
+    if memory:
+        broker, backend = "memory://", "cache+memory://"
+
+    time_limit = float(os.getenv("TRYON_TASK_TIME_LIMIT_SECONDS", "300"))
+    # Redis redelivers unacked messages after this; must exceed any task
+    transport_options: Dict[str, Any] = {"visibility_timeout": int(time_limit * 2 + 60)}
+    if memory:
+        # The memory channel is polled; the 1s default would dominate latency
+        transport_options["polling_interval"] = 0.01
+    exchange = Exchange("tryon", type="direct")
+
+    celery.conf.update(
+        broker_url=broker,
+        result_backend=backend,
+        task_serializer="json",
+        result_serializer="json",
+        accept_content=["json"],
+        result_expires=float(os.getenv("TRYON_RESULT_TTL_SECONDS", "600")),
+        task_queues=[
+            Queue(INTERACTIVE_QUEUE, exchange, routing_key=INTERACTIVE_QUEUE),
+            Queue(CATALOG_QUEUE, exchange, routing_key=CATALOG_QUEUE),
+        ],
+        task_default_queue=INTERACTIVE_QUEUE,
+        task_default_exchange="tryon",
+        task_default_routing_key=INTERACTIVE_QUEUE,
+        task_routes={
+            "tryon.run": {"queue": INTERACTIVE_QUEUE},
+            "tryon.batch": {"queue": CATALOG_QUEUE},
+        },
+        # Long GPU tasks: reserve one message per process, ack when done
+        worker_prefetch_multiplier=1,
+        task_acks_late=True,
+        task_reject_on_worker_lost=True,
+        task_soft_time_limit=time_limit,
+        task_time_limit=time_limit + 30,
+        task_track_started=True,
+        broker_transport_options=transport_options,
+        worker_max_tasks_per_child=int(os.getenv("TRYON_WORKER_MAX_TASKS", "0"))
+        or None,
+    )
+    return celery
+
+
+configure()
+
+
+def _infer(payloads: List[Dict[str, Any]]) -> List[Any]:
+    # Imported on first use: main stays cheap to import (no FastAPI) and
+    # the worker shares the exact model chain the API runs
+    from src.backend.main import infer_try_on_batch
+
+    return infer_try_on_batch(payloads)
+
+
+def _map_images(payloads: List[Dict[str, Any]], stack: ExitStack) -> List[Any]:
+    """Payloads with shared images mapped in; a vanished segment becomes its error"""
+    items: List[Any] = []
+    for payload in payloads:
+        if IMAGE_HANDLE_KEY not in payload:
+            items.append(payload)
+            continue
+        payload = dict(payload)
+        handle = ImageHandle.from_dict(payload.pop(IMAGE_HANDLE_KEY))
+        try:
+            payload["image"] = stack.enter_context(open_image(handle))
+        except FileNotFoundError:
+            items.append(LookupError(f"image segment {handle.name} was released"))
+            continue
+        items.append(payload)
+    return items
+
+
+def _run(payloads: List[Dict[str, Any]]) -> List[Any]:
+    # Segments stay mapped until the results are built, then are unmapped
+    with ExitStack() as stack:
+        items = _map_images(payloads, stack)
+        ready = [p for p in items if not isinstance(p, Exception)]
+        results = iter(_infer(ready) if ready else [])
+        return [p if isinstance(p, Exception) else next(results) for p in items]
+
+
+@app.task(name="tryon.run")
+def try_on(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """One interactive try-on; a failed inference fails the task"""
+    (result,) = _run([payload])
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+@app.task(name="tryon.batch")
+def try_on_batch(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Many try-ons in one batched model call
+
+    Per-item failures do not fail the batch: they come back as
+    ``{"error": message}`` in that item's position.
+    """
+    return [
+        {"error": str(r) or type(r).__name__} if isinstance(r, Exception) else r
+        for r in _run(list(payloads))
+    ]
+
+
+@contextmanager
+def shared_image(store: SharedImageStore, image: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Put ``image`` in shared memory for the tasks sent inside the block
+
+    Yields the handle dict to send as ``payload[IMAGE_HANDLE_KEY]``. The
+    segment is released when the block exits, so wait for the results
+    inside it: tasks are acked only once they return (``acks_late``), and
+    a redelivered message must still find its segment. Segments of
+    results never waited for are reclaimed by ``store.reap()``.
+    """
+    handle = store.put(image)
+    try:
+        yield handle.to_dict()
+    finally:
+        store.release(handle)
+
+
+def catalog_job(
+    payloads: Sequence[Dict[str, Any]], chunk_size: int = CATALOG_CHUNK_SIZE
+) -> group:
+    """
+    Group signature running ``payloads`` as batched chunks on the catalog queue
+
+    ``catalog_job(items).apply_async().get()`` returns one list of results
+    per chunk, in order; see :func:`flatten`.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    payloads = list(payloads)
+    return group(
+        try_on_batch.s(payloads[i : i + chunk_size])
+        for i in range(0, len(payloads), chunk_size)
+    )
+
+
+def flatten(chunks: Sequence[Sequence[Any]]) -> List[Any]:
+    """Per-chunk results of :func:`catalog_job` as one list"""
+    return [item for chunk in chunks for item in chunk]
+
+
+@contextmanager
+def local_worker(
+    concurrency: int = 4, queues: Sequence[str] = QUEUE_NAMES
+) -> Iterator[Celery]:
+    """
+    Run a threaded worker inside this process for the duration of the block
+
+    Meant for the in-memory transport (tests, local load tests), where
+    producer and worker must share a process.
+    """
+    from celery.contrib.testing.worker import start_worker
+
+    with start_worker(
+        app,
+        pool="threads",
+        concurrency=concurrency,
+        perform_ping_check=False,
+        queues=list(queues),
+        loglevel="WARNING",
+    ):
+        yield app
@@ -0,0 +1,61 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Gunicorn settings for multi-worker API deployments
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus OBS_ENABLE_METRICS=true \\
+        gunicorn -c src/backend/gunicorn_conf.py src.backend.main:app
+
+The hooks keep the shared Prometheus directory consistent: it is emptied
+when the master starts and a dead worker's live gauges are dropped.
+
+With more than one worker (the default is 4), the per-host state the
+workers must agree on is put on disk unless configured: try-on job status
+in ``TRYON_JOB_DIR`` and metric samples in ``PROMETHEUS_MULTIPROC_DIR``.
+Resumable upload sessions already live under ``TRYON_UPLOAD_DIR``. The L1
+result cache, in-flight coalescing and admission control stay per worker:
+their limits and savings apply per worker, and no request depends on
+reaching the worker that holds them.
+"""
+
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+if workers > 1:
+    # Read by the workers, which inherit the master's environment
+    for name, default in (
+        ("TRYON_JOB_DIR", "modamoda-jobs"),
+        ("PROMETHEUS_MULTIPROC_DIR", "modamoda-prometheus"),
+    ):
+        if not os.environ.get(name) and not os.environ.get(name.lower()):
+            os.environ[name] = os.path.join(tempfile.gettempdir(), default)
+
+
+def _multiproc_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get(
+        "prometheus_multiproc_dir"
+    )
+
+
+def on_starting(server):
+    # Files left by a previous run would be merged into this one's totals
+    path = _multiproc_dir()
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+    # Jobs of a previous run died with its workers; never report them queued
+    jobs = os.environ.get("TRYON_JOB_DIR")
+    if jobs:
+        shutil.rmtree(jobs, ignore_errors=True)
+
+
+def child_exit(server, worker):
+    if _multiproc_dir():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,253 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Header-only validation of uploaded images
+
+Dimensions and format are read from the container headers alone (JPEG
+SOF segment, PNG IHDR chunk, WebP VP8X/VP8/VP8L chunk) so oversized,
+undersized, corrupt or decompression-bomb uploads are rejected before any
+pixel is decoded or any frame buffer is allocated. JPEG segments before
+the SOF (EXIF, ICC profiles) are skipped by length, never read into memory.
+"""
+
+import io
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Optional, Union
+
+MIN_SIDE = 256
+MAX_SIDE = 8192
+
+# Reject reasons (also the ``reason`` label of the rejection counter)
+UNSUPPORTED_FORMAT = "unsupported_format"
+TRUNCATED = "truncated"
+CORRUPT = "corrupt"
+TOO_SMALL = "too_small"
+TOO_LARGE = "too_large"
+TOO_MANY_PIXELS = "too_many_pixels"
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# SOF0..SOF15 minus DHT (C4), JPG (C8) and DAC (CC)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field
+_JPEG_STANDALONE = frozenset(range(0xD0, 0xD8)) | {0x01}
+
+# PNG colour type -> allowed bit depths
+_PNG_DEPTHS = {0: {1, 2, 4, 8, 16}, 2: {8, 16}, 3: {1, 2, 4, 8}, 4: {8, 16}, 6: {8, 16}}
+
+Source = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+class InvalidImage(ValueError):
+    """An upload failed validation; ``reason`` is one of the module constants"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """What the headers say about an image"""
+
+    format: str
+    width: int
+    height: int
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+class _Reader:
+    """Exact reads and cheap skips over bytes or a binary stream"""
+
+    def __init__(self, source: Source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        self._f = source
+        try:
+            self._seekable = source.seekable()
+        except AttributeError:
+            self._seekable = False
+
+    def read(self, n: int) -> bytes:
+        data = self._f.read(n)
+        if len(data) < n:
+            raise InvalidImage(TRUNCATED, "image header is truncated")
+        return data
+
+    def skip(self, n: int) -> None:
+        if self._seekable:
+            self._f.seek(n, io.SEEK_CUR)
+            return
+        while n > 0:
+            chunk = self._f.read(min(n, 64 * 1024))
+            if not chunk:
+                raise InvalidImage(TRUNCATED, "image header is truncated")
+            n -= len(chunk)
+
+
+def _jpeg(r: _Reader) -> ImageInfo:
+    while True:
+        if r.read(1) != b"\xff":
+            raise InvalidImage(CORRUPT, "JPEG marker expected")
+        marker = r.read(1)[0]
+        while marker == 0xFF:  # fill bytes
+            marker = r.read(1)[0]
+        if marker in _JPEG_STANDALONE:
+            continue
+        if marker in (0xD9, 0xDA, 0x00):
+            raise InvalidImage(CORRUPT, "JPEG has no frame header before its scan")
+        (length,) = struct.unpack(">H", r.read(2))
+        if length < 2:
+            raise InvalidImage(CORRUPT, "JPEG segment length is invalid")
+        if marker not in _JPEG_SOF:
+            r.skip(length - 2)
+            continue
+        if length < 8:
+            raise InvalidImage(CORRUPT, "JPEG frame header is too short")
+        precision, height, width, components = struct.unpack(">BHHB", r.read(6))
+        if precision not in (8, 12, 16) or components not in (1, 3, 4):
+            raise InvalidImage(CORRUPT, "JPEG frame header is invalid")
+        if length != 8 + 3 * components:
+            raise InvalidImage(CORRUPT, "JPEG frame header length mismatch")
+        return ImageInfo("jpeg", width, height)
+
+
+def _png(r: _Reader) -> ImageInfo:
+    length, kind = struct.unpack(">I4s", r.read(8))
+    if kind != b"IHDR" or length != 13:
+        raise InvalidImage(CORRUPT, "PNG does not start with an IHDR chunk")
+    body = r.read(13)
+    (crc,) = struct.unpack(">I", r.read(4))
+    if zlib.crc32(kind + body) != crc:
+        raise InvalidImage(CORRUPT, "PNG IHDR checksum mismatch")
+    width, height, depth, colour, compression, filtering, interlace = struct.unpack(
+        ">IIBBBBB", body
+    )
+    if (
+        depth not in _PNG_DEPTHS.get(colour, ())
+        or compression
+        or filtering
+        or interlace > 1
+        or width >= 1 << 31
+        or height >= 1 << 31
+    ):
+        raise InvalidImage(CORRUPT, "PNG IHDR fields are invalid")
+    return ImageInfo("png", width, height)
+
+
+def _webp(r: _Reader) -> ImageInfo:
+    kind, size = struct.unpack("<4sI", r.read(8))
+    if kind == b"VP8X":
+        if size < 10:
+            raise InvalidImage(CORRUPT, "WebP VP8X chunk is too short")
+        head = r.read(10)
+        width = int.from_bytes(head[4:7], "little") + 1
+        height = int.from_bytes(head[7:10], "little") + 1
+    elif kind == b"VP8 ":
+        head = r.read(10)
+        if head[0] & 1 or head[3:6] != b"\x9d\x01\x2a":
+            raise InvalidImage(CORRUPT, "WebP VP8 key frame header is invalid")
+        width, height = struct.unpack("<HH", head[6:10])
+        width, height = width & 0x3FFF, height & 0x3FFF
+    elif kind == b"VP8L":
+        head = r.read(5)
+        if head[0] != 0x2F:
+            raise InvalidImage(CORRUPT, "WebP VP8L signature is invalid")
+        bits = int.from_bytes(head[1:5], "little")
+        width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if bits >> 29:
+            raise InvalidImage(CORRUPT, "WebP VP8L version is invalid")
+    else:
+        raise InvalidImage(CORRUPT, f"WebP chunk {kind!r} is not an image header")
+    return ImageInfo("webp", width, height)
+
+
+def read_header(source: Source) -> ImageInfo:
+    """
+    Format and dimensions from the headers of ``source``
+
+    ``source`` is the first bytes of the upload or a binary stream
+    positioned at its start; only headers are read. Raises
+    :class:`InvalidImage` for unknown formats, truncated or corrupt
+    headers.
+    """
+    r = _Reader(source)
+    magic = r.read(2)
+    if magic == b"\xff\xd8":
+        info = _jpeg(r)
+    elif magic == PNG_SIGNATURE[:2]:
+        if magic + r.read(6) != PNG_SIGNATURE:
+            raise InvalidImage(UNSUPPORTED_FORMAT, "not a PNG, JPEG or WebP image")
+        info = _png(r)
+    elif magic == b"RI":
+        riff = magic + r.read(10)
+        if riff[8:12] != b"WEBP" or riff[2:4] != b"FF":
+            raise InvalidImage(UNSUPPORTED_FORMAT, "not a PNG, JPEG or WebP image")
+        if struct.unpack("<I", riff[4:8])[0] < 12:
+            raise InvalidImage(CORRUPT, "WebP RIFF size is invalid")
+        info = _webp(r)
+    else:
+        raise InvalidImage(UNSUPPORTED_FORMAT, "not a PNG, JPEG or WebP image")
+    if info.width <= 0 or info.height <= 0:
+        raise InvalidImage(CORRUPT, f"{info.format} declares an empty image")
+    return info
+
+
+class ImageValidator:
+    """
+    Upload rules applied to header information
+
+    Both sides must lie in ``[min_side, max_side]`` and the pixel count may
+    not exceed ``max_pixels`` (a decompression-bomb guard; defaults to
+    ``max_side ** 2``). ``rejections`` is an optional counter with a
+    ``reason`` label (e.g. a Prometheus Counter) incremented per rejection.
+    """
+
+    def __init__(
+        self,
+        min_side: int = MIN_SIDE,
+        max_side: int = MAX_SIDE,
+        max_pixels: Optional[int] = None,
+        rejections: Optional[Any] = None,
+    ):
+        self.min_side = min_side
+        self.max_side = max_side
+        self.max_pixels = max_pixels or max_side * max_side
+        self._rejections = rejections
+
+    def check(self, info: ImageInfo) -> ImageInfo:
+        """Apply the size rules to already-read header information"""
+        if min(info.width, info.height) < self.min_side:
+            raise InvalidImage(
+                TOO_SMALL,
+                f"{info.width}x{info.height} is too small (min side {self.min_side})",
+            )
+        if max(info.width, info.height) > self.max_side:
+            raise InvalidImage(
+                TOO_LARGE,
+                f"{info.width}x{info.height} is too large (max side {self.max_side})",
+            )
+        if info.pixels > self.max_pixels:
+            raise InvalidImage(
+                TOO_MANY_PIXELS,
+                f"{info.pixels} pixels exceeds the limit of {self.max_pixels}",
+            )
+        return info
+
+    def validate(self, source: Source) -> ImageInfo:
+        """Read the headers of ``source`` and apply the rules, counting rejections"""
+        try:
+            return self.check(read_header(source))
+        except InvalidImage as e:
+            self.reject(e.reason)
+            raise
+
+    def reject(self, reason: str) -> None:
+        """Count a rejection (also used by callers that reject on their own)"""
+        if self._rejections is not None:
+            self._rejections.labels(reason=reason).inc()
@@ -0,0 +1,236 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Asynchronous job execution for long-running try-on work
+
+Submissions are accepted immediately and executed on a bounded in-process
+thread pool; clients poll the job until it reaches a terminal state.
+
+With a shared ``directory`` every state change is also published as
+``<directory>/<job_id>.json``, so any worker process on the host answers
+status polls for jobs another worker runs.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+TERMINAL_STATES = frozenset({COMPLETED, FAILED})
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+# Unfinished job files not updated for this long belong to a dead worker
+STALE_JOB_SECONDS = 24 * 3600.0
+
+
+class JobQueueFull(Exception):
+    """Raised when the pool already holds ``max_pending`` unfinished jobs"""
+
+
+@dataclass
+class Job:
+    """State of a single submitted job"""
+
+    id: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public representation returned by the jobs endpoint"""
+        out: Dict[str, Any] = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+        }
+        if self.started_at is not None:
+            out["started_at"] = self.started_at
+        if self.finished_at is not None:
+            out["finished_at"] = self.finished_at
+        if self.status == COMPLETED:
+            out["result"] = self.result
+        elif self.status == FAILED:
+            out["error"] = self.error
+        return out
+
+
+class JobManager:
+    """
+    Bounded worker pool with an in-memory job table
+
+    At most ``max_workers`` jobs run concurrently and at most ``max_pending``
+    jobs may be unfinished (queued or running) at once; further submissions
+    raise :class:`JobQueueFull`. Finished jobs are kept for ``result_ttl``
+    seconds so clients can fetch their results.
+
+    ``directory`` (shared by the worker processes of one host) makes the
+    job table visible to all of them; the limits stay per process.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        result_ttl: float = 600.0,
+        directory: Optional[Union[str, Path]] = None,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.directory = Path(directory) if directory else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._next_sweep = 0.0
+        self._jobs: Dict[str, Job] = {}
+        self._unfinished = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so the manager survives an app shutdown/startup cycle
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="tryon-worker"
+            )
+        return self._executor
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> Job:
+        """Queue ``fn(*args, **kwargs)`` and return the new job immediately"""
+        with self._lock:
+            self._purge_expired(time.time())
+            if self._unfinished >= self.max_pending:
+                raise JobQueueFull(
+                    f"{self._unfinished} jobs pending (limit {self.max_pending})"
+                )
+            job = Job(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._unfinished += 1
+            executor = self._get_executor()
+            state = job.to_dict()
+        # Published before the worker thread can publish "running"
+        self._publish(job.id, state)
+        executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args: tuple, kwargs: dict) -> None:
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+            state = job.to_dict()
+        self._publish(job.id, state)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                job.status = FAILED
+                job.error = str(e) or type(e).__name__
+                job.finished_at = time.time()
+                self._unfinished -= 1
+                state = job.to_dict()
+        else:
+            with self._lock:
+                job.status = COMPLETED
+                job.result = result
+                job.finished_at = time.time()
+                self._unfinished -= 1
+                state = job.to_dict()
+        self._publish(job.id, state)
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _publish(self, job_id: str, state: Dict[str, Any]) -> None:
+        if self.directory is None:
+            return
+        path = self._path(job_id)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job published by any process, or ``None``"""
+        if self.directory is None or not _JOB_ID.match(job_id):
+            return None
+        try:
+            state = json.loads(self._path(job_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if self._expired(state, time.time()):
+            self._unlink(self._path(job_id))
+            return None
+        return state
+
+    def _expired(self, state: Dict[str, Any], now: float) -> bool:
+        finished = state.get("finished_at")
+        return finished is not None and now - finished > self.result_ttl
+
+    def _sweep(self, now: float) -> None:
+        """Drop expired and orphaned job files, at most once per ``result_ttl``"""
+        if self.directory is None or now < self._next_sweep:
+            return
+        self._next_sweep = now + max(self.result_ttl, 1.0)
+        for path in self.directory.glob("*.json"):
+            try:
+                if now - path.stat().st_mtime > STALE_JOB_SECONDS or self._expired(
+                    json.loads(path.read_text(encoding="utf-8")), now
+                ):
+                    self._unlink(path)
+            except (OSError, ValueError):
+                continue
+
+    def _unlink(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+            if self.directory is not None:
+                self._unlink(self._path(job_id))
+        self._sweep(now)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job, or ``None`` if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                state = job.to_dict()
+                if not self._expired(state, time.time()):
+                    return state
+                del self._jobs[job_id]
+        # Expired, or run by another worker process (read from its file)
+        return self._read(job_id)
+
+    @property
+    def pending(self) -> int:
+        """Number of queued or running jobs"""
+        with self._lock:
+            return self._unfinished
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool; a later submit starts a fresh one"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -6,27 +6,31 @@ Main application entry point with OpenTelemetry monitoring
 """
 
 import os
+import random
+import tempfile
 import time
-<<<<<<< HEAD
-from typing import Callable, Optional
-=======
-from typing import Callable
->>>>>>> origin/main
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import (
-    Counter,
-    Histogram,
-    Gauge,
-    CollectorRegistry,
-    CONTENT_TYPE_LATEST,
-    generate_latest,
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+
+from src.backend.admission import AdmissionController, Overloaded, load_latency_budget
+from src.backend.batching import MicroBatcher
+from src.backend.cache import ResultCache, cache_key
+from src.backend.image_validation import MAX_SIDE, MIN_SIDE, ImageValidator
+from src.backend.jobs import JobManager, JobQueueFull
+from src.backend.resumable import (
+    DEFAULT_MAX_RESERVED_BYTES,
+    DEFAULT_SESSION_TTL,
+    ResumableUploads,
+    receive_chunk,
+)
+from src.backend.singleflight import SingleFlight
+from src.backend.stages import StageTimer
+from src.backend.uploads import (
+    DEFAULT_MAX_BYTES,
+    UploadRejected,
+    UploadStore,
+    receive_upload,
 )
-<<<<<<< HEAD
-from prometheus_fastapi_instrumentator import Instrumentator
-=======
->>>>>>> origin/main
-from starlette.responses import Response as StarletteResponse
 
 # -------- Observability (Prometheus) --------
 OBS_ENABLE_METRICS = os.getenv("OBS_ENABLE_METRICS", "false").lower() in {
@@ -34,9 +38,14 @@ OBS_ENABLE_METRICS = os.getenv("OBS_ENABLE_METRICS", "false").lower() in {
     "true",
     "yes",
 }
-_registry = CollectorRegistry() if OBS_ENABLE_METRICS else None
+_registry = None
 
 if OBS_ENABLE_METRICS:
+    # Imported here so workers running without metrics never load the client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+    _registry = CollectorRegistry()
+
     REQUEST_COUNT = Counter(
         "http_requests_total",
         "Total number of HTTP requests",
@@ -49,32 +58,327 @@ if OBS_ENABLE_METRICS:
         "HTTP request latency in seconds",
         ["method", "endpoint"],
         registry=_registry,
-        buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+        buckets=(
+            0.005,
+            0.01,
+            0.025,
+            0.05,
+            0.1,
+            0.15,
+            0.25,
+            0.5,
+            0.75,
+            1.0,
+            1.5,
+            2.0,
+            3.0,
+            5.0,
+            10.0,
+        ),
     )
 
+    # multiprocess_mode only matters with PROMETHEUS_MULTIPROC_DIR set:
+    # last value written by any worker / worst live worker / sum of live ones
     IMAGE_ACCURACY_GAUGE = Gauge(
         "image_accuracy_score",
         "Current image accuracy score for virtual try-on",
         registry=_registry,
+        multiprocess_mode="mostrecent",
     )
 
     ERROR_RATE_GAUGE = Gauge(
-        "error_rate_percentage", "Current error rate percentage", registry=_registry
+        "error_rate_percentage",
+        "Current error rate percentage",
+        registry=_registry,
+        multiprocess_mode="livemax",
     )
 
     ACTIVE_CONNECTIONS = Gauge(
-        "active_connections", "Number of active connections", registry=_registry
+        "active_connections",
+        "Number of active connections",
+        registry=_registry,
+        multiprocess_mode="livesum",
+    )
+
+    BATCH_SIZE = Histogram(
+        "tryon_batch_size",
+        "Number of try-on requests per batched inference call",
+        registry=_registry,
+        buckets=(1, 2, 4, 8, 16, 32, 64),
+    )
+
+    BATCH_QUEUE_WAIT = Histogram(
+        "tryon_batch_queue_wait_seconds",
+        "Time a try-on request waits for its inference batch to start",
+        registry=_registry,
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0),
+    )
+
+    CACHE_HITS = Counter(
+        "tryon_cache_hits_total",
+        "Try-on result cache hits",
+        ["tier"],
+        registry=_registry,
+    )
+
+    CACHE_MISSES = Counter(
+        "tryon_cache_misses_total", "Try-on result cache misses", registry=_registry
+    )
+
+    CACHE_EVICTIONS = Counter(
+        "tryon_cache_evictions_total",
+        "Try-on result cache evictions",
+        ["tier"],
+        registry=_registry,
+    )
+
+    COALESCED_REQUESTS = Counter(
+        "tryon_coalesced_requests_total",
+        "Try-on requests attached to an identical in-flight job",
+        registry=_registry,
+    )
+
+    COALESCED_FANOUT = Histogram(
+        "tryon_coalesced_fanout",
+        "Number of requests served by each try-on computation",
+        registry=_registry,
+        buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+    )
+
+    PIPELINE_STAGE_DURATION = Histogram(
+        "pipeline_stage_duration_seconds",
+        "Duration of each try-on pipeline stage per batched call",
+        ["stage"],
+        registry=_registry,
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    )
+
+    TRYON_INFLIGHT = Gauge(
+        "tryon_inflight_jobs",
+        "Admitted try-on jobs that have not finished",
+        registry=_registry,
+        multiprocess_mode="livesum",
+    )
+
+    TRYON_QUEUE_DEPTH = Gauge(
+        "tryon_queue_depth",
+        "Admitted try-on jobs waiting for a free worker",
+        registry=_registry,
+        multiprocess_mode="livesum",
+    )
+
+    ADMISSION_REJECTIONS = Counter(
+        "tryon_admission_rejections_total",
+        "Try-on requests shed because the predicted queue wait broke the SLO",
+        registry=_registry,
+    )
+
+    IMAGE_REJECTIONS = Counter(
+        "tryon_image_rejections_total",
+        "Uploaded images rejected from their headers, before any decode",
+        ["reason"],
+        registry=_registry,
+    )
+
+# -------- Try-on job pool --------
+SIMULATED_ERROR_RATE = float(os.getenv("TRYON_SIMULATED_ERROR_RATE", "0.02"))
+# Seeded so benchmark runs are comparable; unset means nondeterministic
+_simulation_rng = random.Random(
+    int(os.environ["TRYON_SEED"]) if os.getenv("TRYON_SEED") else None
+)
+
+
+def seed_simulation(seed: Optional[int]) -> None:
+    """Reseed the try-on simulation (used by the benchmark harness)"""
+    _simulation_rng.seed(seed)
+
+
+# Workers mostly wait on the batcher, so keep at least one per batch slot
+job_manager = JobManager(
+    max_workers=int(os.getenv("TRYON_WORKERS", "8")),
+    max_pending=int(os.getenv("TRYON_MAX_PENDING", "64")),
+    result_ttl=float(os.getenv("TRYON_RESULT_TTL_SECONDS", "600")),
+    # Shared by the workers of a host so any of them answers job polls
+    directory=os.getenv("TRYON_JOB_DIR") or None,
+)
+
+
+# OpenTelemetry tracer, configured by create_app() when an exporter is set
+tracer = None
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    yield
+    job_manager.shutdown(wait=False)
+    tryon_batcher.close(timeout=1.0)
+
+
+stage_timer = StageTimer(
+    histogram=PIPELINE_STAGE_DURATION if OBS_ENABLE_METRICS else None,
+    # Set by create_app() once tracing is configured
+    tracer=None,
+)
+
+
+def infer_try_on_batch(payloads: List[Dict[str, Any]]) -> List[Any]:
+    """Run the (simulated) try-on model chain once for a whole batch"""
+    rng = _simulation_rng
+
+    span_cm = (
+        tracer.start_as_current_span("virtual_try_on_processing")
+        if tracer
+        else nullcontext()
     )
+    with span_cm as span:
+        if span is not None:
+            span.set_attribute("operation", "image_processing")
+            span.set_attribute("batch_size", len(payloads))
+
+        with stage_timer.stage("decode"):
+            inputs = [(p.get("image_url"), p.get("model", "v1.0")) for p in payloads]
+
+        with stage_timer.stage("segmentation"):
+            # Simulate occasional errors (2% error rate by default)
+            failures = [rng.random() < SIMULATED_ERROR_RATE for _ in inputs]
+
+        with stage_timer.stage("generation"):
+            # Simulate 0.5-2 second processing at high accuracy
+            generated = [
+                (rng.uniform(0.5, 2.0), rng.uniform(0.95, 0.99)) for _ in inputs
+            ]
+
+        with stage_timer.stage("refinement"):
+            if OBS_ENABLE_METRICS:
+                for (_, accuracy), failed in zip(generated, failures):
+                    if not failed:
+                        IMAGE_ACCURACY_GAUGE.set(accuracy * 100)
+
+        with stage_timer.stage("encode"):
+            results: List[Any] = []
+            for (_, model), (processing_time, accuracy), failed in zip(
+                inputs, generated, failures
+            ):
+                if failed:
+                    results.append(RuntimeError("AI processing failed"))
+                    continue
+                results.append(
+                    {
+                        "result": "success",
+                        "processing_time": processing_time,
+                        "accuracy": accuracy,
+                        "model_version": model,
+                        "image_url": "https://example.com/generated-image.jpg",
+                    }
+                )
+
+        failed_count = sum(failures)
+        if OBS_ENABLE_METRICS:
+            ERROR_RATE_GAUGE.set(2.0 if failed_count else 0.5)
+
+        if span is not None and failed_count:
+            from opentelemetry import trace
+
+            span.set_status(
+                trace.Status(trace.StatusCode.ERROR, f"{failed_count} item(s) failed")
+            )
+
+        return results
+
+
+tryon_batcher = MicroBatcher(
+    infer_try_on_batch,
+    max_batch_size=int(os.getenv("TRYON_MAX_BATCH_SIZE", "8")),
+    max_wait=float(os.getenv("TRYON_MAX_BATCH_WAIT_MS", "10")) / 1000.0,
+    batch_size_histogram=BATCH_SIZE if OBS_ENABLE_METRICS else None,
+    queue_wait_histogram=BATCH_QUEUE_WAIT if OBS_ENABLE_METRICS else None,
+    name="tryon-batcher",
+)
+
+
+result_cache = ResultCache(
+    max_memory_bytes=int(os.getenv("TRYON_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    disk_dir=os.getenv("TRYON_CACHE_DIR") or None,
+    max_disk_bytes=int(os.getenv("TRYON_CACHE_MAX_DISK_BYTES", "0")),
+    hits=CACHE_HITS if OBS_ENABLE_METRICS else None,
+    misses=CACHE_MISSES if OBS_ENABLE_METRICS else None,
+    evictions=CACHE_EVICTIONS if OBS_ENABLE_METRICS else None,
+)
+
+
+inflight = SingleFlight(
+    coalesced=COALESCED_REQUESTS if OBS_ENABLE_METRICS else None,
+    fanout=COALESCED_FANOUT if OBS_ENABLE_METRICS else None,
+)
+
+
+admission = AdmissionController(
+    latency_budget=(
+        float(os.getenv("TRYON_ADMISSION_BUDGET_MS")) / 1000.0
+        if os.getenv("TRYON_ADMISSION_BUDGET_MS")
+        else load_latency_budget()
+    ),
+    concurrency=job_manager.max_workers,
+    inflight=TRYON_INFLIGHT if OBS_ENABLE_METRICS else None,
+    queue_depth=TRYON_QUEUE_DEPTH if OBS_ENABLE_METRICS else None,
+    rejections=ADMISSION_REJECTIONS if OBS_ENABLE_METRICS else None,
+)
+
+
+image_validator = ImageValidator(
+    min_side=int(os.getenv("TRYON_MIN_IMAGE_SIDE", str(MIN_SIDE))),
+    max_side=int(os.getenv("TRYON_MAX_IMAGE_SIDE", str(MAX_SIDE))),
+    max_pixels=int(os.getenv("TRYON_MAX_IMAGE_PIXELS", "0")) or None,
+    rejections=IMAGE_REJECTIONS if OBS_ENABLE_METRICS else None,
+)
+
+
+upload_store = UploadStore(
+    root=os.getenv("TRYON_UPLOAD_DIR")
+    or os.path.join(tempfile.gettempdir(), "modamoda-uploads"),
+    max_bytes=int(os.getenv("TRYON_UPLOAD_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+    validator=image_validator,
+)
 
-# Create FastAPI application
-app = FastAPI(
-    title="Modamoda Invisible Mannequin API",
-    description="AI-powered fashion virtual try-on platform with SLO monitoring",
-    version="0.1.0",
+resumable_uploads = ResumableUploads(
+    upload_store,
+    ttl=float(os.getenv("TRYON_UPLOAD_SESSION_TTL_SECONDS", str(DEFAULT_SESSION_TTL))),
+    max_sessions=int(os.getenv("TRYON_UPLOAD_MAX_SESSIONS", "1024")),
+    max_reserved_bytes=int(
+        os.getenv("TRYON_UPLOAD_MAX_RESERVED_BYTES", str(DEFAULT_MAX_RESERVED_BYTES))
+    ),
 )
 
+
+def process_try_on(payload: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """Job body: run the request through the batcher and cache the result"""
+    started = time.perf_counter()
+    try:
+        result = tryon_batcher(payload)
+        result_cache.put(key, result)
+        return result
+    finally:
+        admission.release(time.perf_counter() - started)
+        # After the cache write, so followers arriving now get a cache hit
+        inflight.done(key)
+
+
+def start_try_on_job(payload: Dict[str, Any], key: str):
+    """Admit and queue a new try-on job (called once per in-flight key)"""
+    admission.acquire()
+    try:
+        return job_manager.submit(process_try_on, payload, key)
+    except JobQueueFull:
+        admission.release()
+        raise
+
+
 # -------- OpenTelemetry (optional) --------
-if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+def _init_tracing(app) -> None:
+    """Configure OTLP tracing for ``app`` when an exporter endpoint is set"""
+    global tracer
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return
     try:
         from opentelemetry import trace
         from opentelemetry.sdk.resources import Resource
@@ -87,129 +391,308 @@ if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
         from opentelemetry.instrumentation.logging import LoggingInstrumentation
         from opentelemetry.instrumentation.requests import RequestsInstrumentor
 
-        res = Resource.create(
-            {
-                "service.name": os.getenv("OTEL_SERVICE_NAME", "modamoda-api"),
-                "service.namespace": os.getenv("OTEL_SERVICE_NAMESPACE", "modamoda"),
-                "service.version": os.getenv("OTEL_SERVICE_VERSION", "1.0.0-rc1"),
-            }
-        )
-        provider = TracerProvider(resource=res)
-        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
-        trace.set_tracer_provider(provider)
-
-        # Create tracer
-        tracer = trace.get_tracer(__name__)
+        if tracer is None:
+            res = Resource.create(
+                {
+                    "service.name": os.getenv("OTEL_SERVICE_NAME", "modamoda-api"),
+                    "service.namespace": os.getenv(
+                        "OTEL_SERVICE_NAMESPACE", "modamoda"
+                    ),
+                    "service.version": os.getenv("OTEL_SERVICE_VERSION", "1.0.0-rc1"),
+                }
+            )
+            provider = TracerProvider(resource=res)
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            trace.set_tracer_provider(provider)
+
+            # Create tracer
+            tracer = trace.get_tracer(__name__)
+            LoggingInstrumentation().instrument(set_logging_format=True)
+            RequestsInstrumentor().instrument()
 
         FastAPIInstrumentor.instrument_app(app)
-        LoggingInstrumentation().instrument(set_logging_format=True)
-        RequestsInstrumentor().instrument()
+        stage_timer.tracer = tracer
     except Exception as _e:
         # Do not fail app if OTel optional deps mismatch
         tracer = None
-else:
-    tracer = None
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# -------- Prometheus Middleware --------
-# تأكيد كشف /metrics لما يكون OBS_ENABLE_METRICS=true
-if OBS_ENABLE_METRICS:
-    try:
-        Instrumentator().instrument(app).expose(
-            app,
-            endpoint="/metrics",
-            include_in_schema=False,
-        )
-    except Exception as e:
-        # ما منكسّر السيرفر لو القياس تعطل
-        import logging
-        logging.getLogger("uvicorn.error").warning(f"metrics disabled: {e}")
 
+def create_app():
+    """
+    Build the FastAPI application
+
+    FastAPI, pydantic and the optional OpenTelemetry stack are imported here
+    rather than at module import, so importing this module (workers, tools,
+    tests of the pipeline) stays cheap. ``src.backend.main:app`` keeps
+    working: the module-level ``app`` is created on first access.
+    """
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from pydantic import BaseModel, Field
+    from starlette.concurrency import run_in_threadpool
+    from starlette.responses import JSONResponse
+
+    app = FastAPI(
+        title="Modamoda Invisible Mannequin API",
+        description="AI-powered fashion virtual try-on platform with SLO monitoring",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
 
-@app.get("/")
-async def root():
-    """Root endpoint"""
-    return {"message": "Modamoda Invisible Mannequin API", "status": "running"}
+    _init_tracing(app)
 
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Configure appropriately for production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    # -------- Prometheus Middleware --------
+    # تأكيد كشف /metrics لما يكون OBS_ENABLE_METRICS=true
+    if OBS_ENABLE_METRICS:
+        from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+        from starlette.responses import Response as StarletteResponse
 
+        from src.backend.metrics import PrometheusMiddleware, scrape_registry
 
-@app.post("/api/v1/try-on")
-async def virtual_try_on():
-    """Virtual try-on endpoint - simulates AI processing"""
-    if tracer:
-        with tracer.start_as_current_span("virtual_try_on_processing") as span:
-            span.set_attribute("operation", "image_processing")
-            span.set_attribute("model_version", "v1.0")
+        app.add_middleware(
+            PrometheusMiddleware,
+            requests_total=REQUEST_COUNT,
+            request_latency=REQUEST_LATENCY,
+            active_connections=ACTIVE_CONNECTIONS,
+        )
 
-            # Simulate processing time and accuracy
-            import random
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            """Prometheus scrape endpoint for the application registry"""
+            return StarletteResponse(
+                generate_latest(scrape_registry(_registry)),
+                media_type=CONTENT_TYPE_LATEST,
+            )
+
+    @app.get("/")
+    async def root():
+        """Root endpoint"""
+        return {"message": "Modamoda Invisible Mannequin API", "status": "running"}
+
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint"""
+        return {"status": "healthy"}
+
+    class TryOnRequest(BaseModel):
+        """Virtual try-on submission"""
+
+        image_url: Optional[str] = None
+        upload_id: Optional[str] = None
+        model: str = "base-v1"
+        options: Dict[str, Any] = Field(default_factory=dict)
+
+    async def submit_try_on(payload: TryOnRequest):
+        """Serve a cached result (200) or join/queue the try-on job (202)"""
+        if payload.upload_id is not None:
+            if not upload_store.exists(payload.upload_id):
+                raise HTTPException(status_code=404, detail="Upload not found")
+            # Same key as hashing the bytes: the upload id is their SHA-256
+            image_id = "sha256:" + payload.upload_id
+        else:
+            image_id = payload.image_url
+        key = cache_key(image_id, payload.model, payload.options)
+        if result_cache.touches_disk:
+            cached = await run_in_threadpool(result_cache.get, key)
+        else:
+            cached = result_cache.get(key)
+        if cached is not None:
+            return JSONResponse(status_code=200, content={**cached, "cached": True})
+
+        try:
+            job, _leader = inflight.join(
+                key, lambda: start_try_on_job(payload.model_dump(), key)
+            )
+        except Overloaded as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Try-on capacity exceeded, retry later",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        except JobQueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Try-on queue is full",
+                headers={"Retry-After": "1"},
+            )
+        status_url = f"/api/v1/jobs/{job.id}"
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job.id, "status": job.status, "status_url": status_url},
+            headers={"Location": status_url},
+        )
 
-            processing_time = random.uniform(
-                0.5, 2.0
-            )  # Simulate 0.5-2 second processing
-            accuracy = random.uniform(0.95, 0.99)  # Simulate high accuracy
+    def rejected(e: UploadRejected) -> HTTPException:
+        return HTTPException(
+            status_code=e.status_code, detail={"reason": e.reason, "error": str(e)}
+        )
 
-            if OBS_ENABLE_METRICS:
-                # Update metrics
-                IMAGE_ACCURACY_GAUGE.set(accuracy * 100)
-
-            # Simulate occasional errors (2% error rate)
-            if random.random() < 0.02:
-                if OBS_ENABLE_METRICS:
-                    ERROR_RATE_GAUGE.set(2.0)
-                span.set_status(
-                    trace.Status(trace.StatusCode.ERROR, "Processing failed")
-                )
-                raise Exception("AI processing failed")
+    @app.post("/api/v1/try-on", status_code=202)
+    async def virtual_try_on(payload: Optional[TryOnRequest] = None):
+        """
+        Virtual try-on endpoint - serves cached results, otherwise queues a job
+
+        Identical requests already in flight share that job instead of queuing
+        their own; new work is shed with 429 when its predicted queue wait would
+        break the latency SLO.
+        """
+        return await submit_try_on(payload or TryOnRequest())
+
+    @app.post("/api/v1/uploads", status_code=201)
+    async def upload_image(request: Request):
+        """
+        Image upload - streamed to disk, hashed and validated as it arrives
+
+        Answers with the ``upload_id`` (SHA-256 of the bytes) to pass to the
+        try-on endpoint. Oversized bodies get 413 mid-stream; bad images get
+        415/422 as soon as their headers have arrived.
+        """
+        length = request.headers.get("content-length")
+        try:
+            stored = await receive_upload(
+                request.headers.get("content-type", ""),
+                int(length) if length and length.isdigit() else None,
+                request.stream(),
+                upload_store,
+            )
+        except UploadRejected as e:
+            raise rejected(e)
+        return JSONResponse(status_code=201, content=stored.to_dict())
+
+    class UploadSessionRequest(BaseModel):
+        """Resumable upload: total size and optional SHA-256 to check at finalize"""
+
+        size: int
+        sha256: Optional[str] = Field(default=None, pattern="^[0-9a-fA-F]{64}$")
+
+    class UploadTryOn(BaseModel):
+        """Try-on to queue for an upload once it is finalized"""
+
+        model: str = "base-v1"
+        options: Dict[str, Any] = Field(default_factory=dict)
+
+    class FinalizeRequest(BaseModel):
+        """Finalize body; without ``try_on`` the upload is only stored"""
+
+        try_on: Optional[UploadTryOn] = None
+
+    def session_headers(session) -> Dict[str, str]:
+        return {
+            "Upload-Offset": str(session.offset),
+            "Upload-Length": str(session.size),
+            "Cache-Control": "no-store",
+        }
 
-            if OBS_ENABLE_METRICS:
-                ERROR_RATE_GAUGE.set(0.5)  # Low error rate
+    @app.post("/api/v1/uploads/sessions", status_code=201)
+    async def create_upload_session(payload: UploadSessionRequest):
+        """
+        Resumable upload - open a session, then PATCH chunks into it
+
+        Chunks carry their byte offset in ``Upload-Offset`` and may be sent
+        in any order and in parallel. After a dropped connection, GET/HEAD
+        the session and resend from its ``offset``; then finalize.
+        """
+        try:
+            session = await run_in_threadpool(
+                resumable_uploads.create, payload.size, payload.sha256
+            )
+        except UploadRejected as e:
+            raise rejected(e)
+        upload_url = f"/api/v1/uploads/sessions/{session.id}"
+        return JSONResponse(
+            status_code=201,
+            content={**session.to_dict(), "upload_url": upload_url},
+            headers={**session_headers(session), "Location": upload_url},
+        )
 
-            span.set_attribute("processing_time", processing_time)
-            span.set_attribute("accuracy_score", accuracy)
+    @app.patch("/api/v1/uploads/sessions/{session_id}")
+    async def upload_chunk(session_id: str, request: Request):
+        """Write the request body at the byte offset given in ``Upload-Offset``"""
+        offset = request.headers.get("upload-offset", "")
+        if not offset.isdigit():
+            raise HTTPException(
+                status_code=400,
+                detail={"reason": "bad_offset", "error": "Upload-Offset is required"},
+            )
+        try:
+            session = await receive_chunk(
+                resumable_uploads, session_id, int(offset), request.stream()
+            )
+        except UploadRejected as e:
+            raise rejected(e)
+        return JSONResponse(content=session.to_dict(), headers=session_headers(session))
+
+    @app.api_route("/api/v1/uploads/sessions/{session_id}", methods=["GET", "HEAD"])
+    async def get_upload_session(session_id: str):
+        """Progress of a session: resume sending at ``Upload-Offset``"""
+        try:
+            session = resumable_uploads.get(session_id)
+        except UploadRejected as e:
+            raise rejected(e)
+        return JSONResponse(content=session.to_dict(), headers=session_headers(session))
+
+    @app.post("/api/v1/uploads/sessions/{session_id}/finalize")
+    async def finalize_upload_session(
+        session_id: str, payload: Optional[FinalizeRequest] = None
+    ):
+        """
+        Close a complete session into the upload store
+
+        Answers like ``POST /api/v1/uploads`` (201), or, with a ``try_on``
+        body, like ``POST /api/v1/try-on`` for the stored upload (202 job or
+        200 cached result).
+        """
+        try:
+            stored = await run_in_threadpool(resumable_uploads.finalize, session_id)
+        except UploadRejected as e:
+            raise rejected(e)
+        if payload is None or payload.try_on is None:
+            return JSONResponse(status_code=201, content=stored.to_dict())
+        return await submit_try_on(
+            TryOnRequest(
+                upload_id=stored.sha256,
+                model=payload.try_on.model,
+                options=payload.try_on.options,
+            )
+        )
 
-            return {
-                "result": "success",
-                "processing_time": processing_time,
-                "accuracy": accuracy,
-                "image_url": "https://example.com/generated-image.jpg",
-            }
-    else:
-        # Fallback without tracing
-        import random
+    @app.delete("/api/v1/uploads/sessions/{session_id}", status_code=204)
+    async def delete_upload_session(session_id: str):
+        """Abandon a session and delete its partial file"""
+        if not await run_in_threadpool(resumable_uploads.abort, session_id):
+            raise HTTPException(status_code=404, detail="Upload session not found")
 
-        processing_time = random.uniform(0.5, 2.0)
-        accuracy = random.uniform(0.95, 0.99)
+    @app.get("/api/v1/jobs/{job_id}")
+    async def get_job(job_id: str):
+        """Job status endpoint - returns the result once the job has completed"""
+        job = job_manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
 
-        if OBS_ENABLE_METRICS:
-            IMAGE_ACCURACY_GAUGE.set(accuracy * 100)
-            if random.random() < 0.02:
-                ERROR_RATE_GAUGE.set(2.0)
-                raise Exception("AI processing failed")
-            ERROR_RATE_GAUGE.set(0.5)
+    return app
 
-        return {
-            "result": "success",
-            "processing_time": processing_time,
-            "accuracy": accuracy,
-            "image_url": "https://example.com/generated-image.jpg",
-        }
+
+def __getattr__(name: str):
+    # ``src.backend.main:app`` (uvicorn, gunicorn, tests) builds the app on
+    # first access instead of at import
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
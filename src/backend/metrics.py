@@ -0,0 +1,113 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Prometheus HTTP metrics as a pure ASGI middleware
+
+Records request counts and latency labelled by the matched route template
+(never the raw path) plus the number of in-flight requests. Label children
+are resolved once per (method, route, status) and cached, so the hot path
+is a dict lookup, one ``inc`` and one ``observe``.
+
+Multi-worker deployments set ``PROMETHEUS_MULTIPROC_DIR``: every worker then
+writes its samples to files in that directory and :func:`scrape_registry`
+aggregates them, so a scrape sees the whole server rather than one worker.
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from prometheus_client import CollectorRegistry
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def multiprocess_dir() -> Optional[str]:
+    """Shared metrics directory when running in multiprocess mode"""
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get(
+        "prometheus_multiproc_dir"
+    )
+
+
+def scrape_registry(registry: CollectorRegistry) -> CollectorRegistry:
+    """
+    Registry to render on ``/metrics``
+
+    In multiprocess mode this is a fresh registry whose collector merges the
+    per-process files (gauges per their ``multiprocess_mode``); otherwise it
+    is ``registry`` itself.
+    """
+    if not multiprocess_dir():
+        return registry
+    from prometheus_client import multiprocess
+
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    return merged
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware feeding ``requests_total{method,endpoint,status_code}``,
+    ``request_latency{method,endpoint}`` and an optional ``active_connections``
+    gauge. Paths in ``excluded_paths`` (the scrape endpoint by default) pass
+    through unrecorded.
+    """
+
+    def __init__(
+        self,
+        app,
+        requests_total,
+        request_latency,
+        active_connections=None,
+        excluded_paths: Iterable[str] = ("/metrics",),
+    ):
+        self.app = app
+        self.requests_total = requests_total
+        self.request_latency = request_latency
+        self.active_connections = active_connections
+        self.excluded_paths = frozenset(excluded_paths)
+        self._children: Dict[Tuple[str, str, int], Tuple[Any, Any]] = {}
+
+    def _resolve(self, method: str, endpoint: str, status: int) -> Tuple[Any, Any]:
+        children = (
+            self.requests_total.labels(
+                method=method, endpoint=endpoint, status_code=str(status)
+            ),
+            self.request_latency.labels(method=method, endpoint=endpoint),
+        )
+        self._children[(method, endpoint, status)] = children
+        return children
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        active = self.active_connections
+        if active is not None:
+            active.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if active is not None:
+                active.dec()
+            # The router stores the matched route on the shared scope
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            children = self._children.get((method, endpoint, status))
+            if children is None:
+                children = self._resolve(method, endpoint, status)
+            children[0].inc()
+            children[1].observe(elapsed)
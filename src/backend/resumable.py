@@ -0,0 +1,502 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Resumable chunked uploads
+
+A client creates a session for ``size`` bytes, then sends the bytes as
+chunks at explicit offsets (in any order, several at once), asks for the
+current offset after a dropped connection and resends only what is
+missing, and finally finalizes the session into the content-addressed
+:class:`~src.backend.uploads.UploadStore`.
+
+Chunks are written with ``pwrite`` into a file preallocated to the full
+size; the session tracks which byte ranges have arrived. The image
+headers are validated as soon as they have arrived contiguously from the
+start, so a bad upload is refused before the rest is sent. Sessions
+expire ``ttl`` seconds after their last activity and their partial files
+are deleted. Open sessions may reserve at most ``max_reserved_bytes`` of
+disk between them, so sessions opened and never fed cannot fill it.
+
+Session state is kept next to the part file as ``<id>.json`` and updated
+under a ``flock`` on the sessions directory, so every API worker process
+sharing the upload directory (the workers of one host) can serve any
+request of any session.
+"""
+
+import fcntl
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from src.backend.uploads import (
+    HEADER_BYTES,
+    MAX_HEADER_BYTES,
+    StoredUpload,
+    UploadRejected,
+    UploadStore,
+    check_header,
+)
+
+DEFAULT_SESSION_TTL = 24 * 3600.0
+DEFAULT_MAX_RESERVED_BYTES = 2 * 1024 * 1024 * 1024
+HASH_CHUNK = 1 << 20
+# Expired sessions are swept at most this often per process
+PURGE_INTERVAL = 60.0
+
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass
+class UploadSession:
+    """Progress of one resumable upload"""
+
+    id: str
+    size: int
+    path: Path
+    expires_at: float
+    sha256: Optional[str] = None
+    # Sorted, non-overlapping, non-adjacent [start, end) ranges received
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
+    validated: bool = False
+    # Contiguous prefix at the last header check
+    probed: int = 0
+    # Chunks being written, per process id of the worker writing them
+    writers: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def offset(self) -> int:
+        """Length of the contiguous prefix received: where to resume"""
+        if self.ranges and self.ranges[0][0] == 0:
+            return self.ranges[0][1]
+        return 0
+
+    @property
+    def busy(self) -> bool:
+        """Whether a live process is writing a chunk"""
+        return any(n > 0 and _alive(pid) for pid, n in self.writers.items())
+
+    @property
+    def received(self) -> int:
+        return sum(end - start for start, end in self.ranges)
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.size
+
+    def add_range(self, start: int, end: int) -> None:
+        if start >= end:
+            return
+        merged: List[Tuple[int, int]] = []
+        for s, e in self.ranges:
+            if e < start or s > end:
+                merged.append((s, e))
+            else:
+                start, end = min(s, start), max(e, end)
+        merged.append((start, end))
+        self.ranges = sorted(merged)
+
+    def state(self) -> Dict[str, Any]:
+        """What is persisted in the session's ``.json`` file"""
+        return {
+            "id": self.id,
+            "size": self.size,
+            "expires_at": self.expires_at,
+            "sha256": self.sha256,
+            "ranges": [list(r) for r in self.ranges],
+            "validated": self.validated,
+            "probed": self.probed,
+            "writers": {str(pid): n for pid, n in self.writers.items() if n > 0},
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], path: Path) -> "UploadSession":
+        return cls(
+            id=state["id"],
+            size=state["size"],
+            path=path,
+            expires_at=state["expires_at"],
+            sha256=state["sha256"],
+            ranges=[(start, end) for start, end in state["ranges"]],
+            validated=state["validated"],
+            probed=state.get("probed", 0),
+            writers={int(pid): n for pid, n in state["writers"].items()},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "size": self.size,
+            "offset": self.offset,
+            "received": self.received,
+            "ranges": [list(r) for r in self.ranges],
+            "complete": self.complete,
+            "expires_at": self.expires_at,
+        }
+
+
+def _alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Prefix(io.RawIOBase):
+    """The first ``limit`` bytes of a file: past them, reads come back short"""
+
+    def __init__(self, f: BinaryIO, limit: int):
+        self._f = f
+        self._limit = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        return self._f.seek(pos, whence)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def read(self, n: int = -1) -> bytes:
+        left = max(0, self._limit - self._f.tell())
+        return self._f.read(left if n < 0 else min(n, left))
+
+
+class ResumableUploads:
+    """
+    Open upload sessions, as ``.part`` + ``.json`` file pairs on disk
+
+    At most ``max_sessions`` may be open at once, together declaring at
+    most ``max_reserved_bytes``; sessions idle for more than ``ttl``
+    seconds are dropped with their files.
+    """
+
+    def __init__(
+        self,
+        store: UploadStore,
+        ttl: float = DEFAULT_SESSION_TTL,
+        max_sessions: int = 1024,
+        max_reserved_bytes: int = DEFAULT_MAX_RESERVED_BYTES,
+    ):
+        self.store = store
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_reserved_bytes = max_reserved_bytes
+        self._next_purge = 0.0
+        self._purge_lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        return self.store.root / ".sessions"
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive access to session state, across threads and processes"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # One open file description per holder: flock excludes threads too
+        with open(self.directory / ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _meta(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.json"
+
+    def _load(self, session_id: str, now: float) -> Optional[UploadSession]:
+        """The session if it exists and has not expired (call locked)"""
+        if not _SESSION_ID.match(session_id):
+            return None
+        try:
+            state = json.loads(self._meta(session_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        session = UploadSession.from_state(state, self.directory / f"{session_id}.part")
+        if session.expires_at < now and not session.busy:
+            self._delete(session)
+            return None
+        return session
+
+    def _save(self, session: UploadSession) -> None:
+        path = self._meta(session.id)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(session.state()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _delete(self, session: UploadSession) -> None:
+        self._unlink(self._meta(session.id))
+        self._unlink(session.path)
+
+    def _sessions(self, now: float) -> List[UploadSession]:
+        """Every live session; expired ones are deleted (call locked)"""
+        live = []
+        for path in self.directory.glob("*.json"):
+            session = self._load(path.stem, now)
+            if session is not None:
+                live.append(session)
+        return live
+
+    def _lookup(self, session_id: str) -> UploadSession:
+        now = time.time()
+        self._maybe_purge(now)
+        with self._locked():
+            session = self._load(session_id, now)
+        if session is None:
+            raise UploadRejected(404, "unknown_session", "upload session not found")
+        return session
+
+    def _maybe_purge(self, now: float) -> None:
+        with self._purge_lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + min(self.ttl, PURGE_INTERVAL)
+        with self._locked():
+            self._sessions(now)
+            # Part files whose session was claimed by a worker that then died
+            for part in self.directory.glob("*.part"):
+                if not self._meta(part.stem).exists():
+                    try:
+                        if part.stat().st_mtime < now - self.ttl:
+                            self._unlink(part)
+                    except FileNotFoundError:
+                        pass
+
+    def create(self, size: int, sha256: Optional[str] = None) -> UploadSession:
+        """Open a session for ``size`` bytes and preallocate its file"""
+        if size <= 0:
+            raise UploadRejected(400, "bad_size", "upload size must be positive")
+        if size > self.store.max_bytes:
+            raise UploadRejected(
+                413, "too_large", f"upload exceeds {self.store.max_bytes} bytes"
+            )
+        now = time.time()
+        session_id = uuid.uuid4().hex
+        session = UploadSession(
+            id=session_id,
+            size=size,
+            path=self.directory / f"{session_id}.part",
+            expires_at=now + self.ttl,
+            sha256=sha256.lower() if sha256 else None,
+        )
+        with self._locked():
+            live = self._sessions(now)
+            if len(live) >= self.max_sessions:
+                raise UploadRejected(
+                    503, "too_many_sessions", "too many uploads in progress"
+                )
+            if sum(s.size for s in live) + size > self.max_reserved_bytes:
+                raise UploadRejected(
+                    503, "upload_space_full", "too many bytes of uploads in progress"
+                )
+            fd = os.open(session.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(fd, 0, size)
+                else:
+                    os.ftruncate(fd, size)
+                self._save(session)
+            except BaseException:
+                self._unlink(session.path)
+                raise
+            finally:
+                os.close(fd)
+        return session
+
+    def get(self, session_id: str) -> UploadSession:
+        """The live session, or :class:`UploadRejected` (404) if unknown/expired"""
+        return self._lookup(session_id)
+
+    def begin_write(self, session_id: str, offset: int) -> Tuple[UploadSession, int]:
+        """Check a chunk's offset and open the part file for it"""
+        now = time.time()
+        self._maybe_purge(now)
+        # Registered as a writer before the file is opened: finalize refuses
+        # busy sessions, so it cannot move the file out from under this chunk
+        with self._locked():
+            session = self._load(session_id, now)
+            if session is None:
+                raise UploadRejected(404, "unknown_session", "upload session not found")
+            if not 0 <= offset < session.size:
+                raise UploadRejected(
+                    416, "bad_offset", f"offset must be in [0, {session.size})"
+                )
+            self._add_writer(session, 1)
+            session.expires_at = now + self.ttl
+            self._save(session)
+        try:
+            fd = os.open(session.path, os.O_WRONLY)
+        except OSError:
+            self._release(session.id)
+            raise
+        return session, fd
+
+    def _add_writer(self, session: UploadSession, n: int) -> None:
+        pid = os.getpid()
+        session.writers[pid] = session.writers.get(pid, 0) + n
+
+    def _release(self, session_id: str) -> Optional[UploadSession]:
+        with self._locked():
+            session = self._load(session_id, time.time())
+            if session is not None:
+                self._add_writer(session, -1)
+                self._save(session)
+        return session
+
+    def write(
+        self, session: UploadSession, fd: int, offset: int, data: bytes
+    ) -> UploadSession:
+        """Write ``data`` at ``offset``, record the range; the updated session"""
+        end = offset + len(data)
+        if end > session.size:
+            raise UploadRejected(
+                413, "past_end", f"chunk ends past the declared size {session.size}"
+            )
+        view = memoryview(data)
+        pos = offset
+        while view:
+            written = os.pwrite(fd, view, pos)
+            view, pos = view[written:], pos + written
+        now = time.time()
+        with self._locked():
+            current = self._load(session.id, now)
+            if current is None:
+                # Aborted while this chunk was in flight
+                raise UploadRejected(404, "unknown_session", "upload session not found")
+            current.add_range(offset, end)
+            current.expires_at = now + self.ttl
+            prefix = current.offset
+            probe = self._probe_due(current, prefix)
+            if probe:
+                current.probed = prefix
+            self._save(current)
+        if probe:
+            if self._validate_header(current, prefix):
+                with self._locked():
+                    current = self._load(session.id, time.time()) or current
+                    current.validated = True
+                    self._save(current)
+        return current
+
+    def _probe_due(self, session: UploadSession, prefix: int) -> bool:
+        if session.validated or prefix < min(session.size, HEADER_BYTES):
+            return False
+        # Each check re-reads the headers from the file: only repeat it once
+        # the prefix has doubled, or reached the header limit, so the total
+        # stays linear in the upload size
+        limit = min(session.size, MAX_HEADER_BYTES)
+        return prefix >= 2 * session.probed or session.probed < limit <= prefix
+
+    def end_write(self, session: UploadSession, fd: int) -> UploadSession:
+        """Close the chunk's file; the latest state of the session"""
+        os.close(fd)
+        return self._release(session.id) or session
+
+    def _validate_header(self, session: UploadSession, prefix: int) -> bool:
+        """Check the headers within the ``prefix`` bytes received contiguously"""
+        # The rest of the preallocated file is zeros, not missing bytes
+        wait = prefix < min(session.size, MAX_HEADER_BYTES)
+        try:
+            with open(session.path, "rb") as f:
+                info = check_header(_Prefix(f, prefix), self.store.validator, wait)
+        except UploadRejected:
+            self.abort(session.id)
+            raise
+        return info is not None
+
+    def finalize(self, session_id: str) -> StoredUpload:
+        """Hash, validate and move a complete upload into the store"""
+        with self._locked():
+            session = self._load(session_id, time.time())
+            if session is None:
+                raise UploadRejected(404, "unknown_session", "upload session not found")
+            if not session.complete:
+                raise UploadRejected(
+                    409,
+                    "incomplete",
+                    f"{session.size - session.received} bytes missing"
+                    f" (offset {session.offset})",
+                )
+            if session.busy:
+                raise UploadRejected(409, "busy", "chunks are still being written")
+            # Claimed: later requests for this session get 404
+            self._unlink(self._meta(session_id))
+        try:
+            h = hashlib.sha256()
+            with open(session.path, "rb") as f:
+                info = check_header(f, self.store.validator)
+                f.seek(0)
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                    h.update(chunk)
+            sha = h.hexdigest()
+            if session.sha256 and session.sha256 != sha:
+                raise UploadRejected(
+                    422, "checksum_mismatch", "uploaded bytes do not match sha256"
+                )
+            path = self.store.path(sha)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(session.path, path)
+            return StoredUpload(sha, session.size, info, path)
+        finally:
+            self._unlink(session.path)
+
+    def abort(self, session_id: str) -> bool:
+        """Drop a session and its partial file"""
+        with self._locked():
+            session = self._load(session_id, time.time())
+            if session is None:
+                return False
+            self._delete(session)
+        return True
+
+    def _unlink(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @property
+    def reserved_bytes(self) -> int:
+        """Disk preallocated by the open sessions"""
+        with self._locked():
+            return sum(s.size for s in self._sessions(time.time()))
+
+    def __len__(self) -> int:
+        with self._locked():
+            return len(self._sessions(time.time()))
+
+
+async def receive_chunk(
+    uploads: ResumableUploads,
+    session_id: str,
+    offset: int,
+    body: AsyncIterator[bytes],
+) -> UploadSession:
+    """Stream one PATCH body into a session at ``offset``, chunk by chunk"""
+    from starlette.concurrency import run_in_threadpool
+
+    session, fd = await run_in_threadpool(uploads.begin_write, session_id, offset)
+    try:
+        async for chunk in body:
+            if chunk:
+                session = await run_in_threadpool(
+                    uploads.write, session, fd, offset, chunk
+                )
+                offset += len(chunk)
+    finally:
+        session = await run_in_threadpool(uploads.end_write, session, fd)
+    return session
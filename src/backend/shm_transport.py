@@ -0,0 +1,293 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Zero-copy image transport between the API and inference workers
+
+A decoded image is copied once into a ``multiprocessing.shared_memory``
+segment (``/dev/shm`` on Linux); only a small :class:`ImageHandle` (segment
+name, shape, element format) travels through the job queue. Workers map
+the same pages with :func:`open_image` instead of unpickling tens of MB.
+
+The producing process owns every segment it creates: :class:`SharedImageStore`
+reference-counts them (one reference per hop still holding the handle)
+and unlinks a segment when its count reaches zero. Segments still alive
+after ``max_age`` seconds are reported as leaks and reclaimed by
+:meth:`SharedImageStore.reap`.
+"""
+
+import logging
+import mmap
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# struct format codes of the element types images come in
+ITEM_SIZES = {"B": 1, "b": 1, "H": 2, "h": 2, "f": 4, "d": 8}
+NUMPY_DTYPES = {
+    "B": "uint8",
+    "b": "int8",
+    "H": "uint16",
+    "h": "int16",
+    "f": "float32",
+    "d": "float64",
+}
+
+SEGMENT_PREFIX = "modamoda-img-"
+SHM_DIR = "/dev/shm"
+
+
+class SharedMemoryFull(Exception):
+    """Raised when a new image would exceed the store's ``max_bytes``"""
+
+
+@dataclass(frozen=True)
+class ImageHandle:
+    """What crosses the process boundary instead of the pixels"""
+
+    name: str
+    shape: Tuple[int, ...]
+    format: str = "B"
+
+    @property
+    def nbytes(self) -> int:
+        n = ITEM_SIZES[self.format]
+        for dim in self.shape:
+            n *= dim
+        return n
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form for task messages"""
+        return {"name": self.name, "shape": list(self.shape), "format": self.format}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ImageHandle":
+        return cls(data["name"], tuple(int(d) for d in data["shape"]), data["format"])
+
+
+def _describe(image: Any) -> Tuple[Tuple[int, ...], str]:
+    """Shape and struct format of a buffer-protocol object (e.g. ndarray)"""
+    view = memoryview(image)
+    fmt = view.format.lstrip("@=<")
+    if fmt not in ITEM_SIZES:
+        raise TypeError(f"unsupported element format {view.format!r}")
+    return tuple(view.shape), fmt
+
+
+@dataclass
+class _Segment:
+    shm: shared_memory.SharedMemory
+    handle: ImageHandle
+    refs: int
+    created: float
+
+
+class SharedImageStore:
+    """
+    Owner-side table of the shared image segments of this process
+
+    At most ``max_bytes`` of image data are held at once; further
+    :meth:`put` calls raise :class:`SharedMemoryFull`. ``leaks`` is an
+    optional counter (anything with ``inc()``) bumped per reaped segment.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age: float = 600.0,
+        leaks: Optional[Any] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._leaks = leaks
+        self._segments: Dict[str, _Segment] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, image: Any, refs: int = 1) -> ImageHandle:
+        """
+        Copy ``image`` into a new segment and return its handle
+
+        ``image`` is any C-contiguous buffer (ndarray, bytes, memoryview);
+        its shape and element format are recorded in the handle. The
+        segment starts with ``refs`` references.
+        """
+        shape, fmt = _describe(image)
+        view = memoryview(image)
+        if not view.c_contiguous:
+            raise ValueError("image buffer must be C-contiguous")
+        size = view.nbytes
+        with self._lock:
+            if self._bytes + size > self.max_bytes:
+                raise SharedMemoryFull(
+                    f"{self._bytes + size} bytes requested (limit {self.max_bytes})"
+                )
+            self._bytes += size
+        try:
+            shm = shared_memory.SharedMemory(
+                name=SEGMENT_PREFIX + uuid.uuid4().hex, create=True, size=max(size, 1)
+            )
+        except BaseException:
+            with self._lock:
+                self._bytes -= size
+            raise
+        try:
+            shm.buf[:size] = view.cast("B")
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            with self._lock:
+                self._bytes -= size
+            raise
+        handle = ImageHandle(shm.name, shape, fmt)
+        with self._lock:
+            self._segments[shm.name] = _Segment(shm, handle, refs, time.monotonic())
+        return handle
+
+    def acquire(self, handle: ImageHandle, count: int = 1) -> None:
+        """Add references, e.g. before fanning a handle out to more workers"""
+        with self._lock:
+            segment = self._segments.get(handle.name)
+            if segment is None:
+                raise KeyError(f"unknown or released image segment {handle.name}")
+            segment.refs += count
+
+    def release(self, handle: ImageHandle) -> bool:
+        """Drop one reference; returns ``True`` when the segment was freed"""
+        with self._lock:
+            segment = self._segments.get(handle.name)
+            if segment is None:
+                return False
+            segment.refs -= 1
+            if segment.refs > 0:
+                return False
+            del self._segments[handle.name]
+            self._bytes -= segment.handle.nbytes
+        self._free(segment)
+        return True
+
+    def _free(self, segment: _Segment) -> None:
+        segment.shm.close()
+        try:
+            segment.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def leaked(self, now: Optional[float] = None) -> List[ImageHandle]:
+        """Handles of segments alive for longer than ``max_age``"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [
+                s.handle
+                for s in self._segments.values()
+                if now - s.created > self.max_age
+            ]
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """Free every leaked segment regardless of its count; returns how many"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [
+                s for s in self._segments.values() if now - s.created > self.max_age
+            ]
+            for s in expired:
+                del self._segments[s.handle.name]
+                self._bytes -= s.handle.nbytes
+        for s in expired:
+            logger.warning(
+                "reclaiming leaked image segment %s (%d refs, %.0fs old)",
+                s.handle.name,
+                s.refs,
+                now - s.created,
+            )
+            self._free(s)
+            if self._leaks is not None:
+                self._leaks.inc()
+        return len(expired)
+
+    @property
+    def bytes_in_use(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._segments)
+
+    def close(self) -> None:
+        """Free every segment; those still referenced are logged as leaks"""
+        with self._lock:
+            segments, self._segments = list(self._segments.values()), {}
+            self._bytes = 0
+        for s in segments:
+            logger.warning(
+                "image segment %s still had %d refs at shutdown", s.handle.name, s.refs
+            )
+            self._free(s)
+
+
+class _Mapping:
+    """Read-only mapping of an existing segment, as a consumer"""
+
+    def __init__(self, name: str, size: int):
+        self._shm = None
+        path = os.path.join(SHM_DIR, name.lstrip("/"))
+        if os.path.isdir(SHM_DIR):
+            # Mapped directly: SharedMemory(create=False) would register the
+            # segment with this process' resource tracker, which unlinks it
+            # (the owner's segment) when the worker exits
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(
+                    f.fileno(), max(size, 1), access=mmap.ACCESS_READ
+                )
+            self.buf = memoryview(self._mmap)[:size]
+        else:
+            self._shm = shared_memory.SharedMemory(name=name, create=False)
+            self._mmap = None
+            self.buf = self._shm.buf[:size].toreadonly()
+
+    def close(self) -> None:
+        self.buf.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        else:
+            self._shm.close()
+
+
+@contextmanager
+def open_image(handle: ImageHandle) -> Iterator[Any]:
+    """
+    Map a shared image read-only for the duration of the block
+
+    Yields a numpy array when numpy is installed, else a ``memoryview``
+    cast to the handle's shape. Neither copies the pixels; the image must
+    not be used after the block exits.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    mapping = _Mapping(handle.name, handle.nbytes)
+    if np is None:
+        image = mapping.buf.cast(handle.format, handle.shape)
+    else:
+        image = np.frombuffer(mapping.buf, dtype=NUMPY_DTYPES[handle.format])
+        image = image.reshape(handle.shape)
+    try:
+        yield image
+    finally:
+        if np is None:
+            image.release()
+        del image
+        try:
+            mapping.close()
+        except BufferError:
+            # The caller kept a view alive: the mapping goes with its last view
+            logger.debug("image segment %s still viewed after close", handle.name)
@@ -0,0 +1,70 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Request coalescing (single-flight) for identical in-flight work
+
+The first caller for a key starts the computation; callers arriving while
+it is still in flight are handed the same handle instead of starting their
+own. The leader reports completion with :meth:`SingleFlight.done`.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("value", "waiters")
+
+    def __init__(self):
+        self.value: Any = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Thread-safe key → in-flight handle table
+
+    ``coalesced`` is an optional counter incremented for every follower and
+    ``fanout`` an optional histogram observing how many requests (leader
+    included) shared each computation.
+    """
+
+    def __init__(self, coalesced: Optional[Any] = None, fanout: Optional[Any] = None):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._coalesced = coalesced
+        self._fanout = fanout
+
+    def join(self, key: str, start: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return ``(handle, is_leader)`` for ``key``
+
+        ``start`` runs only for the leader, under the table lock, so it must
+        be quick (e.g. enqueue a job and return its handle). If it raises,
+        nothing is recorded and the error propagates.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                if self._coalesced is not None:
+                    self._coalesced.inc()
+                return call.value, False
+            # Register before starting so an early done() always finds the entry
+            call = self._calls[key] = _Call()
+            try:
+                call.value = start()
+            except BaseException:
+                del self._calls[key]
+                raise
+            return call.value, True
+
+    def done(self, key: str) -> None:
+        """Mark the computation for ``key`` finished; later callers start afresh"""
+        with self._lock:
+            call = self._calls.pop(key, None)
+        if call is not None and self._fanout is not None:
+            self._fanout.observe(call.waiters + 1)
+
+    def __len__(self) -> int:
+        return len(self._calls)
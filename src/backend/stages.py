@@ -0,0 +1,94 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Per-stage timing for the try-on model chain
+
+Each stage (decode → segmentation → generation → refinement → encode)
+observes ``pipeline_stage_duration_seconds{stage=...}`` and, when a tracer
+is configured, runs inside a child span of the same name. Label children
+for the known stages are created up front so timing a stage costs two
+``perf_counter`` calls and one ``observe``.
+"""
+
+import functools
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+PIPELINE_STAGES = ("decode", "segmentation", "generation", "refinement", "encode")
+
+
+class _Stage:
+    """Context manager timing one stage (a plain class: cheaper than a generator)"""
+
+    __slots__ = ("_timer", "_name", "_start", "_span_cm", "_span")
+
+    def __init__(self, timer: "StageTimer", name: str):
+        self._timer = timer
+        self._name = name
+        self._span_cm = None
+        self._span = None
+
+    def __enter__(self):
+        tracer = self._timer.tracer
+        if tracer is not None:
+            self._span_cm = tracer.start_as_current_span(f"stage.{self._name}")
+            self._span = self._span_cm.__enter__()
+        self._start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        child = self._timer._child(self._name)
+        if child is not None:
+            child.observe(elapsed)
+        if self._span_cm is not None:
+            if self._span is not None:
+                self._span.set_attribute("stage.duration_seconds", elapsed)
+            # The span records the exception and error status itself
+            self._span_cm.__exit__(exc_type, exc, tb)
+        return False
+
+
+class StageTimer:
+    """
+    Factory for stage context managers and decorators
+
+    ``histogram`` is an optional Prometheus histogram with a ``stage`` label;
+    ``tracer`` an optional OpenTelemetry tracer.
+    """
+
+    def __init__(
+        self,
+        histogram: Optional[Any] = None,
+        tracer: Optional[Any] = None,
+        stages: Iterable[str] = PIPELINE_STAGES,
+    ):
+        self.histogram = histogram
+        self.tracer = tracer
+        self._children: Dict[str, Any] = {}
+        if histogram is not None:
+            for name in stages:
+                self._children[name] = histogram.labels(stage=name)
+
+    def _child(self, name: str) -> Optional[Any]:
+        child = self._children.get(name)
+        if child is None and self.histogram is not None:
+            child = self._children[name] = self.histogram.labels(stage=name)
+        return child
+
+    def stage(self, name: str) -> _Stage:
+        """``with timer.stage("segmentation"): ...``"""
+        return _Stage(self, name)
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorator form of :meth:`stage`"""
+
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Stage(self, name):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
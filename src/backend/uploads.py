@@ -0,0 +1,366 @@
+# @Study:ST-008 @Study:ST-012 @Study:ST-009 @Study:ST-010
+#!/usr/bin/env python3
+"""
+Streaming image upload ingestion with bounded memory
+
+Request bodies are consumed chunk by chunk: each chunk is hashed
+(SHA-256, the content address used by the result cache) and spooled to
+disk as it arrives, so an in-flight upload holds one chunk plus the first
+:data:`HEADER_BYTES` of the image, whatever the file size. The byte limit
+is enforced mid-stream and the image headers are validated as soon as
+they have arrived, so oversized or invalid uploads are cut off early.
+JPEG metadata that runs past that buffer (large EXIF/XMP/ICC segments) is
+walked from the spooled file, up to :data:`MAX_HEADER_BYTES` into it.
+
+Finished files are stored content-addressed (``<root>/<sha[:2]>/<sha>``);
+uploading the same image twice keeps one copy.
+"""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Union
+
+from src.backend.image_validation import (
+    TRUNCATED,
+    ImageInfo,
+    ImageValidator,
+    InvalidImage,
+    Source,
+    UNSUPPORTED_FORMAT,
+    read_header,
+)
+
+# Enough for the JPEG segments (EXIF, ICC) that usually precede the SOF
+HEADER_BYTES = 64 * 1024
+# Where the headers must have ended: metadata past this is rejected
+MAX_HEADER_BYTES = 1024 * 1024
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+# Boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+UPLOAD_FIELD = "file"
+RAW_CONTENT_TYPES = ("image/", "application/octet-stream")
+
+
+class UploadRejected(Exception):
+    """An upload was refused; ``status_code`` is the HTTP status to answer"""
+
+    def __init__(self, status_code: int, reason: str, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    """A validated image at rest, addressed by the SHA-256 of its bytes"""
+
+    sha256: str
+    size: int
+    info: ImageInfo
+    path: Path
+
+    @property
+    def image_id(self) -> str:
+        """Identity accepted by :func:`src.backend.cache.cache_key`"""
+        return "sha256:" + self.sha256
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.sha256,
+            "sha256": self.sha256,
+            "size": self.size,
+            "format": self.info.format,
+            "width": self.info.width,
+            "height": self.info.height,
+        }
+
+
+def check_header(
+    source: Source, validator: Optional[ImageValidator], wait: bool = False
+) -> Optional[ImageInfo]:
+    """
+    Header information of the start of an upload, or rejection
+
+    ``source`` is the first bytes or a stream positioned at the start. With
+    ``wait``, headers cut short by the end of ``source`` return ``None``
+    (more bytes are on the way) instead of rejecting.
+    """
+    try:
+        info = read_header(source)
+        if validator is not None:
+            validator.check(info)
+    except InvalidImage as e:
+        if wait and e.reason == TRUNCATED:
+            return None
+        if validator is not None:
+            validator.reject(e.reason)
+        status = 415 if e.reason == UNSUPPORTED_FORMAT else 422
+        raise UploadRejected(status, e.reason, str(e))
+    return info
+
+
+class UploadSink:
+    """
+    Receives one upload's bytes in order: hash, validate, spool
+
+    Use :meth:`write` per chunk, then :meth:`finish`; :meth:`abort` drops
+    the partial file. Any rejection aborts the sink before raising.
+    """
+
+    def __init__(self, store: "UploadStore"):
+        self.store = store
+        self.size = 0
+        self.info: Optional[ImageInfo] = None
+        self._hash = hashlib.sha256()
+        self._head = bytearray()
+        self._reader: Optional[BinaryIO] = None
+        # Size at the last probe
+        self._probed = 0
+        store.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".upload-", dir=store.root)
+        self._tmp = Path(tmp)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.size > self.store.max_bytes:
+            self._reject(
+                UploadRejected(
+                    413, "too_large", f"upload exceeds {self.store.max_bytes} bytes"
+                )
+            )
+        if self.info is None:
+            self._head += chunk[: HEADER_BYTES - len(self._head)]
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        if self.info is None and self._probe_due():
+            self._probe(final=False)
+
+    def _probe_due(self) -> bool:
+        if self.size < HEADER_BYTES:
+            return True
+        # Past the buffer each probe re-reads the headers from the file:
+        # only do so once the upload has doubled, or reached the header
+        # limit, to keep the total linear in the upload size
+        return self.size >= 2 * self._probed or (
+            self._probed < MAX_HEADER_BYTES <= self.size
+        )
+
+    def _probe(self, final: bool) -> None:
+        """Validate once the headers have arrived; wait while they have not"""
+        self._probed = self.size
+        source: Source = bytes(self._head)
+        if len(self._head) >= HEADER_BYTES:
+            # Metadata runs past the buffer: walk the segments on disk
+            self._file.flush()
+            if self._reader is None:
+                self._reader = open(self._tmp, "rb")
+            self._reader.seek(0)
+            source = self._reader
+        try:
+            self.info = check_header(
+                source,
+                self.store.validator,
+                wait=not final and self.size < MAX_HEADER_BYTES,
+            )
+        except UploadRejected as e:
+            self._reject(e)
+        if self.info is not None:
+            self._close_reader()
+
+    def _close_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _reject(self, error: UploadRejected) -> None:
+        self.abort()
+        raise error
+
+    def finish(self) -> StoredUpload:
+        """Close, validate short files, and move into the content-addressed store"""
+        if self.info is None:
+            self._probe(final=True)
+        self._file.close()
+        sha = self._hash.hexdigest()
+        path = self.store.path(sha)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self._tmp, path)
+        return StoredUpload(sha, self.size, self.info, path)
+
+    def abort(self) -> None:
+        self._close_reader()
+        if not self._file.closed:
+            self._file.close()
+        try:
+            self._tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class UploadStore:
+    """Content-addressed directory of validated uploads"""
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        validator: Optional[ImageValidator] = None,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.validator = validator
+
+    def path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256
+
+    def exists(self, sha256: str) -> bool:
+        if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+            return False
+        return self.path(sha256).is_file()
+
+    def begin(self) -> UploadSink:
+        return UploadSink(self)
+
+
+def _multipart():
+    # python-multipart >= 0.0.13 installs as ``python_multipart``
+    try:
+        from python_multipart.multipart import MultipartParser, parse_options_header
+    except ImportError:
+        from multipart.multipart import MultipartParser, parse_options_header
+    return MultipartParser, parse_options_header
+
+
+class _FilePart:
+    """Multipart callbacks that collect the bytes of the ``file`` field"""
+
+    def __init__(self, field: str, parse_options_header):
+        self.field = field.encode()
+        self._parse = parse_options_header
+        self.pending: List[bytes] = []
+        self.found = False
+        self.done = False
+        self._in_file = False
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.part_begin,
+            "on_header_field": self.header_field,
+            "on_header_value": self.header_value,
+            "on_header_end": self.header_end,
+            "on_headers_finished": self.headers_finished,
+            "on_part_data": self.part_data,
+            "on_part_end": self.part_end,
+        }
+
+    def part_begin(self) -> None:
+        self._disposition = b""
+        self._header_field = self._header_value = b""
+
+    def header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = self._header_value = b""
+
+    def headers_finished(self) -> None:
+        _, params = self._parse(self._disposition)
+        if params.get(b"name") == self.field and not self.found:
+            self._in_file = self.found = True
+
+    def part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self.done = True
+
+
+async def receive_upload(
+    content_type: str,
+    content_length: Optional[int],
+    body: AsyncIterator[bytes],
+    store: UploadStore,
+    field: str = UPLOAD_FIELD,
+) -> StoredUpload:
+    """
+    Stream a request body into ``store``
+
+    Accepts ``multipart/form-data`` (the image in the ``field`` part) or a
+    raw ``image/*`` / ``application/octet-stream`` body. Disk writes run in
+    the thread pool, one chunk at a time. Raises :class:`UploadRejected`.
+    """
+    from starlette.concurrency import run_in_threadpool
+
+    MultipartParser, parse_options_header = _multipart()
+    media, params = parse_options_header(content_type or "")
+    media = media.decode("latin-1").lower()
+    multipart = media == "multipart/form-data"
+    if not multipart and not media.startswith(RAW_CONTENT_TYPES):
+        raise UploadRejected(
+            415, "unsupported_media_type", "expected multipart/form-data or image/*"
+        )
+    limit = store.max_bytes + (MULTIPART_OVERHEAD if multipart else 0)
+    if content_length is not None and content_length > limit:
+        raise UploadRejected(
+            413, "too_large", f"upload exceeds {store.max_bytes} bytes"
+        )
+
+    part = parser = None
+    if multipart:
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise UploadRejected(400, "malformed", "multipart boundary is missing")
+        part = _FilePart(field, parse_options_header)
+        parser = MultipartParser(boundary, part.callbacks())
+
+    sink = await run_in_threadpool(store.begin)
+    received = 0
+    try:
+        async for chunk in body:
+            received += len(chunk)
+            if received > limit:
+                raise UploadRejected(
+                    413, "too_large", f"upload exceeds {store.max_bytes} bytes"
+                )
+            if parser is None:
+                pieces = [chunk]
+            else:
+                try:
+                    parser.write(chunk)
+                except Exception as e:
+                    raise UploadRejected(400, "malformed", f"bad multipart body: {e}")
+                pieces, part.pending = part.pending, []
+            if pieces:
+                await run_in_threadpool(_write_all, sink, pieces)
+        if part is not None:
+            parser.finalize()
+            if not part.done:
+                raise UploadRejected(
+                    400, "malformed", f"multipart field {field!r} is missing"
+                )
+        return await run_in_threadpool(sink.finish)
+    except BaseException:
+        sink.abort()
+        raise
+
+
+def _write_all(sink: UploadSink, pieces: List[bytes]) -> None:
+    for piece in pieces:
+        sink.write(piece)
@@ -1,7 +1,10 @@
 import importlib
+import pytest
 from fastapi.testclient import TestClient
 import sys
 import os
+import threading
+import time
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -36,8 +39,12 @@ def test_health_ok():
     assert body.get("status") in {"ok", "healthy"}
 
 
-def test_generate_contract_smoke():
-    client = TestClient(get_app())
+def test_generate_contract_smoke(monkeypatch):
+    app = get_app()
+    mod = sys.modules.get("src.backend.main")
+    if mod is not None:
+        monkeypatch.setattr(mod, "SIMULATED_ERROR_RATE", 0.0)
+    client = TestClient(app)
     payload = {
         "image_url": "https://example.com/dress.jpg",
         "model": "base-v1",
@@ -46,7 +53,88 @@ def test_generate_contract_smoke():
     res = client.post("/api/v1/try-on", json=payload)
     assert res.status_code in (200, 202)
     j = res.json()
+    if res.status_code == 202:
+        # Asynchronous contract: poll the job until it reaches a terminal state
+        assert "job_id" in j
+        deadline = time.time() + 5.0
+        while True:
+            status = client.get(f"/api/v1/jobs/{j['job_id']}")
+            assert status.status_code == 200
+            body = status.json()
+            if body["status"] in {"completed", "failed"} or time.time() > deadline:
+                break
+            time.sleep(0.01)
+        assert body["status"] == "completed"
+        j = body["result"]
     # Check for expected fields from the actual API
     assert "result" in j
     assert "processing_time" in j
     assert "accuracy" in j
+
+
+def test_repeated_request_is_served_from_cache(monkeypatch):
+    mod = pytest.importorskip("src.backend.main")
+    app = mod.app
+    monkeypatch.setattr(mod, "SIMULATED_ERROR_RATE", 0.0)
+    client = TestClient(app)
+    payload = {"image_url": "https://example.com/cached.jpg", "model": "base-v1"}
+    first = client.post("/api/v1/try-on", json=payload)
+    if first.status_code == 202:
+        deadline = time.time() + 5.0
+        job_url = f"/api/v1/jobs/{first.json()['job_id']}"
+        while client.get(job_url).json()["status"] != "completed":
+            assert time.time() < deadline
+            time.sleep(0.01)
+    second = client.post("/api/v1/try-on", json=payload)
+    assert second.status_code == 200
+    assert second.json()["cached"] is True
+    assert "processing_time" in second.json()
+
+
+def test_identical_inflight_requests_share_a_job(monkeypatch):
+    mod = pytest.importorskip("src.backend.main")
+    app = mod.app
+    release = threading.Event()
+
+    def gated_batcher(payload):
+        release.wait(5.0)
+        return {"result": "success", "processing_time": 0.5, "accuracy": 0.97}
+
+    monkeypatch.setattr(mod, "tryon_batcher", gated_batcher)
+    client = TestClient(app)
+    payload = {"image_url": "https://example.com/viral.jpg", "model": "base-v1"}
+    try:
+        first = client.post("/api/v1/try-on", json=payload)
+        second = client.post("/api/v1/try-on", json=payload)
+    finally:
+        release.set()
+    assert first.status_code == second.status_code == 202
+    assert first.json()["job_id"] == second.json()["job_id"]
+
+
+def test_overload_is_shed_with_retry_after(monkeypatch):
+    mod = pytest.importorskip("src.backend.main")
+    app = mod.app
+
+    class Saturated:
+        def acquire(self):
+            raise mod.Overloaded(predicted=2.5, retry_after=3)
+
+        def release(self, service_time=None):
+            pass
+
+    monkeypatch.setattr(mod, "admission", Saturated())
+    client = TestClient(app)
+    res = client.post(
+        "/api/v1/try-on", json={"image_url": "https://example.com/busy.jpg"}
+    )
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "3"
+    # The rejected key must not stay registered as in flight
+    assert len(mod.inflight) == 0
+
+
+def test_unknown_job_returns_404():
+    client = TestClient(get_app())
+    res = client.get("/api/v1/jobs/does-not-exist")
+    assert res.status_code == 404
@@ -0,0 +1,102 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات التحكم في القبول وتخفيف الحمل - Admission Control Tests
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Gauge
+
+from src.backend.admission import (
+    DEFAULT_LATENCY_BUDGET,
+    AdmissionController,
+    Overloaded,
+    load_latency_budget,
+)
+
+
+class TestLoadLatencyBudget:
+    """اختبارات قراءة ميزانية الزمن من slo.yaml"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_reads_repo_slo(self, project_root):
+        """قراءة api_latency_p95 من ملف المشروع"""
+        assert load_latency_budget(project_root / "governance/slo/slo.yaml") == 0.150
+
+    def test_units(self):
+        """دعم الوحدات ms و s"""
+        slo = self.temp_dir / "slo.yaml"
+        slo.write_text("availability: 99.9%\napi_latency_p95: 2s\n")
+        assert load_latency_budget(slo) == 2.0
+        slo.write_text("api_latency_p95: 250ms\n")
+        assert load_latency_budget(slo) == 0.25
+
+    def test_missing_file_uses_default(self):
+        """استخدام القيمة الافتراضية عند غياب الملف"""
+        assert load_latency_budget(self.temp_dir / "nope.yaml") == (
+            DEFAULT_LATENCY_BUDGET
+        )
+
+
+class TestAdmissionController:
+    """اختبارات فئة AdmissionController"""
+
+    def setup_method(self):
+        self.registry = CollectorRegistry()
+        self.controller = AdmissionController(
+            latency_budget=0.150,
+            concurrency=2,
+            alpha=1.0,
+            inflight=Gauge("inflight", "i", registry=self.registry),
+            queue_depth=Gauge("queue_depth", "q", registry=self.registry),
+            rejections=Counter("rejections", "r", registry=self.registry),
+        )
+
+    def metric(self, name):
+        return self.registry.get_sample_value(name) or 0
+
+    def test_admits_everything_before_first_sample(self):
+        """القبول الكامل قبل أول قياس لزمن الخدمة"""
+        for _ in range(20):
+            self.controller.acquire()
+        assert self.controller.inflight == 20
+        assert self.metric("queue_depth") == 18
+
+    def test_sheds_when_predicted_wait_exceeds_budget(self):
+        """الرفض المبكر عندما يتجاوز الانتظار المتوقع الميزانية"""
+        self.controller.acquire()
+        self.controller.release(0.1)  # EWMA = 100ms per wave
+
+        for _ in range(4):  # waves ahead: 0, 0, 1, 1 -> waits 0..100ms
+            self.controller.acquire()
+        with pytest.raises(Overloaded) as exc:
+            self.controller.acquire()  # 2 waves -> 200ms > 150ms
+
+        assert exc.value.retry_after >= 1
+        assert exc.value.predicted == pytest.approx(0.2)
+        assert self.metric("rejections_total") == 1
+        assert self.metric("inflight") == 4
+
+    def test_idle_pool_always_admits_slow_model(self):
+        """المجمع الخامل يقبل دائماً حتى مع نموذج بطيء"""
+        self.controller.acquire()
+        self.controller.release(5.0)
+        self.controller.acquire()
+        assert self.controller.predicted_wait() == 0.0
+
+    def test_release_drains_queue(self):
+        """إنهاء العمل يخفض عمق الطابور"""
+        for _ in range(3):
+            self.controller.acquire()
+        assert self.metric("queue_depth") == 1
+        self.controller.release(0.01)
+        assert self.metric("queue_depth") == 0
+        assert self.metric("inflight") == 2
@@ -0,0 +1,88 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات أداة قياس أداء الـ API - API Benchmark Harness Tests
+"""
+
+import pytest
+
+from src.backend import main as backend
+from tools.perf.api_bench import (
+    BenchResult,
+    Sample,
+    check,
+    load_slo,
+    parse_mix,
+    percentile,
+    run_benchmark,
+)
+
+
+class TestApiBench:
+    """اختبارات أداة القياس"""
+
+    def test_percentile_nearest_rank(self):
+        """حساب المئين بطريقة الرتبة الأقرب"""
+        values = [float(i) for i in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 99.9) == 100.0
+        assert percentile([], 95) == 0.0
+
+    def test_parse_mix_rejects_unknown_scenario(self):
+        """رفض سيناريو غير معروف في خليط الحمولة"""
+        assert parse_mix("health=1,tryon-repeat=3") == [
+            ("health", 1.0),
+            ("tryon-repeat", 3.0),
+        ]
+        with pytest.raises(ValueError):
+            parse_mix("upload=1")
+
+    def test_slo_targets_come_from_slo_yaml(self, project_root):
+        """قراءة الأهداف من ملف slo.yaml"""
+        slo = load_slo(project_root / "governance" / "slo" / "slo.yaml")
+        assert slo["api_latency_p95"] == pytest.approx(0.150)
+        assert slo["max_error_rate"] == pytest.approx(0.001)
+
+    def test_check_flags_slo_breach_and_regression(self):
+        """اكتشاف تجاوز الـ SLO والتراجع عن خط الأساس"""
+        result = BenchResult(
+            samples=[Sample("health", 200, 0.2)] * 99 + [Sample("health", 500, 0.2)],
+            wall_time=1.0,
+        )
+        summary = result.summary()
+        slo = {"api_latency_p95": 0.150, "max_error_rate": 0.001}
+        baseline = {"health": {"p95_ms": 100.0, "throughput_rps": 500.0}}
+
+        failures = check(summary, slo, baseline, tolerance=0.2)
+
+        assert any("p95" in f and "SLO" in f for f in failures)
+        assert any("error rate" in f for f in failures)
+        assert any("regression: health p95_ms" in f for f in failures)
+        assert any("regression: health throughput" in f for f in failures)
+        assert check(summary, {"api_latency_p95": 1, "max_error_rate": 0.5}) == []
+
+    def test_in_process_run_against_real_app(self, monkeypatch):
+        """تشغيل قصير ضد التطبيق الحقيقي داخل العملية"""
+        monkeypatch.setattr(backend, "SIMULATED_ERROR_RATE", 0.0)
+        result = run_benchmark(requests=60, concurrency=4, seed=7)
+        summary = result.summary()
+
+        assert summary["all"]["requests"] == 60
+        assert summary["all"]["error_rate"] == 0
+        assert summary["all"]["throughput_rps"] > 0
+        assert set(summary["all"]["statuses"]) <= {"200", "202", "429"}
+
+    def test_seed_makes_simulation_reproducible(self):
+        """البذرة نفسها تعطي نفس نتائج المحاكاة"""
+        payloads = [{"model": "base-v1"}] * 16
+
+        def outcomes():
+            return [
+                r if isinstance(r, dict) else str(r)
+                for r in backend.infer_try_on_batch(payloads)
+            ]
+
+        backend.seed_simulation(42)
+        first = outcomes()
+        backend.seed_simulation(42)
+        assert outcomes() == first
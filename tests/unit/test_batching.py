@@ -0,0 +1,114 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات مجدول الدفعات الصغيرة - Micro-Batching Scheduler Tests
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.backend.batching import MicroBatcher
+
+
+class RecordingHistogram:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value):
+        self.values.append(value)
+
+
+class TestMicroBatcher:
+    """اختبارات فئة MicroBatcher"""
+
+    def setup_method(self):
+        self.calls = []
+        self.sizes = RecordingHistogram()
+        self.waits = RecordingHistogram()
+
+    def make(self, batch_fn=None, **kwargs):
+        def default_fn(items):
+            self.calls.append(list(items))
+            return [i * 10 for i in items]
+
+        return MicroBatcher(
+            batch_fn or default_fn,
+            batch_size_histogram=self.sizes,
+            queue_wait_histogram=self.waits,
+            **kwargs,
+        )
+
+    def test_concurrent_requests_share_a_batch(self):
+        """الطلبات المتزامنة تُجمع في استدعاء واحد وتعود النتائج لكل طالب"""
+        batcher = self.make(max_batch_size=8, max_wait=0.2)
+        try:
+            with ThreadPoolExecutor(max_workers=4) as ex:
+                results = list(ex.map(batcher, range(4)))
+        finally:
+            batcher.close()
+
+        assert results == [0, 10, 20, 30]
+        assert len(self.calls) < 4
+        assert sum(len(c) for c in self.calls) == 4
+        assert sum(self.sizes.values) == 4
+        assert len(self.waits.values) == 4
+        assert all(w >= 0 for w in self.waits.values)
+
+    def test_batch_size_is_capped(self):
+        """لا يتجاوز حجم الدفعة الحد الأقصى"""
+        gate = threading.Event()
+
+        def slow_fn(items):
+            gate.wait(1.0)
+            self.calls.append(list(items))
+            return items
+
+        batcher = self.make(slow_fn, max_batch_size=2, max_wait=0.05)
+        try:
+            futures = [batcher.submit(i) for i in range(5)]
+            gate.set()
+            assert [f.result(timeout=2) for f in futures] == list(range(5))
+        finally:
+            batcher.close()
+
+        assert max(len(c) for c in self.calls) <= 2
+
+    def test_per_item_exception_fails_only_that_caller(self):
+        """الخطأ في عنصر واحد يفشل طالبه فقط"""
+
+        def fn(items):
+            return [ValueError("bad") if i == 1 else i for i in items]
+
+        batcher = self.make(fn, max_batch_size=4, max_wait=0.05)
+        try:
+            futures = [batcher.submit(i) for i in range(3)]
+            assert futures[0].result(timeout=2) == 0
+            assert futures[2].result(timeout=2) == 2
+            with pytest.raises(ValueError):
+                futures[1].result(timeout=2)
+        finally:
+            batcher.close()
+
+    def test_batch_failure_propagates_to_all(self):
+        """فشل الاستدعاء المجمّع يصل إلى جميع الطالبين"""
+
+        def fn(items):
+            raise RuntimeError("model crashed")
+
+        batcher = self.make(fn, max_batch_size=4, max_wait=0.05)
+        try:
+            futures = [batcher.submit(i) for i in range(3)]
+            for f in futures:
+                with pytest.raises(RuntimeError):
+                    f.result(timeout=2)
+        finally:
+            batcher.close()
+
+    def test_restarts_after_close(self):
+        """يمكن الاستخدام مجدداً بعد الإغلاق"""
+        batcher = self.make(max_batch_size=2, max_wait=0.001)
+        assert batcher(1, timeout=2) == 10
+        batcher.close()
+        assert batcher(2, timeout=2) == 20
+        batcher.close()
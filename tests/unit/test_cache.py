@@ -0,0 +1,99 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات ذاكرة التخزين المؤقت للنتائج - Result Cache Tests
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry, Counter
+
+from src.backend.cache import ResultCache, cache_key
+
+
+class TestCacheKey:
+    """اختبارات مفتاح المحتوى"""
+
+    def test_key_is_stable_across_option_order_and_nulls(self):
+        """ترتيب الخيارات والقيم الفارغة لا يغيّر المفتاح"""
+        a = cache_key("https://example.com/dress.jpg", "base-v1", {"mask": None})
+        b = cache_key("https://example.com/dress.jpg", "base-v1", {})
+        c = cache_key(
+            "https://example.com/dress.jpg", "base-v1", {"b": 1, "a": {"x": 2}}
+        )
+        d = cache_key(
+            "https://example.com/dress.jpg", "base-v1", {"a": {"x": 2}, "b": 1}
+        )
+        assert a == b
+        assert c == d
+
+    def test_key_depends_on_image_bytes_and_model(self):
+        """تغيير الصورة أو إصدار النموذج يغيّر المفتاح"""
+        base = cache_key(b"image-bytes", "base-v1", {})
+        assert base != cache_key(b"other-bytes", "base-v1", {})
+        assert base != cache_key(b"image-bytes", "base-v2", {})
+
+
+class TestResultCache:
+    """اختبارات فئة ResultCache"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.registry = CollectorRegistry()
+        self.hits = Counter("hits", "h", ["tier"], registry=self.registry)
+        self.misses = Counter("misses", "m", registry=self.registry)
+        self.evictions = Counter("evictions", "e", ["tier"], registry=self.registry)
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def metric(self, name, **labels):
+        return self.registry.get_sample_value(name, labels) or 0
+
+    def make(self, **kwargs):
+        return ResultCache(
+            hits=self.hits, misses=self.misses, evictions=self.evictions, **kwargs
+        )
+
+    def test_memory_hit_and_miss_are_counted(self):
+        """تسجيل الإصابات والإخفاقات في المقاييس"""
+        cache = self.make()
+        assert cache.get("k") is None
+        cache.put("k", {"result": "success"})
+        assert cache.get("k") == {"result": "success"}
+
+        assert self.metric("misses_total") == 1
+        assert self.metric("hits_total", tier="memory") == 1
+
+    def test_lru_evicts_by_size(self):
+        """الإخلاء حسب الحجم مع الإبقاء على الأحدث استخداماً"""
+        cache = self.make(max_memory_bytes=50)
+        cache.put("a", {"v": "x" * 10})
+        cache.put("b", {"v": "y" * 10})
+        cache.get("a")  # a becomes most recently used
+        cache.put("c", {"v": "z" * 10})
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.memory.size_bytes <= 50
+        assert self.metric("evictions_total", tier="memory") == 1
+
+    def test_disk_tier_survives_restart(self):
+        """الطبقة القرصية تبقى بعد إعادة التشغيل وتُرفع إلى الذاكرة"""
+        self.make(disk_dir=self.temp_dir).put("k", {"accuracy": 0.97})
+
+        restarted = self.make(disk_dir=self.temp_dir)
+        assert restarted.get("k") == {"accuracy": 0.97}
+        assert self.metric("hits_total", tier="disk") == 1
+        assert len(restarted.memory) == 1
+
+    def test_disk_tier_evicts_oldest(self):
+        """إخلاء أقدم الملفات عند تجاوز ميزانية القرص"""
+        cache = self.make(disk_dir=self.temp_dir, max_disk_bytes=100)
+        for i in range(10):
+            cache.put(f"{i:02d}key", {"v": "x" * 20})
+
+        total = sum(p.stat().st_size for p in self.temp_dir.glob("*/*.json"))
+        assert total <= 100
+        assert self.metric("evictions_total", tier="disk") > 0
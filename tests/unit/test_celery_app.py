@@ -0,0 +1,118 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات تطبيق Celery لتفريغ الاستدلال - Celery Try-on Worker Tests
+"""
+
+import array
+
+import pytest
+
+pytest.importorskip("celery")
+
+from src.backend import celery_app, main
+from src.backend.celery_app import (
+    CATALOG_QUEUE,
+    IMAGE_HANDLE_KEY,
+    INTERACTIVE_QUEUE,
+    app,
+    catalog_job,
+    flatten,
+    shared_image,
+    try_on,
+    try_on_batch,
+)
+from src.backend.shm_transport import SharedImageStore
+
+
+@pytest.fixture(scope="module")
+def worker():
+    celery_app.configure(memory=True)
+    try:
+        with celery_app.local_worker(concurrency=2):
+            yield app
+    finally:
+        celery_app.configure()
+
+
+class TestConfiguration:
+    """اختبارات التوجيه وإعدادات المهام الطويلة"""
+
+    def test_interactive_and_catalog_queues(self):
+        """المهام التفاعلية ومهام الكتالوج في طوابير منفصلة"""
+        router = app.amqp.router
+        assert router.route({}, try_on.name)["queue"].name == INTERACTIVE_QUEUE
+        assert router.route({}, try_on_batch.name)["queue"].name == CATALOG_QUEUE
+
+    def test_long_task_settings(self):
+        """رسالة واحدة محجوزة لكل عملية وتأكيد بعد الانتهاء"""
+        assert app.conf.worker_prefetch_multiplier == 1
+        assert app.conf.task_acks_late is True
+        assert app.conf.task_reject_on_worker_lost is True
+
+    def test_memory_transport(self, monkeypatch):
+        """وضع الذاكرة لا يحتاج Redis"""
+        monkeypatch.setenv("CELERY_BROKER_URL", "memory://")
+        conf = celery_app.configure(app).conf
+        assert (conf.broker_url, conf.result_backend) == (
+            "memory://",
+            "cache+memory://",
+        )
+
+    def test_catalog_chunks(self):
+        """تقسيم الكتالوج إلى دفعات"""
+        job = catalog_job([{"image_url": str(i)} for i in range(20)], chunk_size=8)
+        assert [len(sig.args[0]) for sig in job.tasks] == [8, 8, 4]
+        with pytest.raises(ValueError):
+            catalog_job([{}], chunk_size=0)
+
+
+class TestWorker:
+    """اختبارات المسار الكامل عبر عامل محلي في الذاكرة"""
+
+    def test_interactive_try_on(self, worker, monkeypatch):
+        """مهمة تفاعلية تعيد نتيجة الاستدلال"""
+        monkeypatch.setattr(main, "SIMULATED_ERROR_RATE", 0.0)
+        result = try_on.delay({"image_url": "a.jpg", "model": "v2"})
+        assert result.get(timeout=10, interval=0.01)["model_version"] == "v2"
+
+    def test_catalog_group_keeps_order(self, worker, monkeypatch):
+        """نتائج الكتالوج بنفس ترتيب المدخلات"""
+        monkeypatch.setattr(main, "SIMULATED_ERROR_RATE", 0.0)
+        payloads = [{"model": f"m{i}"} for i in range(7)]
+        chunks = catalog_job(payloads, chunk_size=3).apply_async()
+        results = flatten(chunks.get(timeout=10, interval=0.01))
+        assert [r["model_version"] for r in results] == [p["model"] for p in payloads]
+
+    def test_failures(self, worker, monkeypatch):
+        """الفشل يفشل المهمة التفاعلية ويُعاد كعنصر خطأ في الدفعة"""
+        monkeypatch.setattr(main, "SIMULATED_ERROR_RATE", 1.0)
+        with pytest.raises(RuntimeError, match="AI processing failed"):
+            try_on.delay({}).get(timeout=10, interval=0.01)
+        batch = try_on_batch.delay([{}, {}]).get(timeout=10, interval=0.01)
+        assert batch == [{"error": "AI processing failed"}] * 2
+
+    def test_image_handles(self, worker, monkeypatch):
+        """الصورة تصل عبر الذاكرة المشتركة وتُحرر بعد انتهاء المهمة"""
+        seen = []
+        infer = main.infer_try_on_batch
+
+        def record(payloads):
+            seen.extend(p["image"].tolist()[1] for p in payloads if "image" in p)
+            return infer(payloads)
+
+        monkeypatch.setattr(main, "infer_try_on_batch", record)
+        monkeypatch.setattr(main, "SIMULATED_ERROR_RATE", 0.0)
+        image = memoryview(array.array("B", range(12))).cast("B", (3, 4))
+        store = SharedImageStore()
+        with shared_image(store, image) as handle:
+            payload = {IMAGE_HANDLE_KEY: handle, "model": "v2"}
+            result = try_on.delay(payload).get(timeout=10, interval=0.01)
+        assert result["model_version"] == "v2"
+        assert seen == [[4, 5, 6, 7]]
+        assert len(store) == 0
+
+        # Released before the worker got to it: only that item fails
+        batch = try_on_batch.delay([payload, {"model": "v3"}])
+        first, second = batch.get(timeout=10, interval=0.01)
+        assert "released" in first["error"]
+        assert second["model_version"] == "v3"
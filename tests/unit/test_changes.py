@@ -0,0 +1,197 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات نطاق تغييرات Git - Git Diff Scope (--changed-since) Tests
+"""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from tools.governance.changes import (
+    ChangeSet,
+    changed_since,
+    changed_since_arg,
+    merge_baseline,
+    parse_diff,
+)
+from tools.quality.coverage_packages_gate import read_coverage
+
+DIFF = """\
+diff --git a/src/app.py b/src/app.py
+index 1111111..2222222 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -3 +3 @@ def f():
+-    return 1
++    return 2
+@@ -10,0 +11,3 @@ def g():
++a
++b
++c
+@@ -20,2 +23,0 @@
+-x
+-y
+diff --git a/old.md b/old.md
+deleted file mode 100644
+--- a/old.md
++++ /dev/null
+@@ -1 +0,0 @@
+-gone
+diff --git a/logo.png b/logo.png
+Binary files a/logo.png and b/logo.png differ
+diff --git a/a.py b/b.py
+similarity index 100%
+rename from a.py
+rename to b.py
+"""
+
+
+def _git(root, *args):
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+
+class TestParseDiff:
+    """اختبارات قراءة الفروقات كتدفق"""
+
+    def test_changed_lines_per_file(self):
+        """أرقام الأسطر المضافة أو المعدلة فقط"""
+        files, deleted = parse_diff(DIFF.splitlines(True))
+        assert files["src/app.py"] == {3, 11, 12, 13}
+        assert files["logo.png"] is None
+        assert files["b.py"] == set()
+        assert deleted == {"old.md", "a.py"}
+
+    def test_header_like_lines_in_hunks(self):
+        """أسطر SQL/Markdown تبدأ بـ -- أو ++ داخل الكتلة ليست ترويسات ملفات"""
+        diff = """\
+diff --git a/q.sql b/q.sql
+--- a/q.sql
++++ b/q.sql
+@@ -1 +1 @@
+--- old
++++ new
+@@ -5,0 +6 @@
++select 1;
+"""
+        files, deleted = parse_diff(diff.splitlines(True))
+        assert files == {"q.sql": {1, 6}}
+        assert deleted == set()
+
+    def test_quoted_and_spaced_paths(self):
+        """المسارات المقتبسة بأسلوب C والمسافات الزائدة في الترويسات"""
+        diff = (
+            'diff --git "a/ta\\tb.py" "b/ta\\tb.py"\n'
+            '--- "a/ta\\tb.py"\n'
+            '+++ "b/ta\\tb.py"\n'
+            "@@ -1 +1 @@\n"
+            "diff --git a/sp ace.py b/sp ace.py\n"
+            "--- a/sp ace.py\t\n"
+            "+++ b/sp ace.py\t\n"
+            "@@ -2 +2 @@\n"
+            'diff --git "a/\\303\\274.png" "b/\\303\\274.png"\n'
+            'Binary files "a/\\303\\274.png" and "b/\\303\\274.png" differ\n'
+        )
+        files, _ = parse_diff(diff.splitlines(True))
+        assert files == {"ta\tb.py": {1}, "sp ace.py": {2}, "\u00fc.png": None}
+
+    def test_changed_since_arg(self):
+        """قراءة الوسيط بالصيغتين"""
+        assert changed_since_arg(["--changed-since", "origin/main"]) == "origin/main"
+        assert changed_since_arg(["--apply", "--changed-since=HEAD~1"]) == "HEAD~1"
+        assert changed_since_arg(["--apply"]) is None
+
+
+class TestChangedSince:
+    """اختبارات حساب مجموعة التغييرات من مستودع حقيقي"""
+
+    def setup_method(self):
+        self.root = Path(tempfile.mkdtemp())
+        _git(self.root, "init", "-q")
+        _git(self.root, "config", "user.email", "dev@example.com")
+        _git(self.root, "config", "user.name", "dev")
+        (self.root / ".gitignore").write_text("*.log\n")
+        (self.root / "keep.py").write_text("a = 1\nb = 2\nc = 3\n")
+        (self.root / "drop.py").write_text("x = 1\n")
+        _git(self.root, "add", ".")
+        _git(self.root, "commit", "-q", "-m", "base")
+        _git(self.root, "tag", "base")
+
+        (self.root / "keep.py").write_text("a = 1\nb = 20\nc = 3\nd = 4\n")
+        (self.root / "drop.py").unlink()
+        (self.root / "new.py").write_text("n = 1\n")
+        (self.root / "debug.log").write_text("ignored\n")
+
+    def teardown_method(self):
+        shutil.rmtree(self.root)
+
+    def test_working_tree_against_ref(self):
+        """تعديلات الشجرة والملفات الجديدة والمحذوفة"""
+        changes = changed_since("base", self.root)
+        assert changes.lines("keep.py") == {2, 4}
+        assert changes.lines("new.py") is None
+        assert "debug.log" not in changes
+        assert changes.deleted == {"drop.py"}
+        assert list(changes.walk(str(self.root))) == ["keep.py", "new.py"]
+
+    def test_unusual_names_and_diff_config(self):
+        """الأسماء غير المألوفة وإعدادات diff للمستخدم لا تغيّر النتيجة"""
+        names = ["sp ace.py", "\u00fcml.py", "ta\tb.py"]
+        for name in names:
+            (self.root / name).write_text("s = 1\n")
+        _git(self.root, "add", *names)
+        _git(self.root, "commit", "-q", "-m", "names")
+        for name in names:
+            (self.root / name).write_text("s = 1\nt = 2\n")
+        (self.root / "new \u00fc.py").write_text("n = 1\n")
+        _git(self.root, "config", "diff.noprefix", "true")
+        _git(self.root, "config", "core.quotePath", "true")
+        changes = changed_since("HEAD", self.root)
+        assert {name: changes.lines(name) for name in names} == dict.fromkeys(
+            names, {2}
+        )
+        assert changes.lines("new \u00fc.py") is None
+
+    def test_merge_with_baseline(self):
+        """دمج نتائج الملفات المتغيرة مع خط الأساس الكامل"""
+        changes = changed_since("base", self.root)
+        baseline = {"keep.py": "old", "drop.py": "old", "other.py": "old"}
+        fresh = {"keep.py": "new", "new.py": "new"}
+        assert merge_baseline(baseline, fresh, changes) == {
+            "keep.py": "new",
+            "new.py": "new",
+            "other.py": "old",
+        }
+
+
+class TestScopedCoverage:
+    """اختبارات بوابة التغطية على الأسطر المتغيرة"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.xml = self.dir / "coverage.xml"
+        self.xml.write_text(
+            "<coverage><sources><source>src</source></sources><packages>"
+            '<package name="backend"><classes>'
+            '<class filename="backend/main.py"><lines>'
+            '<line number="1" hits="1"/><line number="2" hits="0"/>'
+            '<line number="3" hits="1"/></lines></class>'
+            '<class filename="backend/other.py"><lines>'
+            '<line number="1" hits="0"/></lines></class>'
+            "</classes></package>"
+            '<package name="shared"><classes>'
+            '<class filename="shared/util.py"><lines>'
+            '<line number="1" hits="0"/></lines></class>'
+            "</classes></package></packages></coverage>"
+        )
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def test_only_changed_lines_count(self):
+        """فقط أسطر الملفات المتغيرة تدخل في الحساب"""
+        changes = ChangeSet(
+            ref="main", base="abc", files={"src/backend/main.py": frozenset({1, 2})}
+        )
+        assert read_coverage(str(self.xml)) == {"backend": (2, 4), "shared": (0, 1)}
+        assert read_coverage(str(self.xml), changes) == {"backend": (1, 2)}
@@ -0,0 +1,76 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات قواعد الامتثال بمرور واحد - Single-pass Compliance Rules Tests
+"""
+
+import ast
+
+from tools.compliance import ast_rules
+from tools.compliance.ast_rules import Rule, RuleSet, default_rules
+
+SOURCE = '''
+import jwt
+
+
+def documented():
+    """Docstring"""
+    return eval("1 + 1")
+
+
+def bare():
+    model.eval()
+    return input("name: ")
+'''
+
+
+class TestRuleSet:
+    """اختبارات إطار القواعد"""
+
+    def setup_method(self):
+        self.rules = RuleSet(default_rules(line_length_limit=20))
+
+    def test_default_rules_facts(self):
+        """حقائق الجودة والأمان من مرور واحد"""
+        facts = self.rules.run(SOURCE)
+        assert facts["quality"]["functions"] == 2
+        assert facts["quality"]["documented"] == 1
+        assert facts["quality"]["long_line_numbers"] == [7, 12]
+        assert facts["security"]["eval"] == [7]
+        assert facts["security"]["unvalidated_input"] == [12]
+        assert facts["security"]["authentication"] is True
+
+    def test_method_named_eval_is_not_a_finding(self):
+        """model.eval() ليست استدعاءً لـ eval"""
+        facts = self.rules.run("model.eval()\n")
+        assert facts["security"]["eval"] == []
+
+    def test_one_traversal_for_all_rules(self, monkeypatch):
+        """شجرة AST تُمر مرة واحدة مهما كان عدد القواعد"""
+        walks = []
+        real_walk = ast.walk
+
+        def counting_walk(node):
+            walks.append(node)
+            return real_walk(node)
+
+        monkeypatch.setattr(ast_rules.ast, "walk", counting_walk)
+
+        class CountReturns(Rule):
+            name, node_types = "returns", (ast.Return,)
+
+            def start(self, ctx):
+                return {"returns": 0}
+
+            def visit(self, node, facts, ctx):
+                facts["returns"] += 1
+
+        facts = RuleSet(default_rules() + [CountReturns()]).run(SOURCE)
+        assert facts["quality"]["returns"] == 2
+        assert len(walks) == 1
+
+    def test_unparsable_file_keeps_line_facts(self):
+        """الملف غير القابل للتحليل يحتفظ بعدد الأسطر وفحص النص"""
+        facts = self.rules.run("def broken(:\n    exec(code)\n")
+        assert facts["quality"]["lines"] == 3
+        assert "error" in facts["quality"]
+        assert facts["security"]["exec"] == [2]
@@ -0,0 +1,103 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات بوابة التغطية المتدفقة - Streaming Package Coverage Gate Tests
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from tools.quality.coverage_packages_gate import (
+    load_thresholds,
+    main,
+    matches,
+    stream_coverage,
+)
+
+REPORT = """<?xml version="1.0" ?>
+<coverage>
+  <sources><source>src</source></sources>
+  <packages>
+    <package name="backend.api">
+      <classes>
+        <class filename="backend/api/routes.py">
+          <methods>
+            <method name="handler"><lines><line number="2" hits="1"/></lines></method>
+          </methods>
+          <lines>
+            <line number="1" hits="1"/>
+            <line number="2" hits="1"/>
+            <line number="3" hits="0"/>
+            <line number="4" hits="0"/>
+          </lines>
+        </class>
+      </classes>
+    </package>
+    <package name="backend.jobs">
+      <classes>
+        <class filename="backend/jobs/queue.py">
+          <lines><line number="1" hits="3"/><line number="2" hits="1"/></lines>
+        </class>
+      </classes>
+    </package>
+    <package name="shared">
+      <classes>
+        <class filename="shared/util.py"><lines><line number="1" hits="0"/></lines></class>
+      </classes>
+    </package>
+  </packages>
+</coverage>
+"""
+
+
+class TestStreamCoverage:
+    """اختبارات التجميع المتدفق"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.xml = self.dir / "coverage.xml"
+        self.xml.write_text(REPORT)
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def test_package_and_file_totals(self):
+        """أسطر الصنف فقط، دون تكرار أسطر الدوال"""
+        totals = stream_coverage(str(self.xml))
+        assert totals.packages == {
+            "backend.api": (2, 4),
+            "backend.jobs": (2, 2),
+            "shared": (0, 1),
+        }
+        assert totals.files["src/backend/api/routes.py"] == (2, 4)
+        assert totals.files["src/shared/util.py"] == (0, 1)
+
+    def test_gate_with_glob_and_regex_thresholds(self, capsys):
+        """العتبات بنمط glob وregex من سطر الأوامر"""
+        args = ["--coverage", str(self.xml), "--threshold", "re:backend\\.jobs=1.0"]
+        main(args + ["--threshold", "backend=0.6", "--threshold", "backend.*=0.6"])
+        out = capsys.readouterr().out
+        assert "[backend.*] 0.667" in out
+        assert "[re:backend\\.jobs] 1.000" in out
+
+        with pytest.raises(SystemExit):
+            main(args + ["--threshold", "shared=0.5"])
+
+
+class TestThresholdPatterns:
+    """اختبارات أنماط العتبات"""
+
+    def test_prefix_glob_and_regex(self):
+        """البادئة وglob وregex"""
+        assert matches("backend", "backend.api")
+        assert matches("backend.*", "backend.api")
+        assert not matches("backend.*", "backend")
+        assert matches("re:backend\\.(api|jobs)", "backend.jobs")
+        assert not matches("re:backend\\.(api|jobs)", "backend.jobs.sub")
+
+    def test_overrides_extend_defaults(self):
+        """القيم من سطر الأوامر تضاف إلى العتبات الافتراضية"""
+        thresholds = load_thresholds(overrides=["backend=0.9", "shared.*=0.5"])
+        assert thresholds == {"backend": 0.9, "shared.*": 0.5}
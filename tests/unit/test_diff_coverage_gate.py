@@ -0,0 +1,109 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات بوابة تغطية الأسطر المتغيرة - Diff Coverage Gate Tests
+"""
+
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from tools.governance.changes import ChangeSet
+from tools.quality import diff_coverage_gate
+from tools.quality.coverage_packages_gate import ROOT, LineHits, repo_path
+from tools.quality.diff_coverage_gate import diff_coverage, main, ranges
+
+REPORT = """<coverage><sources><source>src</source></sources><packages>
+<package name="backend"><classes>
+  <class filename="backend/main.py"><lines>
+    <line number="1" hits="1"/><line number="2" hits="0"/>
+    <line number="3" hits="0"/><line number="5" hits="4"/>
+    <line number="700" hits="0"/>
+  </lines></class>
+  <class filename="backend/untouched.py"><lines>
+    <line number="1" hits="0"/>
+  </lines></class>
+</classes></package>
+<package name="shared"><classes>
+  <class filename="shared/new.py"><lines>
+    <line number="1" hits="1"/><line number="2" hits="1"/>
+  </lines></class>
+</classes></package>
+</packages></coverage>
+"""
+
+CHANGES = ChangeSet(
+    ref="origin/main",
+    base="0123456789abcdef",
+    files={
+        "src/backend/main.py": frozenset({2, 3, 4, 5, 700}),
+        "src/shared/new.py": None,
+        "README.md": frozenset({1}),
+    },
+)
+
+
+class TestLineHits:
+    """اختبارات خريطة البتات لكل ملف"""
+
+    def test_bitmap_counts(self):
+        """عد الأسطر المقاسة والمغطاة"""
+        hits = LineHits()
+        for number, count in [(1, 1), (2, 0), (9, 3), (1000, 0)]:
+            hits.add(number, count)
+        assert len(hits.measured) == 126
+        assert hits.counts() == (2, 4)
+        assert hits.counts([2, 3, 9]) == (1, 2)
+        assert hits.missing(range(2000)) == [2, 1000]
+
+    def test_file_resolved_against_the_source_that_holds_it(self):
+        """مع عدة مصادر يُختار المصدر الذي يحتوي الملف"""
+        sources = (str(ROOT / "tools"), str(ROOT / "src"))
+        assert repo_path("backend/main.py", sources) == "src/backend/main.py"
+        assert repo_path("backend/missing.py", ("src",)) == "src/backend/missing.py"
+
+    def test_ranges(self):
+        """اختصار أرقام الأسطر إلى نطاقات"""
+        assert ranges([1, 2, 3, 7, 9, 10]) == "1-3, 7, 9-10"
+
+
+class TestDiffCoverage:
+    """اختبارات تغطية الأسطر المتغيرة"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.xml = self.dir / "coverage.xml"
+        self.xml.write_text(REPORT)
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def test_per_file_and_package(self):
+        """التغطية لكل ملف وحزمة من الأسطر المتغيرة فقط"""
+        files, packages = diff_coverage(str(self.xml), CHANGES)
+        assert files["src/backend/main.py"]["missing"] == [2, 3, 700]
+        assert (files["src/backend/main.py"]["covered"], packages["backend"]) == (
+            1,
+            (1, 4),
+        )
+        assert packages["shared"] == (2, 2)
+        assert "src/backend/untouched.py" not in files
+
+    def test_gate_thresholds_and_json(self, monkeypatch, capsys):
+        """العتبات لكل حزمة وملف وتقرير JSON"""
+        monkeypatch.setattr(diff_coverage_gate, "changed_since", lambda ref: CHANGES)
+        out = self.dir / "diff.json"
+        args = ["--coverage", str(self.xml), "--json", str(out)]
+
+        main(args + ["--fail-under", "0.5", "--package-threshold", "shared=1.0"])
+        assert "missing: 2-3, 700" in capsys.readouterr().out
+        assert json.loads(out.read_text())["valid"] == 6
+
+        with pytest.raises(SystemExit):
+            main(
+                args + ["--fail-under", "0.5", "--file-threshold", "src/backend/*=0.5"]
+            )
+        with pytest.raises(SystemExit):
+            main(args)
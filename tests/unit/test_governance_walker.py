@@ -0,0 +1,90 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات ماسح المستودع المشترك - Governance Walker Tests
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from tools.governance.tagger import match_files
+from tools.governance.walker import GlobMatcher, is_ignored, load_gitignore, walk
+
+
+class TestWalker:
+    """اختبارات المرور الموحد على الشجرة"""
+
+    def setup_method(self):
+        self.root = Path(tempfile.mkdtemp())
+        files = {
+            ".gitignore": "*.log\n/build/\ndocs/private/\n",
+            "src/backend/app.py": "",
+            "src/backend/debug.log": "",
+            "src/frontend/.gitignore": "*.gen.ts\n!keep.gen.ts\n",
+            "src/frontend/ui.gen.ts": "",
+            "src/frontend/keep.gen.ts": "",
+            "src/frontend/ui.ts": "",
+            "build/out.py": "",
+            "tools/build/tool.py": "",
+            "docs/private/secret.md": "",
+            "docs/readme.md": "",
+            ".git/config": "",
+            "node_modules/pkg/index.js": "",
+            "env311/pyvenv.cfg": "",
+            "env311/lib/site.py": "",
+        }
+        for rel, text in files.items():
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+
+    def teardown_method(self):
+        shutil.rmtree(self.root)
+
+    def test_walk_prunes_ignored_directories(self):
+        """تجاهل .git وnode_modules والبيئات الافتراضية وقواعد .gitignore"""
+        files = set(walk(str(self.root)))
+        assert files == {
+            ".gitignore",
+            "src/backend/app.py",
+            "src/frontend/.gitignore",
+            "src/frontend/keep.gen.ts",
+            "src/frontend/ui.ts",
+            "tools/build/tool.py",
+            "docs/readme.md",
+        }
+
+    def test_is_ignored_matches_walk(self):
+        """is_ignored يطابق ما يتخطاه المرور"""
+        rules = load_gitignore(str(self.root))
+        assert is_ignored("build/out.py", rules)
+        assert is_ignored("docs/private/secret.md", rules)
+        assert is_ignored("src/backend/debug.log", rules)
+        assert is_ignored(".git/config", rules)
+        assert not is_ignored("tools/build/tool.py", rules)
+
+    def test_glob_matcher_reports_every_matching_glob(self):
+        """مطابقة جميع الأنماط باستدعاء واحد"""
+        matcher = GlobMatcher(["src/**", "src/backend/**", "*.md", "pyproject.toml"])
+        assert matcher.match("src/backend/app.py") == [0, 1]
+        assert matcher.match("docs/readme.md") == [2]
+        assert matcher.match("pyproject.toml") == [3]
+        assert matcher.match("setup.cfg") == []
+
+    def test_tagger_applies_union_of_rule_studies(self):
+        """كل ملف يُزار مرة واحدة مع اتحاد دراسات القواعد"""
+        patterns = [
+            {"glob": "src/**", "studies": ["ST-008", "ST-012"]},
+            {"glob": "src/backend/**", "studies": ["ST-012", "ST-009"]},
+            {"glob": "docs/**", "studies": ["ST-004"]},
+        ]
+        found = {
+            p.relative_to(self.root).as_posix(): studies
+            for p, studies in match_files(patterns, root=str(self.root))
+        }
+        assert found == {
+            "src/backend/app.py": ["ST-008", "ST-012", "ST-009"],
+            "src/frontend/keep.gen.ts": ["ST-008", "ST-012"],
+            "src/frontend/ui.ts": ["ST-008", "ST-012"],
+            "docs/readme.md": ["ST-004"],
+        }
@@ -0,0 +1,97 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات خدمة التجزئة المتوازية - Streaming Parallel Hashing Tests
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import tools.governance.scan_cache as scan_cache
+from tools.governance import hashing
+from tools.governance.hashing import sha256_file, sha256_files
+from tools.governance.scan_cache import ScanCache
+
+
+class TestHashing:
+    """اختبارات التجزئة المتدفقة"""
+
+    def setup_method(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.blob = os.urandom(3 * hashing.CHUNK_SIZE + 17)
+        (self.root / "big.bin").write_bytes(self.blob)
+        (self.root / "empty.md").write_bytes(b"")
+
+    def teardown_method(self):
+        shutil.rmtree(self.root)
+
+    def test_chunked_and_mmap_paths_agree(self, monkeypatch):
+        """القراءة المقسمة وmmap تعطيان نفس النتيجة"""
+        expected = hashlib.sha256(self.blob).hexdigest()
+        assert sha256_file(self.root / "big.bin") == expected
+        monkeypatch.setattr(hashing, "MMAP_THRESHOLD", 1)
+        assert sha256_file(self.root / "big.bin") == expected
+        assert sha256_file(self.root / "empty.md") == hashlib.sha256().hexdigest()
+
+    def test_parallel_keeps_order_and_reports_missing(self):
+        """التجزئة المتوازية تحافظ على الترتيب وتعيد None للمفقود"""
+        paths = [
+            self.root / "missing.md",
+            self.root / "big.bin",
+            self.root / "empty.md",
+        ]
+        out = sha256_files(paths, workers=4)
+        assert list(out) == [str(p) for p in paths]
+        assert out[str(paths[0])] is None
+        assert out[str(paths[1])] == hashlib.sha256(self.blob).hexdigest()
+
+
+class TestIncrementalHashing:
+    """اختبارات عدم إعادة تجزئة الملفات غير المتغيرة"""
+
+    def setup_method(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.db = self.root / "out" / "cache.sqlite"
+        for name in ("a.md", "b.md"):
+            (self.root / name).write_text(f"# {name}\n")
+
+    def teardown_method(self):
+        shutil.rmtree(self.root)
+
+    def hash_all(self, monkeypatch):
+        hashed = []
+
+        def spy(paths, workers=None):
+            paths = list(paths)
+            hashed.extend(Path(p).name for p in paths)
+            return sha256_files(paths, workers)
+
+        monkeypatch.setattr(scan_cache, "sha256_files", spy)
+        with ScanCache(self.db, root=self.root) as cache:
+            out = cache.sha256_many(["a.md", "b.md"])
+        return out, hashed
+
+    def test_unchanged_files_are_not_rehashed(self, monkeypatch):
+        """الملفات غير المتغيرة لا تُجزأ مرة أخرى"""
+        first, hashed = self.hash_all(monkeypatch)
+        assert sorted(hashed) == ["a.md", "b.md"]
+        assert first["a.md"] == hashlib.sha256(b"# a.md\n").hexdigest()
+
+        again, hashed = self.hash_all(monkeypatch)
+        assert again == first and hashed == []
+
+    def test_replaced_file_with_same_stat_is_rehashed(self, monkeypatch):
+        """استبدال الملف (inode جديد) يعيد التجزئة رغم تطابق الحجم والوقت"""
+        self.hash_all(monkeypatch)
+        path = self.root / "a.md"
+        st = os.stat(path)
+        tmp = self.root / "a.tmp"
+        tmp.write_text("# A.md\n")
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, path)
+
+        out, hashed = self.hash_all(monkeypatch)
+        assert hashed == ["a.md"]
+        assert out["a.md"] == hashlib.sha256(b"# A.md\n").hexdigest()
@@ -0,0 +1,167 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات التحقق من الصور عبر الترويسات - Header-only Image Validation Tests
+"""
+
+import io
+import struct
+import zlib
+
+import pytest
+
+from src.backend.image_validation import (
+    CORRUPT,
+    TOO_LARGE,
+    TOO_MANY_PIXELS,
+    TOO_SMALL,
+    TRUNCATED,
+    UNSUPPORTED_FORMAT,
+    ImageValidator,
+    InvalidImage,
+    read_header,
+)
+
+
+def jpeg(width, height, app_size=16, components=3):
+    app = b"\xff\xe1" + struct.pack(">H", app_size + 2) + b"\x00" * app_size
+    sof = b"\xff\xc2" + struct.pack(
+        ">HBHHB", 8 + 3 * components, 8, height, width, components
+    )
+    return b"\xff\xd8" + app + sof + b"\x01\x22\x00" * components + b"\xff\xda"
+
+
+def png(width, height, depth=8, colour=2):
+    body = struct.pack(">IIBBBBB", width, height, depth, colour, 0, 0, 0)
+    crc = struct.pack(">I", zlib.crc32(b"IHDR" + body))
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + body + crc
+
+
+def webp(chunk, body):
+    data = chunk + struct.pack("<I", len(body)) + body
+    return b"RIFF" + struct.pack("<I", 4 + len(data)) + b"WEBP" + data
+
+
+def vp8x(width, height):
+    dims = (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    return webp(b"VP8X", b"\x10\x00\x00\x00" + dims)
+
+
+def vp8l(width, height):
+    bits = (width - 1) | (height - 1) << 14
+    return webp(b"VP8L", b"\x2f" + bits.to_bytes(4, "little"))
+
+
+def vp8(width, height):
+    frame = b"\x50\x01\x00\x9d\x01\x2a" + struct.pack("<HH", width, height)
+    return webp(b"VP8 ", frame)
+
+
+class CountingStream(io.RawIOBase):
+    """Non-seekable stream that records how many bytes were read"""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+        self.consumed = 0
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        data = self._data.read(n)
+        self.consumed += len(data)
+        return data
+
+
+class Rejections:
+    def __init__(self):
+        self.counts = {}
+
+    def labels(self, reason):
+        self.counts.setdefault(reason, 0)
+        outer = self
+
+        class Child:
+            def inc(self):
+                outer.counts[reason] += 1
+
+        return Child()
+
+
+class TestReadHeader:
+    """اختبارات قراءة الأبعاد من الترويسات"""
+
+    @pytest.mark.parametrize(
+        "data, fmt",
+        [
+            (jpeg(1024, 768), "jpeg"),
+            (png(1024, 768), "png"),
+            (vp8x(1024, 768), "webp"),
+            (vp8l(1024, 768), "webp"),
+            (vp8(1024, 768), "webp"),
+        ],
+    )
+    def test_dimensions_and_format(self, data, fmt):
+        """الأبعاد والصيغة لكل حاوية"""
+        info = read_header(data)
+        assert (info.format, info.width, info.height) == (fmt, 1024, 768)
+
+    def test_skips_metadata_without_reading_pixels(self):
+        """تخطي بيانات EXIF الكبيرة دون قراءة البكسلات"""
+        stream = CountingStream(jpeg(2000, 1500, app_size=60000) + b"\x00" * 10**6)
+        assert read_header(stream).width == 2000
+        assert stream.consumed < 60100
+
+    @pytest.mark.parametrize(
+        "data, reason",
+        [
+            (b"GIF89a" + b"\x00" * 20, UNSUPPORTED_FORMAT),
+            (png(1024, 768)[:20], TRUNCATED),
+            (png(1024, 768)[:-1] + b"\x00", CORRUPT),
+            (png(1024, 768, depth=3), CORRUPT),
+            (png(0, 768), CORRUPT),
+            (jpeg(1024, 768)[:22] + b"\xff\xda", CORRUPT),
+            (jpeg(1024, 768, components=2), CORRUPT),
+            (webp(b"ICCP", b"\x00" * 12), CORRUPT),
+        ],
+    )
+    def test_bad_headers(self, data, reason):
+        """الصيغ غير المدعومة والترويسات المقطوعة أو التالفة"""
+        with pytest.raises(InvalidImage) as e:
+            read_header(data)
+        assert e.value.reason == reason
+
+
+class TestImageValidator:
+    """اختبارات قواعد الأبعاد وعداد الرفض"""
+
+    def setup_method(self):
+        self.rejections = Rejections()
+        self.validator = ImageValidator(rejections=self.rejections)
+
+    def test_accepts_normal_image(self):
+        """قبول صورة بأبعاد عادية"""
+        assert self.validator.validate(jpeg(1024, 768)).pixels == 1024 * 768
+
+    def test_size_rules(self):
+        """الضلع الأصغر ≥ 256 والأكبر ≤ 8192"""
+        for data, reason in [
+            (png(128, 128), TOO_SMALL),
+            (vp8x(8193, 1024), TOO_LARGE),
+            (jpeg(8192, 8192), None),
+        ]:
+            try:
+                self.validator.validate(data)
+            except InvalidImage as e:
+                assert e.reason == reason
+            else:
+                assert reason is None
+        assert self.rejections.counts == {TOO_SMALL: 1, TOO_LARGE: 1}
+
+    def test_pixel_budget_and_bad_input_are_counted(self):
+        """حد عدد البكسلات ورفض المدخلات التالفة يُعدّان"""
+        validator = ImageValidator(max_pixels=4000 * 4000, rejections=self.rejections)
+        with pytest.raises(InvalidImage):
+            validator.validate(png(8000, 4000))
+        with pytest.raises(InvalidImage):
+            validator.validate(b"not an image")
+        assert self.rejections.counts == {TOO_MANY_PIXELS: 1, UNSUPPORTED_FORMAT: 1}
@@ -0,0 +1,58 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات ميزانية زمن الإقلاع - Import-time Budget Tests
+"""
+
+import subprocess
+import sys
+
+from tools.perf.import_budget import (
+    ROOT,
+    load_budget,
+    parse_importtime,
+    top_packages,
+)
+
+STDERR = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       400 |       1500 | fastapi
+import time:       980 |        980 |     fastapi.routing
+import time:       300 |        300 | json
+"""
+
+
+class TestImportBudget:
+    """اختبارات أداة ميزانية الإقلاع"""
+
+    def test_parse_importtime_output(self):
+        """تحليل مخرجات -X importtime مع العمق"""
+        records = parse_importtime(STDERR)
+        assert [r.module for r in records] == [
+            "_io",
+            "fastapi",
+            "fastapi.routing",
+            "json",
+        ]
+        assert records[2].depth == 2
+        assert records[1].cumulative_us == 1500
+        assert [r.module for r in top_packages(records, 1)] == ["fastapi"]
+
+    def test_budget_file_is_valid(self):
+        """ملف الميزانية يحتوي المرحلتين"""
+        budget = load_budget()
+        assert budget["import_ms"] < budget["startup_ms"]
+
+    def test_importing_main_does_not_build_the_app(self):
+        """استيراد الوحدة لا يحمّل FastAPI ولا يبني التطبيق"""
+        probe = (
+            "import sys, src.backend.main as m;"
+            "assert 'fastapi' not in sys.modules, 'fastapi imported eagerly';"
+            "assert 'app' not in vars(m);"
+            "m.app;"
+            "assert 'fastapi' in sys.modules and 'app' in vars(m)"
+        )
+        env = {"PYTHONPATH": str(ROOT), "OBS_ENABLE_METRICS": "false"}
+        subprocess.run(
+            [sys.executable, "-c", probe], cwd=ROOT, env=env, check=True, timeout=60
+        )
@@ -0,0 +1,118 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات مدير المهام غير المتزامنة - Job Manager Tests
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.backend.jobs import COMPLETED, FAILED, JobManager, JobQueueFull
+
+
+def wait_for(manager, job_id, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in {COMPLETED, FAILED}:
+            return job
+        time.sleep(0.005)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestJobManager:
+    """اختبارات فئة JobManager"""
+
+    def setup_method(self):
+        self.manager = JobManager(max_workers=2, max_pending=2, result_ttl=60)
+
+    def teardown_method(self):
+        self.manager.shutdown()
+
+    def test_submit_returns_immediately_and_completes(self):
+        """الإرسال يعيد معرف المهمة فوراً ثم تكتمل بالنتيجة"""
+        job = self.manager.submit(lambda x: {"value": x * 2}, 21)
+        assert job.id
+
+        done = wait_for(self.manager, job.id)
+        assert done["status"] == COMPLETED
+        assert done["result"] == {"value": 42}
+        assert self.manager.pending == 0
+
+    def test_failure_is_recorded(self):
+        """فشل المهمة يُسجَّل كحالة failed مع رسالة الخطأ"""
+
+        def boom():
+            raise RuntimeError("AI processing failed")
+
+        job = self.manager.submit(boom)
+        done = wait_for(self.manager, job.id)
+        assert done["status"] == FAILED
+        assert done["error"] == "AI processing failed"
+        assert "result" not in done
+
+    def test_rejects_when_pending_limit_reached(self):
+        """رفض الإرسال عند امتلاء الطابور"""
+        release = threading.Event()
+        for _ in range(2):
+            self.manager.submit(release.wait)
+
+        with pytest.raises(JobQueueFull):
+            self.manager.submit(release.wait)
+
+        release.set()
+
+    def test_finished_jobs_expire(self):
+        """حذف نتائج المهام المنتهية بعد انقضاء مدة الاحتفاظ"""
+        manager = JobManager(max_workers=1, max_pending=4, result_ttl=0.0)
+        try:
+            job = manager.submit(lambda: {})
+            deadline = time.time() + 2.0
+            while manager.pending and time.time() < deadline:
+                time.sleep(0.005)
+            time.sleep(0.01)
+            assert manager.get(job.id) is None
+        finally:
+            manager.shutdown()
+
+    def test_unknown_job(self):
+        """المعرف غير المعروف يعيد None"""
+        assert self.manager.get("missing") is None
+
+
+class TestSharedJobTable:
+    """اختبارات مشاركة حالة المهام بين عمليات الـ workers"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.runner = JobManager(max_workers=1, result_ttl=60, directory=self.dir)
+        # Another worker process: sees the directory, not the runner's memory
+        self.other = JobManager(max_workers=1, result_ttl=60, directory=self.dir)
+
+    def teardown_method(self):
+        self.runner.shutdown()
+        shutil.rmtree(self.dir)
+
+    def test_other_worker_answers_polls(self):
+        """worker آخر يرى حالة المهمة ونتيجتها"""
+        release = threading.Event()
+        job = self.runner.submit(lambda: release.wait() and {"value": 1})
+        assert self.other.get(job.id)["status"] in {"queued", "running"}
+        release.set()
+        done = wait_for(self.other, job.id)
+        assert done == self.runner.get(job.id)
+        assert done["result"] == {"value": 1}
+        assert self.other.get("../" + job.id) is None
+
+    def test_expired_files_are_removed(self):
+        """ملفات المهام المنتهية الصلاحية تُحذف"""
+        job = self.runner.submit(lambda: {})
+        wait_for(self.other, job.id)
+        self.other.result_ttl = 0.0
+        time.sleep(0.01)
+        assert self.other.get(job.id) is None
+        assert list(self.dir.iterdir()) == []
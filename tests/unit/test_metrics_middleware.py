@@ -0,0 +1,145 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات وسيط مقاييس HTTP - Prometheus ASGI Middleware Tests
+"""
+
+import asyncio
+import time
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+from src.backend.metrics import UNMATCHED_ROUTE, PrometheusMiddleware
+
+
+def make_metrics(registry):
+    return {
+        "requests_total": Counter(
+            "http_requests_total",
+            "t",
+            ["method", "endpoint", "status_code"],
+            registry=registry,
+        ),
+        "request_latency": Histogram(
+            "http_request_duration_seconds",
+            "l",
+            ["method", "endpoint"],
+            registry=registry,
+        ),
+        "active_connections": Gauge("active_connections", "a", registry=registry),
+    }
+
+
+class TestPrometheusMiddleware:
+    """اختبارات فئة PrometheusMiddleware"""
+
+    def setup_method(self):
+        self.registry = CollectorRegistry()
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+
+        @app.post("/fail")
+        async def fail():
+            raise HTTPException(status_code=503, detail="down")
+
+        @app.get("/metrics")
+        async def metrics():
+            return {}
+
+        app.add_middleware(PrometheusMiddleware, **make_metrics(self.registry))
+        self.client = TestClient(app)
+
+    def sample(self, name, **labels):
+        return self.registry.get_sample_value(name, labels) or 0
+
+    def test_labels_use_route_template(self):
+        """التسمية بقالب المسار وليس المسار الخام"""
+        self.client.get("/items/1")
+        self.client.get("/items/2")
+
+        labels = {"method": "GET", "endpoint": "/items/{item_id}"}
+        assert self.sample("http_requests_total", status_code="200", **labels) == 2
+        assert self.sample("http_request_duration_seconds_count", **labels) == 2
+        assert self.sample("active_connections") == 0
+
+    def test_status_and_unmatched_routes(self):
+        """تسجيل رمز الحالة والمسارات غير المطابقة تحت تسمية واحدة"""
+        self.client.post("/fail")
+        self.client.get("/no/such/path")
+        self.client.get("/another/missing")
+
+        assert (
+            self.sample(
+                "http_requests_total",
+                method="POST",
+                endpoint="/fail",
+                status_code="503",
+            )
+            == 1
+        )
+        assert (
+            self.sample(
+                "http_requests_total",
+                method="GET",
+                endpoint=UNMATCHED_ROUTE,
+                status_code="404",
+            )
+            == 2
+        )
+
+    def test_scrape_endpoint_is_excluded(self):
+        """عدم قياس نقطة /metrics نفسها"""
+        self.client.get("/metrics")
+        assert (
+            self.sample(
+                "http_requests_total",
+                method="GET",
+                endpoint="/metrics",
+                status_code="200",
+            )
+            == 0
+        )
+
+
+def test_per_request_overhead_is_low_microseconds():
+    """قياس الكلفة الإضافية لكل طلب على تطبيق ASGI مجرد"""
+    route = type("Route", (), {"path": "/bench"})()
+    start_msg = {"type": "http.response.start", "status": 200, "headers": []}
+    body_msg = {"type": "http.response.body", "body": b"ok"}
+
+    async def bare_app(scope, receive, send):
+        scope["route"] = route
+        await send(start_msg)
+        await send(body_msg)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    wrapped = PrometheusMiddleware(bare_app, **make_metrics(CollectorRegistry()))
+
+    async def run(app, n):
+        scope = {"type": "http", "path": "/bench", "method": "GET"}
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await app(scope, receive, send)
+        return time.perf_counter() - t0
+
+    n = 20000
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run(wrapped, 1000))  # warm the label cache
+        bare = min(loop.run_until_complete(run(bare_app, n)) for _ in range(3))
+        instrumented = min(loop.run_until_complete(run(wrapped, n)) for _ in range(3))
+    finally:
+        loop.close()
+
+    overhead_us = (instrumented - bare) / n * 1e6
+    # Typically a few microseconds; the bound leaves room for slow CI runners
+    assert overhead_us < 50, f"middleware overhead {overhead_us:.2f}us/request"
@@ -0,0 +1,111 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات وضع المقاييس متعدد العمليات - Prometheus Multiprocess Mode Tests
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from prometheus_client import generate_latest
+
+from src.backend.metrics import scrape_registry
+
+ROOT = Path(__file__).resolve().parents[2]
+
+WORKER = """
+import sys
+from fastapi.testclient import TestClient
+from src.backend import main
+
+client = TestClient(main.app)
+client.get("/health")
+main.IMAGE_ACCURACY_GAUGE.set(float(sys.argv[1]))
+main.ERROR_RATE_GAUGE.set(float(sys.argv[2]))
+"""
+
+
+class TestMultiprocessMetrics:
+    """اختبارات تجميع المقاييس عبر عدة عمليات"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_worker(self, accuracy, error_rate):
+        env = dict(
+            os.environ,
+            PROMETHEUS_MULTIPROC_DIR=str(self.temp_dir),
+            OBS_ENABLE_METRICS="true",
+            PYTHONPATH=str(ROOT),
+        )
+        subprocess.run(
+            [sys.executable, "-c", WORKER, str(accuracy), str(error_rate)],
+            cwd=ROOT,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+
+    def test_scrape_merges_all_workers(self, monkeypatch):
+        """التجميع يعكس جميع العمليات وفق نمط كل مقياس"""
+        self.run_worker(accuracy=96.0, error_rate=0.5)
+        self.run_worker(accuracy=98.0, error_rate=2.0)
+
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(self.temp_dir))
+        text = generate_latest(scrape_registry(None)).decode()
+
+        assert (
+            'http_requests_total{endpoint="/health",method="GET",status_code="200"}'
+            " 2.0" in text
+        )
+        # mostrecent: the last worker to write wins
+        assert "image_accuracy_score 98.0" in text
+        # livemax: the worst live worker
+        assert "error_rate_percentage 2.0" in text
+        # livesum: connections summed over workers, none open any more
+        assert "active_connections 0.0" in text
+
+    def test_single_process_mode_uses_app_registry(self, monkeypatch):
+        """بدون الدليل المشترك يُستخدم سجل التطبيق نفسه"""
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        monkeypatch.delenv("prometheus_multiproc_dir", raising=False)
+        sentinel = object()
+        assert scrape_registry(sentinel) is sentinel
+
+    def test_gunicorn_conf_shares_state_between_workers(self):
+        """إعداد gunicorn يضع حالة المهام والمقاييس على القرص مع عدة workers"""
+        script = (
+            "import os, runpy\n"
+            "runpy.run_path('src/backend/gunicorn_conf.py')\n"
+            "print(os.environ.get('TRYON_JOB_DIR', ''))\n"
+            "print(os.environ.get('PROMETHEUS_MULTIPROC_DIR', ''))\n"
+        )
+
+        def run(**env):
+            base = {
+                k: v
+                for k, v in os.environ.items()
+                if k.upper() not in ("TRYON_JOB_DIR", "PROMETHEUS_MULTIPROC_DIR")
+            }
+            out = subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=ROOT,
+                env=dict(base, TMPDIR=str(self.temp_dir), **env),
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            return out.stdout.splitlines()
+
+        assert run(WEB_CONCURRENCY="4") == [
+            str(self.temp_dir / "modamoda-jobs"),
+            str(self.temp_dir / "modamoda-prometheus"),
+        ]
+        assert run(WEB_CONCURRENCY="4", TRYON_JOB_DIR="/srv/jobs")[0] == "/srv/jobs"
+        assert run(WEB_CONCURRENCY="1") == ["", ""]
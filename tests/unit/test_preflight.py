@@ -0,0 +1,178 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات منسق الفحص المسبق - Concurrent Preflight Orchestrator Tests
+"""
+
+import hashlib
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from tools.preflight.preflight import (
+    ROOT,
+    Orchestrator,
+    Outcome,
+    Snapshot,
+    Step,
+    default_steps,
+    studies_integrity,
+    topological_order,
+)
+
+
+def quiet(message):
+    pass
+
+
+class TestScheduling:
+    """اختبارات جدولة الرسم البياني للخطوات"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.snapshot = Snapshot(self.dir, {})
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def run(self, steps, **kwargs):
+        orchestrator = Orchestrator(
+            steps, root=self.dir, snapshot=self.snapshot, progress=quiet, **kwargs
+        )
+        orchestrator.run()
+        return orchestrator
+
+    def test_independent_steps_run_concurrently(self):
+        """الخطوات المستقلة تعمل بالتوازي"""
+        steps = [Step(f"s{i}", "Sleep", ["sleep", "0.4"]) for i in range(3)]
+        t0 = time.monotonic()
+        orchestrator = self.run(steps)
+        assert time.monotonic() - t0 < 1.0
+        assert not orchestrator.failed()
+
+    def test_dependencies_finish_first(self):
+        """الخطوة لا تبدأ قبل انتهاء اعتمادياتها"""
+        order = []
+
+        def record(name):
+            def run(snapshot):
+                time.sleep(0.05 if name == "a" else 0)
+                order.append(name)
+                return Outcome("pass")
+
+            return run
+
+        steps = [
+            Step("b", "S", record("b"), deps=("a",)),
+            Step("a", "S", record("a")),
+            Step("c", "S", record("c"), deps=("b",)),
+        ]
+        self.run(steps)
+        assert order == ["a", "b", "c"]
+
+    def test_failed_dependency_skips_dependents(self):
+        """فشل الاعتمادية يتخطى ما يعتمد عليها، والخطوة المرنة لا تفشل"""
+        steps = [
+            Step("broken", "S", ["false"]),
+            Step("after", "S", ["true"], deps=("broken",)),
+            Step("soft", "S", ["false"], soft=True, ok="done"),
+        ]
+        orchestrator = self.run(steps)
+        assert orchestrator.failed() == ["broken", "after"]
+        assert orchestrator.results["after"].outcome.status == "skipped"
+        assert orchestrator.results["soft"].outcome.lines == ["✅ done"]
+
+    def test_cycles_and_unknown_dependencies(self):
+        """الحلقات والاعتماديات المجهولة ترفض"""
+        with pytest.raises(ValueError, match="cycle"):
+            topological_order(
+                [
+                    Step("a", "S", ["true"], deps=("b",)),
+                    Step("b", "S", ["true"], deps=("a",)),
+                ]
+            )
+        with pytest.raises(ValueError, match="unknown"):
+            topological_order([Step("a", "S", ["true"], deps=("missing",))])
+
+    def test_reports_keep_declared_order(self):
+        """التقرير يحافظ على ترتيب الأقسام مع توقيتات JSON"""
+        steps = [
+            Step("slow", "First", ["sleep", "0.2"], ok="slow PASS"),
+            Step("fast", "Second", ["true"], ok="fast PASS"),
+            Step("absent", "Second", ["true"], when="nope", skip_note="No dir"),
+        ]
+        orchestrator = self.run(steps)
+        md = orchestrator.markdown("start", "end", "0.95")
+        assert md.index("## First\n✅ slow PASS") < md.index(
+            "## Second\n✅ fast PASS\nℹ️  No dir"
+        )
+        payload = orchestrator.as_json("start", "end", 0.3)
+        durations = {s["name"]: s["duration"] for s in payload["steps"]}
+        assert durations["slow"] >= 0.2 > durations["fast"]
+        assert payload["ok"] is True
+
+
+class TestSnapshotSteps:
+    """اختبارات الخطوات التي تقرأ اللقطة المشتركة"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        studies = self.dir / "governance/studies"
+        (studies / "a/b/c").mkdir(parents=True)
+        (studies / "out").mkdir()
+        (studies / "ST-001.md").write_text("one")
+        (studies / "a/b/deep.md").write_text("deep")
+        (studies / "a/b/c/too_deep.md").write_text("x")
+        (studies / "out/skip.md").write_text("x")
+        (self.dir / ".git").mkdir()
+        (self.dir / ".git/big").write_bytes(b"0" * (3 << 20))
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def test_hygiene_runs_repo_script(self):
+        """خطوة النظافة تشغّل repo_hygiene.sh نفسه، مع تجاهل .git"""
+        script = self.dir / "tools/hygiene/repo_hygiene.sh"
+        script.parent.mkdir(parents=True)
+        shutil.copy(ROOT / "tools/hygiene/repo_hygiene.sh", script)
+        step = next(s for s in default_steps() if s.name == "hygiene")
+
+        def run():
+            orchestrator = Orchestrator([step], root=self.dir, progress=quiet)
+            return orchestrator.run()["hygiene"].outcome
+
+        assert run().status == "pass"
+        (self.dir / "__MACOSX").mkdir()
+        assert "__MACOSX" in run().output
+        shutil.rmtree(self.dir / "__MACOSX")
+        (self.dir / "large.bin").write_bytes(b"0" * ((2 << 20) + 1))
+        assert "large.bin" in run().output
+
+    def test_studies_index_matches_sha256sum_format(self):
+        """فهرس SHA256 بعمق 3 ودون مجلدات out"""
+        studies_integrity(Snapshot.take(self.dir))
+        index = (self.dir / "governance/out/studies.sha256").read_text()
+        digest = hashlib.sha256(b"one").hexdigest()
+        assert index.splitlines() == [
+            f"{digest}  governance/studies/ST-001.md",
+            f"{hashlib.sha256(b'deep').hexdigest()}  governance/studies/a/b/deep.md",
+        ]
+
+    def test_snapshot_is_scoped_and_lazy(self):
+        """اللقطة تشمل مجلد الدراسات فقط ولا تُؤخذ إلا عند الحاجة"""
+        (self.dir / "elsewhere.md").write_text("x")
+        snapshot = Snapshot.take(self.dir)
+        assert sorted(snapshot.files) == [
+            "governance/studies/ST-001.md",
+            "governance/studies/a/b/c/too_deep.md",
+            "governance/studies/a/b/deep.md",
+            "governance/studies/out/skip.md",
+        ]
+
+        orchestrator = Orchestrator(
+            [Step("shell", "Shell", ["true"])], root=self.dir, progress=quiet
+        )
+        orchestrator.run()
+        assert orchestrator._snapshot is None
@@ -0,0 +1,282 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات الرفع القابل للاستئناف - Resumable Chunked Upload Tests
+"""
+
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.backend import main, resumable
+from src.backend.image_validation import ImageValidator
+from src.backend.resumable import ResumableUploads
+from src.backend.uploads import UploadRejected, UploadStore
+
+
+def jpeg(width=1024, height=768, size=200_000, metadata=()):
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 17, 8, height, width, 3)
+    app = b"".join(
+        bytes([0xFF, 0xE1]) + struct.pack(">H", n + 2) + bytes(n) for n in metadata
+    )
+    head = b"\xff\xd8" + app + sof + b"\x01\x22\x00" * 3 + b"\xff\xda"
+    # Non-repeating body, so a chunk written at the wrong offset shows up
+    body = b"".join(i.to_bytes(4, "big") for i in range(size // 4 + 1))
+    return head + body[: size - len(head)]
+
+
+def pieces(data, size=32 * 1024):
+    return [(i, data[i : i + size]) for i in range(0, len(data), size)]
+
+
+def send(uploads, session, offset, data):
+    s, fd = uploads.begin_write(session.id, offset)
+    try:
+        uploads.write(s, fd, offset, data)
+    finally:
+        s = uploads.end_write(s, fd)
+    return s
+
+
+class TestResumableUploads:
+    """اختبارات جلسات الرفع والكتابة في مواضعها"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.store = UploadStore(
+            self.dir, max_bytes=300_000, validator=ImageValidator()
+        )
+        self.uploads = ResumableUploads(self.store)
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def files(self):
+        return [p for p in self.dir.rglob("*") if p.is_file() and p.name != ".lock"]
+
+    def test_parallel_out_of_order_chunks(self):
+        """أجزاء متوازية وبغير ترتيب تُجمع في ملف مخصص مسبقاً"""
+        data = jpeg()
+        session = self.uploads.create(len(data), hashlib.sha256(data).hexdigest())
+        assert session.path.stat().st_size == len(data)
+
+        parts = pieces(data)[::-1]
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda p: send(self.uploads, session, *p), parts))
+
+        session = self.uploads.get(session.id)
+        assert session.complete and session.ranges == [(0, len(data))]
+        stored = self.uploads.finalize(session.id)
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert stored.path.read_bytes() == data
+        assert self.files() == [stored.path]
+        assert len(self.uploads) == 0
+
+    def test_resume_from_offset(self):
+        """بعد الانقطاع يُستأنف الرفع من الإزاحة المتصلة"""
+        data = jpeg()
+        session = self.uploads.create(len(data))
+        send(self.uploads, session, 0, data[:100_000])
+        session = send(self.uploads, session, 150_000, data[150_000:])
+        assert (session.offset, session.received) == (100_000, 150_000)
+
+        with pytest.raises(UploadRejected) as e:
+            self.uploads.finalize(session.id)
+        assert (e.value.status_code, e.value.reason) == (409, "incomplete")
+
+        send(self.uploads, session, session.offset, data[session.offset : 150_000])
+        assert self.uploads.finalize(session.id).path.read_bytes() == data
+
+    def test_finalize_waits_for_registered_writers(self, monkeypatch):
+        """الإنهاء لا يسبق جزءاً بدأ كتابته، والجلسة المنتهية تعطي 404"""
+        data = jpeg()
+        session = self.uploads.create(len(data))
+        send(self.uploads, session, 0, data)
+        raced = []
+        real_open = os.open
+
+        def open_after_finalize(*args):
+            with pytest.raises(UploadRejected) as e:
+                self.uploads.finalize(session.id)
+            raced.append(e.value.reason)
+            return real_open(*args)
+
+        monkeypatch.setattr(resumable.os, "open", open_after_finalize)
+        send(self.uploads, session, 0, data[:10])
+        monkeypatch.undo()
+        assert raced == ["busy"]
+
+        self.uploads.finalize(session.id)
+        with pytest.raises(UploadRejected) as e:
+            self.uploads.begin_write(session.id, 0)
+        assert e.value.status_code == 404
+
+    def test_bad_header_and_bounds(self):
+        """الترويسة السيئة تُلغي الجلسة مبكراً، والإزاحات خارج الحجم تُرفض"""
+        session = self.uploads.create(200_000)
+        with pytest.raises(UploadRejected) as e:
+            send(self.uploads, session, 200_000, b"x")
+        assert e.value.status_code == 416
+        with pytest.raises(UploadRejected) as e:
+            send(self.uploads, session, 199_999, b"xy")
+        assert e.value.reason == "past_end"
+
+        bad = jpeg(width=100, height=100)
+        with pytest.raises(UploadRejected) as e:
+            send(self.uploads, session, 0, bad[: 64 * 1024])
+        assert (e.value.status_code, e.value.reason) == (422, "too_small")
+        assert len(self.uploads) == 0 and self.files() == []
+
+        with pytest.raises(UploadRejected) as e:
+            self.uploads.create(400_000)
+        assert e.value.status_code == 413
+
+    def test_metadata_past_header_buffer(self):
+        """ترويسات JPEG بعد أول 64 KiB تُقرأ من ملف الجلسة"""
+        data = jpeg(metadata=(65533, 40_000))
+        session = self.uploads.create(len(data))
+        for offset, chunk in pieces(data):
+            session = send(self.uploads, session, offset, chunk)
+            # Zeros past the received prefix must not count as headers
+            assert session.validated == (offset > 64 * 1024)
+        stored = self.uploads.finalize(session.id)
+        assert (stored.info.width, stored.info.height) == (1024, 768)
+
+        bad = jpeg(width=100, height=100, metadata=(65533, 40_000))
+        session = self.uploads.create(len(bad))
+        with pytest.raises(UploadRejected) as e:
+            for offset, chunk in pieces(bad):
+                send(self.uploads, session, offset, chunk)
+        assert e.value.reason == "too_small"
+        assert len(self.uploads) == 0
+
+    def test_header_checks_past_buffer_are_logarithmic(self, monkeypatch):
+        """إعادة فحص الترويسات من الملف فقط كلما تضاعفت البادئة المستلمة"""
+        calls = []
+        real = resumable.check_header
+        monkeypatch.setattr(
+            resumable, "check_header", lambda *a, **k: calls.append(1) or real(*a, **k)
+        )
+        data = jpeg(metadata=(65533, 65533, 30_000), size=280_000)
+        session = self.uploads.create(len(data))
+        for offset, chunk in pieces(data, 4 * 1024):
+            session = send(self.uploads, session, offset, chunk)
+        assert session.validated and len(calls) <= 4
+        self.uploads.finalize(session.id)
+
+    def test_checksum_mismatch(self):
+        """البصمة المعلنة يجب أن تطابق البايتات"""
+        data = jpeg()
+        session = self.uploads.create(len(data), "0" * 64)
+        send(self.uploads, session, 0, data)
+        with pytest.raises(UploadRejected) as e:
+            self.uploads.finalize(session.id)
+        assert e.value.reason == "checksum_mismatch"
+        assert self.files() == []
+
+    def test_sessions_expire(self):
+        """الجلسات الخاملة تنتهي وتُحذف ملفاتها"""
+        uploads = ResumableUploads(self.store, ttl=0.05, max_sessions=1)
+        session = uploads.create(1000)
+        with pytest.raises(UploadRejected) as e:
+            uploads.create(1000)
+        assert e.value.status_code == 503
+
+        time.sleep(0.1)
+        with pytest.raises(UploadRejected) as e:
+            uploads.get(session.id)
+        assert e.value.status_code == 404
+        assert not session.path.exists()
+        uploads.create(1000)
+
+    def test_reserved_bytes_cap(self):
+        """مجموع المساحة المحجوزة للجلسات المفتوحة محدود"""
+        uploads = ResumableUploads(self.store, max_reserved_bytes=500_000)
+        first = uploads.create(300_000)
+        with pytest.raises(UploadRejected) as e:
+            uploads.create(300_000)
+        assert (e.value.status_code, e.value.reason) == (503, "upload_space_full")
+        uploads.abort(first.id)
+        uploads.create(300_000)
+
+
+class TestResumableEndpoints:
+    """اختبارات واجهة الجلسات وربط الإنهاء بطابور القياس"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.store = UploadStore(
+            self.dir, max_bytes=300_000, validator=ImageValidator()
+        )
+        self.client = TestClient(main.create_app())
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def test_session_flow_feeds_try_on(self, monkeypatch):
+        """إنشاء، رفع أجزاء، استعلام الإزاحة، ثم الإنهاء مع طلب قياس"""
+        monkeypatch.setattr(main, "upload_store", self.store)
+        monkeypatch.setattr(main, "resumable_uploads", ResumableUploads(self.store))
+        monkeypatch.setattr(main, "SIMULATED_ERROR_RATE", 0.0)
+        data = jpeg()
+
+        res = self.client.post("/api/v1/uploads/sessions", json={"size": len(data)})
+        assert res.status_code == 201, res.text
+        url = res.headers["location"]
+        assert res.json()["upload_url"] == url
+
+        missing = self.client.patch(url, content=b"x")
+        assert missing.status_code == 400
+        for offset, chunk in pieces(data, 64 * 1024)[:2]:
+            res = self.client.patch(
+                url, content=chunk, headers={"Upload-Offset": str(offset)}
+            )
+            assert res.status_code == 200, res.text
+        head = self.client.head(url)
+        assert head.headers["upload-offset"] == str(128 * 1024)
+        assert head.headers["upload-length"] == str(len(data))
+
+        early = self.client.post(url + "/finalize")
+        assert early.json()["detail"]["reason"] == "incomplete"
+        offset = int(self.client.get(url).json()["offset"])
+        self.client.patch(
+            url, content=data[offset:], headers={"Upload-Offset": str(offset)}
+        )
+
+        res = self.client.post(url + "/finalize", json={"try_on": {"model": "m"}})
+        assert res.status_code in (200, 202), res.text
+        assert self.store.exists(hashlib.sha256(data).hexdigest())
+        assert self.client.get(url).status_code == 404
+
+    def test_delete_session(self, monkeypatch):
+        """حذف الجلسة يزيل ملفها الجزئي"""
+        monkeypatch.setattr(main, "resumable_uploads", ResumableUploads(self.store))
+        res = self.client.post("/api/v1/uploads/sessions", json={"size": 1000})
+        url = res.headers["location"]
+        assert self.client.delete(url).status_code == 204
+        assert self.client.delete(url).status_code == 404
+        assert [p for p in self.dir.rglob("*.part")] == []
+
+    def test_sessions_shared_between_workers(self, monkeypatch):
+        """أي عامل يخدم الجلسة: حالتها على القرص لا في ذاكرة العملية"""
+        data = jpeg()
+        monkeypatch.setattr(main, "SIMULATED_ERROR_RATE", 0.0)
+        workers = [ResumableUploads(self.store), ResumableUploads(self.store)]
+        session = workers[0].create(len(data))
+        for i, (offset, chunk) in enumerate(pieces(data, 64 * 1024)):
+            send(workers[i % 2], session, offset, chunk)
+
+        monkeypatch.setattr(main, "upload_store", self.store)
+        monkeypatch.setattr(main, "resumable_uploads", workers[1])
+        url = f"/api/v1/uploads/sessions/{session.id}"
+        assert self.client.get(url).json()["offset"] == len(data)
+        res = self.client.post(url + "/finalize")
+        assert res.status_code == 201, res.text
+        assert len(workers[0]) == 0
@@ -0,0 +1,115 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات ذاكرة الفحص المشتركة - Governance Scan Cache Tests
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from tools.governance.scan_cache import Entry, ScanCache, fingerprint
+from tools.governance.semantic_assist import scan
+
+
+class TestScanCache:
+    """اختبارات ذاكرة الفحص التزايدية"""
+
+    def setup_method(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.db = self.root / "out" / "cache.sqlite"
+        (self.root / "a.py").write_text("print('roadmap')\n")
+
+    def teardown_method(self):
+        shutil.rmtree(self.root)
+
+    def open(self):
+        return ScanCache(self.db, root=self.root)
+
+    def test_facts_persist_across_runs(self):
+        """الحقائق تبقى بين التشغيلات"""
+        with self.open() as cache:
+            entry = cache.entry("a.py")
+            assert entry.get("lines", "1") is None
+            entry.put("lines", "1", {"count": 1})
+
+        with self.open() as cache:
+            assert cache.entry("a.py").get("lines", "1") == {"count": 1}
+            assert cache.hits == 1 and cache.misses == 0
+
+    def test_unchanged_file_is_not_read(self, monkeypatch):
+        """الملف غير المتغير لا يُقرأ"""
+        with self.open() as cache:
+            cache.entry("a.py").put("lines", "1", 1)
+
+        def fail(self):
+            raise AssertionError("file was read")
+
+        monkeypatch.setattr(Entry, "data", fail)
+        with self.open() as cache:
+            assert cache.entry("a.py").get("lines", "1") == 1
+
+    def test_content_change_invalidates_every_fact(self):
+        """تغيير المحتوى يُبطل كل الحقائق"""
+        with self.open() as cache:
+            entry = cache.entry("a.py")
+            entry.put("lines", "1", 1)
+            entry.put("tags", "1", [])
+
+        (self.root / "a.py").write_text("print('roadmap')\nprint('v2')\n")
+
+        with self.open() as cache:
+            entry = cache.entry("a.py")
+            assert entry.get("lines", "1") is None
+            assert entry.get("tags", "1") is None
+
+    def test_touch_with_same_content_keeps_facts(self):
+        """تغيير وقت التعديل فقط لا يُبطل الحقائق"""
+        with self.open() as cache:
+            cache.entry("a.py").put("lines", "1", 1)
+
+        st = os.stat(self.root / "a.py")
+        os.utime(self.root / "a.py", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        with self.open() as cache:
+            assert cache.entry("a.py").get("lines", "1") == 1
+
+    def test_version_change_rederives(self):
+        """تغيير الإصدار يعيد الاشتقاق"""
+        with self.open() as cache:
+            cache.entry("a.py").put("kw", fingerprint(["roadmap"]), ["ST-002"])
+
+        with self.open() as cache:
+            entry = cache.entry("a.py")
+            assert entry.get("kw", fingerprint(["roadmap", "model"])) is None
+            assert entry.get("kw", fingerprint(["roadmap"])) == ["ST-002"]
+
+    def test_off_keeps_nothing_on_disk(self):
+        """وضع التعطيل لا يكتب ملفاً"""
+        with ScanCache("off", root=self.root) as cache:
+            cache.entry("a.py").put("lines", "1", 1)
+        assert not self.db.exists()
+
+    def test_semantic_assist_second_run_is_all_hits(self):
+        """التشغيل الثاني لأداة الكلمات المفتاحية يعتمد على الذاكرة بالكامل"""
+        rules = {"ST-002": {"keywords": ["roadmap"]}}
+        with self.open() as cache:
+            first = scan(rules, root=str(self.root), cache=cache)
+            assert cache.misses == 1
+        with self.open() as cache:
+            second = scan(rules, root=str(self.root), cache=cache)
+            assert (cache.hits, cache.misses) == (1, 0)
+        assert first == second
+        assert [p.name for p in second["ST-002"]] == ["a.py"]
+
+    def test_paths_keyed_relative_to_cache_root(self, monkeypatch):
+        """مفتاح الملف نسبي إلى جذر الذاكرة أياً كان مجلد التشغيل"""
+        rules = {"ST-002": {"keywords": ["roadmap"]}}
+        with self.open() as cache:
+            scan(rules, root=str(self.root), cache=cache)
+        (self.root / "sub").mkdir()
+        monkeypatch.chdir(self.root / "sub")
+        with self.open() as cache:
+            scan(rules, root="..", cache=cache)
+            assert (cache.hits, cache.misses) == (1, 0)
+            assert cache.key(self.root / "a.py") == cache.key("a.py") == "a.py"
@@ -0,0 +1,88 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات محرك الكلمات المفتاحية - Semantic Assist Keyword Engine Tests
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from tools.governance.semantic_assist import KeywordMatcher, scan
+
+
+class TestKeywordMatcher:
+    """اختبارات مطابقة جميع الكلمات في مرور واحد"""
+
+    def setup_method(self):
+        self.matcher = KeywordMatcher(
+            {
+                "ST-002": ["roadmap", "milestone"],
+                "ST-015": ["roadmap v2", "rollout"],
+                "ST-007": ["ops", "p&l"],
+                "ST-011": ["model", "pipeline"],
+            }
+        )
+
+    def test_nested_keywords_credit_every_study(self):
+        """الكلمة الأطول تُحتسب للكلمات الأقصر داخلها"""
+        assert self.matcher.studies_in("see ROADMAP V2 for details") == {
+            "ST-002",
+            "ST-015",
+        }
+
+    def test_overlapping_keywords_are_all_found(self):
+        """اكتشاف الكلمات المتداخلة"""
+        matcher = KeywordMatcher({"A": ["abc"], "B": ["bcd"]})
+        assert matcher.studies_in("xabcdx") == {"A", "B"}
+
+    def test_case_insensitive_and_punctuation(self):
+        """المطابقة غير حساسة لحالة الأحرف وتدعم الرموز"""
+        assert self.matcher.studies_in("Monthly P&L review") == {"ST-007"}
+        assert self.matcher.studies_in("nothing relevant here") == set()
+
+    def test_stops_once_wanted_studies_hit(self):
+        """التوقف بمجرد إيجاد الدراسات المطلوبة"""
+        found = self.matcher.studies_in("model ... milestone", wanted={"ST-011"})
+        assert "ST-011" in found
+
+    def test_scales_to_many_keywords(self):
+        """آلاف الكلمات في نمط واحد"""
+        rules = {f"ST-{i:03d}": [f"kw{i}x{j}" for j in range(10)] for i in range(500)}
+        matcher = KeywordMatcher(rules)
+        assert matcher.studies_in("prefix KW42X7 suffix kw499x0") == {
+            "ST-042",
+            "ST-499",
+        }
+
+
+class TestScan:
+    """اختبارات المسح في مرور واحد"""
+
+    def setup_method(self):
+        self.root = Path(tempfile.mkdtemp())
+        for i in range(5):
+            (self.root / f"doc{i}.md").write_text("the roadmap and the model")
+        (self.root / "other.py").write_text("# rollout plan")
+        (self.root / "image.png").write_text("roadmap")
+
+    def teardown_method(self):
+        shutil.rmtree(self.root)
+
+    def test_each_study_keeps_its_own_limit(self):
+        """حد المرشحين لكل دراسة على حدة"""
+        rules = {
+            "ST-002": {"keywords": ["roadmap"]},
+            "ST-011": {"keywords": ["model"]},
+            "ST-015": {"keywords": ["rollout"]},
+        }
+        matches = scan(rules, root=str(self.root), limit=3)
+        assert len(matches["ST-002"]) == 3
+        assert len(matches["ST-011"]) == 3
+        assert [p.name for p in matches["ST-015"]] == ["other.py"]
+
+    def test_github_workflows_are_skipped(self):
+        """ملفات .github لا تُرشَّح للوسم كما في السابق"""
+        (self.root / ".github/workflows").mkdir(parents=True)
+        (self.root / ".github/workflows/ci.yml").write_text("# rollout")
+        matches = scan({"ST-015": {"keywords": ["rollout"]}}, root=str(self.root))
+        assert [p.name for p in matches["ST-015"]] == ["other.py"]
@@ -0,0 +1,120 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات نقل الصور عبر الذاكرة المشتركة - Shared-memory Image Transport Tests
+"""
+
+import array
+import json
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import pytest
+
+from src.backend import shm_transport
+from src.backend.shm_transport import (
+    SHM_DIR,
+    ImageHandle,
+    SharedImageStore,
+    SharedMemoryFull,
+    open_image,
+)
+
+
+def pixels(shape, fmt="H"):
+    count = 1
+    for dim in shape:
+        count *= dim
+    return memoryview(array.array(fmt, range(count))).cast("B").cast(fmt, shape)
+
+
+def read_in_child(handle_dict):
+    """Runs in another process: map the image and read a few pixels"""
+    with open_image(ImageHandle.from_dict(handle_dict)) as image:
+        return list(image.shape), image.tolist()[2][:3]
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self):
+        self.value += 1
+
+
+class TestSharedImageStore:
+    """اختبارات مخزن مقاطع الصور"""
+
+    def setup_method(self):
+        self.leaks = Counter()
+        self.store = SharedImageStore(max_bytes=4096, max_age=60, leaks=self.leaks)
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_handle_is_small_and_json_serializable(self):
+        """المقبض يحمل الاسم والأبعاد والنوع فقط"""
+        handle = self.store.put(pixels((4, 8)))
+        assert (handle.shape, handle.format, handle.nbytes) == ((4, 8), "H", 64)
+        message = json.dumps(handle.to_dict())
+        assert ImageHandle.from_dict(json.loads(message)) == handle
+
+    def test_other_process_maps_same_pixels(self):
+        """عملية أخرى تقرأ نفس البكسلات دون نسخها عبر الطابور"""
+        handle = self.store.put(pixels((4, 8)))
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            shape, row = pool.apply(read_in_child, (handle.to_dict(),))
+        assert (shape, row) == ([4, 8], [16, 17, 18])
+        # The worker exiting must not unlink the owner's segment
+        with open_image(handle) as image:
+            assert image.tolist()[3][7] == 31
+
+    def test_reference_counting(self):
+        """المقطع يُحرر عند وصول العداد إلى الصفر فقط"""
+        handle = self.store.put(pixels((2, 2)))
+        self.store.acquire(handle, 2)
+        assert not self.store.release(handle)
+        assert not self.store.release(handle)
+        assert self.store.release(handle)
+        assert (len(self.store), self.store.bytes_in_use) == (0, 0)
+        with pytest.raises(FileNotFoundError):
+            with open_image(handle):
+                pass
+        with pytest.raises(KeyError):
+            self.store.acquire(handle)
+
+    def test_byte_limit(self):
+        """رفض ما يتجاوز حد الذاكرة المشتركة"""
+        self.store.put(bytes(3000))
+        with pytest.raises(SharedMemoryFull):
+            self.store.put(bytes(2000))
+        assert self.store.bytes_in_use == 3000
+
+    def test_leak_detection_and_reaping(self):
+        """المقاطع المتروكة تُكتشف وتُستعاد وتُعد"""
+        fresh = self.store.put(bytes(10))
+        stale = self.store.put(bytes(10))
+        self.store._segments[stale.name].created -= 120
+        assert self.store.leaked() == [stale]
+        assert self.store.reap() == 1
+        assert self.leaks.value == 1
+        assert len(self.store) == 1 and self.store.release(fresh)
+
+    def test_failed_copy_frees_segment(self, monkeypatch):
+        """فشل النسخ بعد إنشاء المقطع لا يترك مقطعاً يتيماً"""
+        created = []
+
+        class ShortBuffer(shared_memory.SharedMemory):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                created.append(self.name)
+
+            @property
+            def buf(self):
+                return memoryview(bytearray(1))
+
+        monkeypatch.setattr(shm_transport.shared_memory, "SharedMemory", ShortBuffer)
+        with pytest.raises(ValueError):
+            self.store.put(bytes(64))
+        assert (len(self.store), self.store.bytes_in_use) == (0, 0)
+        assert not os.path.exists(os.path.join(SHM_DIR, created[0]))
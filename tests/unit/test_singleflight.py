@@ -0,0 +1,71 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات دمج الطلبات المتطابقة - Single-Flight Tests
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from src.backend.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """اختبارات فئة SingleFlight"""
+
+    def setup_method(self):
+        self.registry = CollectorRegistry()
+        self.coalesced = Counter("coalesced", "c", registry=self.registry)
+        self.fanout = Histogram(
+            "fanout", "f", registry=self.registry, buckets=(1, 2, 4, 8, 16, 32)
+        )
+        self.flight = SingleFlight(coalesced=self.coalesced, fanout=self.fanout)
+
+    def metric(self, name):
+        return self.registry.get_sample_value(name) or 0
+
+    def test_concurrent_callers_share_one_computation(self):
+        """المستدعون المتزامنون يشتركون في حساب واحد"""
+        started = []
+        barrier = threading.Barrier(16)
+
+        def call(_):
+            barrier.wait()
+            return self.flight.join("key", lambda: started.append(1) or "job-1")
+
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            results = list(ex.map(call, range(16)))
+
+        assert len(started) == 1
+        assert {handle for handle, _ in results} == {"job-1"}
+        assert sum(1 for _, leader in results if leader) == 1
+        assert self.metric("coalesced_total") == 15
+
+        self.flight.done("key")
+        assert self.metric("fanout_sum") == 16
+        assert len(self.flight) == 0
+
+    def test_new_computation_after_done(self):
+        """بعد الانتهاء يبدأ الطلب التالي حساباً جديداً"""
+        assert self.flight.join("key", lambda: "first") == ("first", True)
+        self.flight.done("key")
+        assert self.flight.join("key", lambda: "second") == ("second", True)
+
+    def test_distinct_keys_do_not_coalesce(self):
+        """المفاتيح المختلفة لا تُدمج"""
+        assert self.flight.join("a", lambda: 1) == (1, True)
+        assert self.flight.join("b", lambda: 2) == (2, True)
+        assert self.metric("coalesced_total") == 0
+
+    def test_failed_start_is_not_recorded(self):
+        """فشل بدء الحساب لا يترك إدخالاً عالقاً"""
+
+        def fail():
+            raise RuntimeError("queue full")
+
+        with pytest.raises(RuntimeError):
+            self.flight.join("key", fail)
+        assert len(self.flight) == 0
+        assert self.flight.join("key", lambda: "retry") == ("retry", True)
@@ -0,0 +1,118 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات توقيت مراحل خط المعالجة - Pipeline Stage Timing Tests
+"""
+
+import pytest
+from prometheus_client import CollectorRegistry, Histogram
+
+from src.backend.stages import PIPELINE_STAGES, StageTimer
+
+
+class FakeSpan:
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self.attributes = {}
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.log.append(("enter", self.name))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.log.append(("exit", self.name, exc_type))
+        return False
+
+
+class FakeTracer:
+    def __init__(self):
+        self.log = []
+        self.spans = []
+
+    def start_as_current_span(self, name):
+        span = FakeSpan(name, self.log)
+        self.spans.append(span)
+        return span
+
+
+class TestStageTimer:
+    """اختبارات فئة StageTimer"""
+
+    def setup_method(self):
+        self.registry = CollectorRegistry()
+        self.histogram = Histogram(
+            "pipeline_stage_duration_seconds", "s", ["stage"], registry=self.registry
+        )
+
+    def count(self, stage):
+        return (
+            self.registry.get_sample_value(
+                "pipeline_stage_duration_seconds_count", {"stage": stage}
+            )
+            or 0
+        )
+
+    def test_known_stages_are_preallocated(self):
+        """إنشاء تسميات المراحل المعروفة مسبقاً"""
+        StageTimer(self.histogram)
+        for stage in PIPELINE_STAGES:
+            assert (
+                self.registry.get_sample_value(
+                    "pipeline_stage_duration_seconds_count", {"stage": stage}
+                )
+                == 0
+            )
+
+    def test_context_manager_and_decorator_record(self):
+        """التسجيل عبر مدير السياق والمزخرف"""
+        timer = StageTimer(self.histogram)
+
+        with timer.stage("segmentation"):
+            pass
+
+        @timer.timed("encode")
+        def encode(x):
+            return x * 2
+
+        assert encode(21) == 42
+        assert self.count("segmentation") == 1
+        assert self.count("encode") == 1
+
+    def test_failure_is_still_timed_and_raised(self):
+        """الاستثناء يُعاد رفعه مع تسجيل زمن المرحلة"""
+        timer = StageTimer(self.histogram)
+        with pytest.raises(ValueError):
+            with timer.stage("generation"):
+                raise ValueError("oom")
+        assert self.count("generation") == 1
+
+    def test_unknown_stage_is_created_on_demand(self):
+        """المراحل غير المعرّفة تُنشأ عند الطلب"""
+        timer = StageTimer(self.histogram)
+        with timer.stage("upscale"):
+            pass
+        assert self.count("upscale") == 1
+
+    def test_child_spans_match_stages(self):
+        """كل مرحلة تفتح span فرعياً باسمها"""
+        tracer = FakeTracer()
+        timer = StageTimer(self.histogram, tracer=tracer)
+
+        with timer.stage("decode"):
+            pass
+        with pytest.raises(RuntimeError):
+            with timer.stage("refinement"):
+                raise RuntimeError("bad mask")
+
+        assert [s.name for s in tracer.spans] == ["stage.decode", "stage.refinement"]
+        assert ("exit", "stage.refinement", RuntimeError) in tracer.log
+        assert "stage.duration_seconds" in tracer.spans[0].attributes
+
+    def test_disabled_timer_is_a_no_op(self):
+        """بدون مقاييس أو تتبع لا يحدث شيء"""
+        timer = StageTimer()
+        with timer.stage("decode") as span:
+            assert span is None
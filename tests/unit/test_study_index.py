@@ -0,0 +1,76 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات فهرس الدراسات المعكوس - Inverted @Study Index Tests
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from tools.governance.scan_cache import Entry, ScanCache
+from tools.governance.study_index import StudyIndex
+
+
+class TestStudyIndex:
+    """اختبارات الفهرس في الاتجاهين"""
+
+    def setup_method(self):
+        self.root = Path(tempfile.mkdtemp())
+        files = {
+            "src/backend/api.py": "# @Study:ST-008 @Study:ST-012\nimport os\n",
+            "src/backend/util.py": "import os\n",
+            "src/frontend/app.ts": "// @Study:ST-008\n",
+            "docs/plan.md": "<!-- @Study:ST-002 -->\n# Plan\n",
+            "image.png": "@Study:ST-099",
+        }
+        for rel, text in files.items():
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        self.db = self.root / "out" / "cache.sqlite"
+
+    def teardown_method(self):
+        shutil.rmtree(self.root)
+
+    def build(self):
+        with ScanCache(self.db, root=self.root) as cache:
+            return StudyIndex.build(str(self.root), cache)
+
+    def test_queries_both_directions(self):
+        """من الدراسة إلى الملفات ومن الملف إلى الدراسات"""
+        index = self.build()
+        assert index.files_for("ST-008") == [
+            "src/backend/api.py",
+            "src/frontend/app.ts",
+        ]
+        assert index.studies_for("src/backend/api.py") == ["ST-008", "ST-012"]
+        assert index.untagged("src/") == ["src/backend/util.py"]
+        assert "image.png" not in index.files
+
+    def test_orphans_ignore_documentation(self):
+        """الدراسة الموسومة في التوثيق فقط بلا كود"""
+        index = self.build()
+        assert index.orphans(["ST-002", "ST-008", "ST-019"]) == ["ST-002", "ST-019"]
+
+    def test_refresh_reads_only_changed_files(self, monkeypatch):
+        """إعادة البناء لا تقرأ إلا الملفات المتغيرة"""
+        self.build()
+        (self.root / "src/backend/util.py").write_text("# @Study:ST-009\nimport os\n")
+        read = []
+        original = Entry.data
+
+        def spy(entry):
+            read.append(entry.path)
+            return original(entry)
+
+        monkeypatch.setattr(Entry, "data", spy)
+        index = self.build()
+        assert read == ["src/backend/util.py"]
+        assert index.files_for("ST-009") == ["src/backend/util.py"]
+
+    def test_save_and_load(self):
+        """الحفظ والتحميل دون المرور على الشجرة"""
+        path = self.root / "out" / "index.json"
+        self.build().save(path)
+        loaded = StudyIndex.load(path)
+        assert loaded.files_for("ST-012") == ["src/backend/api.py"]
@@ -0,0 +1,191 @@
+# @Study:ST-016 @Study:ST-017 @Study:ST-018
+"""
+اختبارات رفع الصور المتدفق - Streaming Upload Ingestion Tests
+"""
+
+import hashlib
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.backend import main, uploads
+from src.backend.cache import cache_key
+from src.backend.image_validation import ImageValidator
+from src.backend.uploads import (
+    HEADER_BYTES,
+    MAX_HEADER_BYTES,
+    UploadRejected,
+    UploadStore,
+)
+
+
+def jpeg(width=1024, height=768, size=200_000, metadata=()):
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 17, 8, height, width, 3)
+    # APPn segments (EXIF, ICC, ...) of the given payload sizes before the SOF
+    app = b"".join(
+        bytes([0xFF, 0xE1 + i % 15]) + struct.pack(">H", n + 2) + bytes(n)
+        for i, n in enumerate(metadata)
+    )
+    head = b"\xff\xd8" + app + sof + b"\x01\x22\x00" * 3 + b"\xff\xda"
+    return head + bytes(size - len(head))
+
+
+def chunks(data, size=16 * 1024):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestUploadSink:
+    """اختبارات تجزئة الرفع وحفظه على القرص"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.store = UploadStore(
+            self.dir, max_bytes=300_000, validator=ImageValidator()
+        )
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def leftovers(self):
+        return [p for p in self.dir.rglob("*") if p.is_file()]
+
+    def test_streamed_file_is_content_addressed(self):
+        """الملف يُحفظ باسم بصمته، ويُخزن مرة واحدة عند التكرار"""
+        data = jpeg()
+        for _ in range(2):
+            sink = self.store.begin()
+            for chunk in chunks(data):
+                sink.write(chunk)
+                assert len(sink._head) <= HEADER_BYTES
+            stored = sink.finish()
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert stored.path.read_bytes() == data
+        assert (stored.info.width, stored.info.height) == (1024, 768)
+        assert self.leftovers() == [stored.path]
+        assert cache_key(stored.image_id, "m", {}) == cache_key(data, "m", {})
+
+    def test_limit_enforced_mid_stream(self):
+        """تجاوز الحد يوقف الرفع ويحذف الملف الجزئي"""
+        sink = self.store.begin()
+        with pytest.raises(UploadRejected) as e:
+            for chunk in chunks(jpeg(size=400_000)):
+                sink.write(chunk)
+        assert e.value.status_code == 413
+        assert sink.size <= 300_000 + 16 * 1024
+        assert self.leftovers() == []
+
+    def test_metadata_past_header_buffer(self):
+        """بيانات EXIF/ICC الكبيرة قبل SOF لا تُرفض، وحدّها MAX_HEADER_BYTES"""
+        data = jpeg(metadata=(65533, 40_000))
+        assert data.index(b"\xff\xc0") > HEADER_BYTES
+        sink = self.store.begin()
+        for chunk in chunks(data):
+            sink.write(chunk)
+        assert sink.info is not None and sink.info.width == 1024
+        assert len(sink._head) == HEADER_BYTES
+        assert sink.finish().path.read_bytes() == data
+
+        store = UploadStore(self.dir, max_bytes=4 * MAX_HEADER_BYTES)
+        sink = store.begin()
+        with pytest.raises(UploadRejected) as e:
+            for chunk in chunks(jpeg(size=2 * MAX_HEADER_BYTES, metadata=[65533] * 20)):
+                sink.write(chunk)
+        assert (e.value.status_code, e.value.reason) == (422, "truncated")
+        assert sink.size <= MAX_HEADER_BYTES + 16 * 1024
+
+    def test_probes_past_buffer_are_logarithmic(self, monkeypatch):
+        """إعادة فحص الترويسات من الملف فقط كلما تضاعف الحجم"""
+        calls = []
+        real = uploads.check_header
+        monkeypatch.setattr(
+            uploads, "check_header", lambda *a, **k: calls.append(1) or real(*a, **k)
+        )
+        store = UploadStore(self.dir, max_bytes=4 * MAX_HEADER_BYTES)
+        data = jpeg(size=2 * MAX_HEADER_BYTES, metadata=[65533] * 15)
+        sink = store.begin()
+        for chunk in chunks(data, 4 * 1024):
+            sink.write(chunk)
+        assert sink.info is not None and sink.info.width == 1024
+        assert len(calls) <= HEADER_BYTES // (4 * 1024) + 6
+        sink.abort()
+
+    def test_bad_header_rejected_on_first_chunk(self):
+        """الترويسة غير الصالحة تُرفض من أول جزء"""
+        sink = self.store.begin()
+        with pytest.raises(UploadRejected) as e:
+            sink.write(jpeg(width=100, height=100)[:4096])
+        assert (e.value.status_code, e.value.reason) == (422, "too_small")
+        assert self.leftovers() == []
+
+
+class TestUploadEndpoint:
+    """اختبارات نقطة الرفع وربطها بطلب القياس الافتراضي"""
+
+    def setup_method(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.store = UploadStore(
+            self.dir, max_bytes=300_000, validator=ImageValidator()
+        )
+        self.client = TestClient(main.create_app())
+
+    def teardown_method(self):
+        shutil.rmtree(self.dir)
+
+    def test_multipart_and_raw_uploads(self, monkeypatch):
+        """رفع multipart وجسم خام يعطيان نفس المعرف"""
+        monkeypatch.setattr(main, "upload_store", self.store)
+        data = jpeg()
+        res = self.client.post(
+            "/api/v1/uploads",
+            files={"file": ("a.jpg", data, "image/jpeg")},
+            data={"note": "ignored"},
+        )
+        assert res.status_code == 201, res.text
+        body = res.json()
+        assert body["upload_id"] == hashlib.sha256(data).hexdigest()
+        assert (body["format"], body["width"], body["size"]) == (
+            "jpeg",
+            1024,
+            len(data),
+        )
+
+        raw = self.client.post(
+            "/api/v1/uploads", content=data, headers={"content-type": "image/jpeg"}
+        )
+        assert raw.json()["upload_id"] == body["upload_id"]
+
+    def test_rejections(self, monkeypatch):
+        """الحجم الكبير والصيغ غير المدعومة والحقل المفقود"""
+        monkeypatch.setattr(main, "upload_store", self.store)
+        post = self.client.post
+        big = post("/api/v1/uploads", files={"file": ("a.jpg", jpeg(size=400_000))})
+        gif = post("/api/v1/uploads", files={"file": ("a.gif", b"GIF89a" + bytes(99))})
+        missing = post("/api/v1/uploads", files={"other": ("a.jpg", jpeg())})
+        text = post(
+            "/api/v1/uploads", content=b"x", headers={"content-type": "text/plain"}
+        )
+        assert [r.status_code for r in (big, gif, missing, text)] == [
+            413,
+            415,
+            400,
+            415,
+        ]
+        assert gif.json()["detail"]["reason"] == "unsupported_format"
+        assert [p for p in self.dir.rglob("*") if p.is_file()] == []
+
+    def test_try_on_by_upload_id(self, monkeypatch):
+        """طلب القياس يستخدم معرف الرفع"""
+        monkeypatch.setattr(main, "upload_store", self.store)
+        monkeypatch.setattr(main, "SIMULATED_ERROR_RATE", 0.0)
+        upload_id = self.client.post(
+            "/api/v1/uploads", files={"file": ("a.jpg", jpeg())}
+        ).json()["upload_id"]
+
+        res = self.client.post("/api/v1/try-on", json={"upload_id": upload_id})
+        assert res.status_code in (200, 202)
+        unknown = self.client.post("/api/v1/try-on", json={"upload_id": "0" * 64})
+        assert unknown.status_code == 404
@@ -0,0 +1,193 @@
+# @Study:ST-013
+# @Study:ST-011
+# @Study:ST-007
+# @Study:ST-019
+#!/usr/bin/env python3
+"""
+قواعد الامتثال بمرور واحد على شجرة AST - Single-pass compliance rules
+
+Each file is decoded and parsed once; every rule registers the node types
+it wants and all rules share one ``ast.walk`` of the module. A new rule is
+a :class:`Rule` subclass added to :func:`default_rules`:
+
+    class NoAssert(Rule):
+        name, category, node_types = "no_assert", "quality", (ast.Assert,)
+
+        def start(self, ctx):
+            return {"asserts": []}
+
+        def visit(self, node, facts, ctx):
+            facts["asserts"].append(node.lineno)
+
+Facts are grouped by category ("quality", "security") and merged into the
+per-file dicts the checker aggregates.
+"""
+
+import ast
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class FileContext:
+    """ما تراه القواعد من ملف واحد"""
+
+    source: str
+    lines: List[str]
+    tree: Optional[ast.Module]
+    error: Optional[str] = None
+
+
+class Rule:
+    """قاعدة امتثال: معالجات لأنواع العقد في المرور المشترك"""
+
+    name = ""
+    category = "quality"
+    node_types: Tuple[type, ...] = ()
+
+    def start(self, ctx: FileContext) -> Dict[str, Any]:
+        return {}
+
+    def visit(self, node: ast.AST, facts: Dict[str, Any], ctx: FileContext) -> None:
+        pass
+
+    def finish(self, facts: Dict[str, Any], ctx: FileContext) -> Dict[str, Any]:
+        return facts
+
+
+class LineLengthRule(Rule):
+    """الأسطر الأطول من الحد"""
+
+    name = "line_length"
+
+    def __init__(self, limit: int = 88):
+        self.limit = limit
+
+    def start(self, ctx):
+        long_line_numbers = [
+            i for i, line in enumerate(ctx.lines, 1) if len(line) > self.limit
+        ]
+        return {
+            "lines": len(ctx.lines),
+            "long_lines": len(long_line_numbers),
+            "long_line_numbers": long_line_numbers,
+        }
+
+
+class DocstringRule(Rule):
+    """الدوال الموثقة"""
+
+    name = "docstrings"
+    node_types = (ast.FunctionDef,)
+
+    def start(self, ctx):
+        return {"functions": 0, "documented": 0}
+
+    def visit(self, node, facts, ctx):
+        facts["functions"] += 1
+        if ast.get_docstring(node):
+            facts["documented"] += 1
+
+
+class DangerousCallRule(Rule):
+    """استدعاءات eval/exec و input() بلا تحقق"""
+
+    name = "dangerous_calls"
+    category = "security"
+    node_types = (ast.Call,)
+    CALLS = {"eval": "eval", "exec": "exec", "input": "unvalidated_input"}
+
+    def start(self, ctx):
+        return {key: [] for key in self.CALLS.values()}
+
+    def visit(self, node, facts, ctx):
+        if isinstance(node.func, ast.Name) and node.func.id in self.CALLS:
+            facts[self.CALLS[node.func.id]].append(node.lineno)
+
+    def finish(self, facts, ctx):
+        if ctx.tree is None:
+            # Unparsable file: fall back to matching the call text per line
+            for name, key in self.CALLS.items():
+                facts[key] = [
+                    i for i, line in enumerate(ctx.lines, 1) if f"{name}(" in line
+                ]
+        if "validate" in ctx.source:
+            facts["unvalidated_input"] = []
+        for key in facts:
+            facts[key] = sorted(set(facts[key]))
+        return facts
+
+
+class SecurityLibraryRule(Rule):
+    """استخدام مكتبات التشفير والمصادقة"""
+
+    name = "security_libraries"
+    category = "security"
+
+    def start(self, ctx):
+        return {
+            "encryption": "bcrypt" in ctx.source or "cryptography" in ctx.source,
+            "authentication": "jwt" in ctx.source or "oauth" in ctx.source,
+        }
+
+
+def default_rules(line_length_limit: int = 88) -> List[Rule]:
+    return [
+        LineLengthRule(line_length_limit),
+        DocstringRule(),
+        DangerousCallRule(),
+        SecurityLibraryRule(),
+    ]
+
+
+class RuleSet:
+    """تشغيل جميع القواعد في مرور واحد لكل ملف"""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = list(rules)
+        self._dispatch: Dict[type, List[Rule]] = {}
+        for rule in self.rules:
+            for node_type in rule.node_types:
+                self._dispatch.setdefault(node_type, []).append(rule)
+
+    def run(self, source: str) -> Dict[str, Dict[str, Any]]:
+        """حقائق الملف مجمعة حسب الفئة"""
+        try:
+            tree: Optional[ast.Module] = ast.parse(source)
+            error = None
+        except SyntaxError as e:
+            tree, error = None, str(e)
+        ctx = FileContext(source, source.split("\n"), tree, error)
+
+        facts = {rule.name: rule.start(ctx) for rule in self.rules}
+        if tree is not None and self._dispatch:
+            dispatch = self._dispatch
+            for node in ast.walk(tree):
+                for rule in dispatch.get(type(node), ()):
+                    rule.visit(node, facts[rule.name], ctx)
+
+        out: Dict[str, Dict[str, Any]] = {}
+        for rule in self.rules:
+            out.setdefault(rule.category, {}).update(rule.finish(facts[rule.name], ctx))
+        if error is not None:
+            # Line counts of an unparsable file still count, as before
+            out.setdefault("quality", {})["error"] = error
+        return out
+
+
+_worker_rules: Dict[int, RuleSet] = {}
+
+
+def analyze_file(path: str, line_length_limit: int = 88) -> Dict[str, Any]:
+    """حقائق ملف واحد (قابلة للتشغيل في عملية منفصلة)"""
+    rules = _worker_rules.get(line_length_limit)
+    if rules is None:
+        rules = _worker_rules[line_length_limit] = RuleSet(
+            default_rules(line_length_limit)
+        )
+    try:
+        with open(path, "rb") as f:
+            source = f.read().decode("utf-8")
+    except Exception as e:
+        return {"quality": {"error": str(e)}, "security": {"error": str(e)}}
+    return rules.run(source)
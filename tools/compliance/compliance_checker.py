@@ -8,20 +8,51 @@
 يضمن الامتثال الكامل مع الدراسات والمعايير الفنية
 """
 
-import ast
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.compliance.ast_rules import analyze_file, default_rules
+from tools.governance.changes import (
+    ChangeSet,
+    changed_since,
+    changed_since_arg,
+    load_baseline,
+    merge_baseline,
+    save_baseline,
+)
+from tools.governance.scan_cache import ScanCache, fingerprint
+
+# حقائق كل ملف في ذاكرة الفحص المشتركة - per-file scan-cache facts
+FILE_FACTS = "compliance.file_facts"
+FACTS_VERSION = "3"
+BASELINE = "compliance"
+
+# عدد الملفات غير المخزنة الذي يبرر مجموعة العمليات
+POOL_MIN_FILES = 16
+
 
 class ComplianceChecker:
     """
     نظام فحص الامتثال الشامل والتلقائي
     """
 
-    def __init__(self):
-        self.project_root = Path(__file__).parent.parent
+    def __init__(self, changes: Optional[ChangeSet] = None):
+        self.project_root = ROOT
+        # وضع طلبات الدمج: فحص الملفات المتغيرة فقط ودمجها مع خط الأساس
+        self.changes = changes
+        self.baseline = load_baseline(BASELINE) if changes is not None else None
+        self.file_facts: Dict[str, Any] = {}
+        self.fresh_facts: Dict[str, Dict[str, Any]] = {}
+        self._merged_facts: Optional[Dict[str, Dict[str, Any]]] = None
         self.studies_path = self.project_root / "studies"
         self.src_path = self.project_root / "src"
         self.tests_path = self.project_root / "tests"
@@ -104,6 +135,8 @@ class ComplianceChecker:
         results["critical_issues"] = self.identify_critical_issues(
             results["categories"]
         )
+        if self.changes is not None:
+            results["changed_scope"] = self.changed_scope()
 
         # طباعة التقرير
         self.print_compliance_report(results)
@@ -327,13 +360,111 @@ class ComplianceChecker:
 
         return compliance
 
+    def _python_files(self) -> List[str]:
+        """ملفات Python في src (المتغيرة فقط في وضع --changed-since)"""
+        if self.changes is None:
+            return [
+                p.relative_to(self.project_root).as_posix()
+                for p in self.src_path.glob("**/*.py")
+            ]
+        prefix = self.src_path.relative_to(self.project_root).as_posix() + "/"
+        return [
+            rel
+            for rel in self.changes
+            if rel.startswith(prefix)
+            and rel.endswith(".py")
+            and (self.project_root / rel).is_file()
+        ]
+
+    def _analyze(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        تحليل الملفات غير المخزنة: قراءة وتحليل واحد لكل ملف، موزعة على
+        مجموعة عمليات عندما يكون عددها كبيراً
+        """
+        limit = self.compliance_rules["code_quality"]["line_length_limit"]
+        abs_paths = [str(self.project_root / rel) for rel in paths]
+        if len(paths) < POOL_MIN_FILES or (os.cpu_count() or 1) < 2:
+            results = [analyze_file(p, limit) for p in abs_paths]
+        else:
+            with ProcessPoolExecutor() as pool:
+                results = list(
+                    pool.map(
+                        analyze_file,
+                        abs_paths,
+                        [limit] * len(abs_paths),
+                        chunksize=max(1, len(paths) // (4 * (os.cpu_count() or 1))),
+                    )
+                )
+        return dict(zip(paths, results))
+
+    def _collect_facts(self) -> Dict[str, Dict[str, Any]]:
+        """
+        حقائق كل ملف مشتركة بين الفحوص: مسح كامل، أو الملفات المتغيرة مدموجة
+        مع آخر خط أساس. تُحسب مرة واحدة لكل تشغيل
+        """
+        if self._merged_facts is not None:
+            return self._merged_facts
+
+        version = fingerprint(
+            FACTS_VERSION,
+            self.compliance_rules["code_quality"]["line_length_limit"],
+            [(rule.name, type(rule).__name__) for rule in default_rules()],
+        )
+        with ScanCache(root=self.project_root) as cache:
+            entries = {rel: cache.entry(rel) for rel in self._python_files()}
+            fresh = {
+                rel: entry.get(FILE_FACTS, version) for rel, entry in entries.items()
+            }
+            missing = [rel for rel, facts in fresh.items() if facts is None]
+            for rel, facts in self._analyze(missing).items():
+                fresh[rel] = entries[rel].put(FILE_FACTS, version, facts)
+
+        self.fresh_facts = fresh
+        self.file_facts = {"version": version, "files": fresh}
+        merged = fresh
+        if self.changes is not None:
+            base = (self.baseline or {}).get(FILE_FACTS)
+            if base and base.get("version") == version:
+                merged = merge_baseline(base["files"], fresh, self.changes)
+        self._merged_facts = merged
+        return merged
+
+    def save_baseline(self) -> None:
+        """حفظ حقائق المسح الكامل كخط أساس لوضع --changed-since"""
+        save_baseline(BASELINE, {FILE_FACTS: self.file_facts}, root=self.project_root)
+
+    def changed_scope(self) -> Dict[str, Any]:
+        """المخالفات الواقعة على الأسطر المتغيرة فقط"""
+        limit = self.compliance_rules["code_quality"]["line_length_limit"]
+        messages = {
+            "long_line_numbers": f"line longer than {limit}",
+            "eval": "eval() call",
+            "exec": "exec() call",
+            "unvalidated_input": "unvalidated input()",
+        }
+        findings = []
+        for rel, by_category in sorted(self.fresh_facts.items()):
+            for facts in by_category.values():
+                for key, message in messages.items():
+                    for lineno in facts.get(key) or ():
+                        if self.changes.touches_line(rel, lineno):
+                            findings.append(f"{rel}:{lineno}: {message}")
+        return {
+            "ref": self.changes.ref,
+            "base": self.changes.base,
+            "files": len(self.changes),
+            "python_files": len(self._python_files()),
+            "baseline": self.baseline is not None,
+            "findings": sorted(findings),
+        }
+
     def check_code_quality(self) -> Dict[str, Any]:
         """فحص جودة الكود"""
         quality = {"score": 0, "metrics": {}}
 
         # فحص ملفات Python
-        python_files = list(self.src_path.glob("**/*.py"))
-        if not python_files:
+        all_facts = self._collect_facts()
+        if not all_facts:
             return quality
 
         total_lines = 0
@@ -341,31 +472,14 @@ class ComplianceChecker:
         documented_functions = 0
         total_functions = 0
 
-        for file_path in python_files:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    lines = content.split("\n")
-
-                # فحص طول الأسطر
-                for line in lines:
-                    if (
-                        len(line)
-                        > self.compliance_rules["code_quality"]["line_length_limit"]
-                    ):
-                        long_lines += 1
-                total_lines += len(lines)
-
-                # فحص التوثيق (بسيط)
-                tree = ast.parse(content)
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.FunctionDef):
-                        total_functions += 1
-                        if ast.get_docstring(node):
-                            documented_functions += 1
-
-            except Exception as e:
-                print(f"Error analyzing {file_path}: {e}")
+        for rel, by_category in sorted(all_facts.items()):
+            facts = by_category["quality"]
+            if "error" in facts:
+                print(f"Error analyzing {self.project_root / rel}: {facts['error']}")
+            total_lines += facts.get("lines", 0)
+            long_lines += facts.get("long_lines", 0)
+            total_functions += facts.get("functions", 0)
+            documented_functions += facts.get("documented", 0)
 
         # حساب المقاييس
         if total_lines > 0:
@@ -410,29 +524,28 @@ class ComplianceChecker:
         """فحص الأمان في الكود"""
         security = {"score": 0, "issues": [], "good_practices": []}
 
-        python_files = list(self.src_path.glob("**/*.py"))
-
-        for file_path in python_files:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                # فحص الممارسات السيئة
-                if "eval(" in content:
-                    security["issues"].append(f"eval() found in {file_path}")
-                if "exec(" in content:
-                    security["issues"].append(f"exec() found in {file_path}")
-                if "input(" in content and "validate" not in content:
-                    security["issues"].append(f"Unvalidated input() in {file_path}")
-
-                # فحص الممارسات الجيدة
-                if "bcrypt" in content or "cryptography" in content:
-                    security["good_practices"].append("Encryption library used")
-                if "jwt" in content or "oauth" in content:
-                    security["good_practices"].append("Authentication library used")
-
-            except Exception as e:
-                print(f"Error checking security in {file_path}: {e}")
+        all_facts = self._collect_facts()
+
+        for rel, by_category in sorted(all_facts.items()):
+            facts = by_category["security"]
+            file_path = self.project_root / rel
+            if "error" in facts:
+                print(f"Error checking security in {file_path}: {facts['error']}")
+                continue
+
+            # فحص الممارسات السيئة
+            if facts["eval"]:
+                security["issues"].append(f"eval() found in {file_path}")
+            if facts["exec"]:
+                security["issues"].append(f"exec() found in {file_path}")
+            if facts["unvalidated_input"]:
+                security["issues"].append(f"Unvalidated input() in {file_path}")
+
+            # فحص الممارسات الجيدة
+            if facts["encryption"]:
+                security["good_practices"].append("Encryption library used")
+            if facts["authentication"]:
+                security["good_practices"].append("Authentication library used")
 
         # حساب النتيجة
         if not security["issues"]:
@@ -744,6 +857,21 @@ class ComplianceChecker:
         for rec in results["recommendations"]:
             print(f"  • {rec}")
 
+        scope = results.get("changed_scope")
+        if scope is not None:
+            print()
+            print(
+                f"🔀 نطاق التغييرات منذ {scope['ref']}: "
+                f"{scope['files']} files, {scope['python_files']} in src"
+                + (
+                    ""
+                    if scope["baseline"]
+                    else " (no baseline, scores cover these only)"
+                )
+            )
+            for finding in scope["findings"]:
+                print(f"  • {finding}")
+
         print(f"\n{'='*80}")
 
         # رسالة التلخيص
@@ -757,8 +885,11 @@ class ComplianceChecker:
 
 def main():
     """الدالة الرئيسية"""
-    checker = ComplianceChecker()
+    ref = changed_since_arg()
+    checker = ComplianceChecker(changed_since(ref) if ref else None)
     results = checker.run_full_compliance_check()
+    if checker.changes is None:
+        checker.save_baseline()
 
     # حفظ النتائج في ملف
     output_file = (
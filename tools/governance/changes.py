@@ -0,0 +1,239 @@
+# @Study:ST-019
+#!/usr/bin/env python3
+"""
+Git-diff scope for ``--changed-since <ref>`` runs of the governance tools
+
+The changed-file set and, per file, the changed line numbers are computed
+once per process by streaming ``git diff -U0`` against the merge base of
+``<ref>`` and HEAD (working-tree changes and untracked files included).
+
+Per-file results of a full run can be saved as a baseline under
+governance/out/baselines/; a scoped run recomputes only the changed files
+and merges them over that baseline, so its totals match a full run.
+"""
+
+import functools
+import json
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.walker import DEFAULT_PRUNE, is_ignored, load_gitignore
+
+BASELINE_DIR = ROOT / "governance" / "out" / "baselines"
+
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+_ESCAPES = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13}
+# Fixed prefixes and raw UTF-8 paths whatever the user's git config says
+_DIFF = ["git", "-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff"]
+_DIFF += ["--src-prefix=a/", "--dst-prefix=b/", "-U0", "-M"]
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """Files changed since ``base``; ``None`` lines means the whole file"""
+
+    ref: str
+    base: str
+    files: Dict[str, Optional[FrozenSet[int]]] = field(default_factory=dict)
+    deleted: FrozenSet[str] = frozenset()
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self.files))
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def lines(self, path: str) -> Optional[FrozenSet[int]]:
+        """Changed line numbers of ``path`` (``None``: every line is new)"""
+        return self.files.get(path, frozenset())
+
+    def touches_line(self, path: str, lineno: int) -> bool:
+        if path not in self.files:
+            return False
+        lines = self.files[path]
+        return lines is None or lineno in lines
+
+    def walk(
+        self, root: str = ".", prune: Iterable[str] = DEFAULT_PRUNE
+    ) -> Iterator[str]:
+        """Existing changed files, filtered like :func:`walker.walk`"""
+        rules = load_gitignore(root)
+        for rel in self:
+            if os.path.isfile(os.path.join(root, rel)) and not is_ignored(
+                rel, rules, prune
+            ):
+                yield rel
+
+
+def _git(args: Sequence[str], root: Path) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=root, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def unquote(name: str) -> str:
+    """Undo git's C-style quoting of a path (returned as is if unquoted)"""
+    if len(name) < 2 or name[0] != '"' or name[-1] != '"':
+        return name
+    body, out, i = name[1:-1], bytearray(), 0
+    while i < len(body):
+        c = body[i]
+        if c != "\\" or i + 1 == len(body):
+            out += c.encode("utf-8")
+            i += 1
+        elif body[i + 1] in "01234567":
+            out.append(int(body[i + 1 : i + 4], 8) & 0xFF)
+            i += 4
+        else:
+            out.append(_ESCAPES.get(body[i + 1], ord(body[i + 1])))
+            i += 2
+    return out.decode("utf-8", errors="replace")
+
+
+def _header_path(field: str, prefix: str) -> Optional[str]:
+    """Path of a ``---``/``+++`` header (``None`` for /dev/null)"""
+    if field.endswith("\t") and not field.startswith('"'):
+        # Appended by git to names with spaces
+        field = field[:-1]
+    if field == "/dev/null":
+        return None
+    path = unquote(field)
+    return path[len(prefix) :] if path.startswith(prefix) else path
+
+
+def parse_diff(lines) -> "tuple[Dict[str, Optional[set]], set]":
+    """
+    Changed lines per file from a ``-U0`` unified diff, read line by line
+
+    Only added/modified lines of the new version are recorded; a file with
+    pure deletions is present with an empty set. Binary files count as
+    wholly changed. Paths quoted by git are unquoted.
+    """
+    files: Dict[str, Optional[set]] = {}
+    deleted: set = set()
+    old = new = None
+    # Between ``diff --git`` and the first ``@@``: hunk bodies may hold lines
+    # like ``--- x`` (a removed ``-- x``) that must not read as file headers
+    in_header = False
+    for raw in lines:
+        line = raw.rstrip("\n")
+        if line.startswith("diff --git "):
+            old = new = None
+            in_header = True
+        elif line.startswith("@@"):
+            in_header = False
+            m = _HUNK.match(line)
+            if m and new is not None and files.get(new) is not None:
+                start, count = int(m.group(1)), int(m.group(2) or 1)
+                files[new].update(range(start, start + count))
+        elif not in_header:
+            continue
+        elif line.startswith("rename from "):
+            deleted.add(unquote(line[len("rename from ") :]))
+        elif line.startswith("rename to "):
+            new = unquote(line[len("rename to ") :])
+            files.setdefault(new, set())
+        elif line.startswith("--- "):
+            old = _header_path(line[len("--- ") :], "a/")
+        elif line.startswith("+++ "):
+            new = _header_path(line[len("+++ ") :], "b/")
+            if new is None:
+                if old is not None:
+                    deleted.add(old)
+            else:
+                files.setdefault(new, set())
+        elif line.startswith("Binary files ") and line.endswith(" differ"):
+            target = line.rsplit(" and ", 1)[1][: -len(" differ")]
+            if target != "/dev/null":
+                files[_header_path(target, "b/")] = None
+    return files, deleted
+
+
+@functools.lru_cache(maxsize=None)
+def changed_since(ref: str, root: Path = ROOT) -> ChangeSet:
+    """Changes between the merge base of ``ref``/HEAD and the working tree"""
+    root = Path(root)
+    try:
+        base = _git(["merge-base", ref, "HEAD"], root)
+    except subprocess.CalledProcessError:
+        base = ref
+    proc = subprocess.Popen(
+        [*_DIFF, base],
+        cwd=root,
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    try:
+        files, deleted = parse_diff(proc.stdout)
+    finally:
+        proc.stdout.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"git diff {base} failed")
+    untracked = _git(["ls-files", "-z", "--others", "--exclude-standard"], root)
+    for path in untracked.split("\0"):
+        if path:
+            files[path] = None
+    return ChangeSet(
+        ref=ref,
+        base=base,
+        files={p: (None if s is None else frozenset(s)) for p, s in files.items()},
+        deleted=frozenset(deleted - set(files)),
+    )
+
+
+def changed_since_arg(argv: Optional[List[str]] = None) -> Optional[str]:
+    """``--changed-since REF`` / ``--changed-since=REF`` from the command line"""
+    argv = sys.argv[1:] if argv is None else argv
+    for i, arg in enumerate(argv):
+        if arg.startswith("--changed-since="):
+            return arg.split("=", 1)[1]
+        if arg == "--changed-since" and i + 1 < len(argv):
+            return argv[i + 1]
+    return None
+
+
+def load_baseline(name: str) -> Optional[Dict[str, Any]]:
+    """Results saved by the last full run of tool ``name`` (``None`` if absent)"""
+    try:
+        payload = json.loads((BASELINE_DIR / f"{name}.json").read_text("utf-8"))
+    except (OSError, ValueError):
+        return None
+    return payload.get("results")
+
+
+def save_baseline(name: str, results: Dict[str, Any], root: Path = ROOT) -> None:
+    try:
+        head = _git(["rev-parse", "HEAD"], root)
+    except (OSError, subprocess.CalledProcessError):
+        head = None
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    (BASELINE_DIR / f"{name}.json").write_text(
+        json.dumps({"head": head, "results": results}, sort_keys=True), "utf-8"
+    )
+
+
+def merge_baseline(
+    baseline: Dict[str, Any], fresh: Dict[str, Any], changes: ChangeSet
+) -> Dict[str, Any]:
+    """Baseline per-file results with changed files replaced and deleted dropped"""
+    merged = {
+        p: v
+        for p, v in baseline.items()
+        if p not in changes.deleted and p not in changes
+    }
+    merged.update(fresh)
+    return merged
@@ -0,0 +1,68 @@
+# @Study:ST-019
+#!/usr/bin/env python3
+"""
+Streaming, parallel SHA-256 of files for the governance tools
+
+Files are hashed without being loaded into memory: small files through a
+reused read buffer, large ones through a read-only mmap handed to hashlib
+in one call. hashlib releases the GIL while digesting, so a thread pool
+keeps several disks/cores busy and hashing a registry becomes I/O-bound.
+
+Incremental reuse (skip files whose inode, size and mtime are unchanged)
+lives in :meth:`ScanCache.sha256_many`, which builds on these helpers.
+"""
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+CHUNK_SIZE = 1 << 20
+MMAP_THRESHOLD = 8 << 20
+
+
+def sha256_file(path: "os.PathLike[str] | str") -> str:
+    """Hex SHA-256 of a file's bytes, read as a stream"""
+    h = hashlib.sha256()
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+            return h.hexdigest()
+        buf = bytearray(CHUNK_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def _try_sha256(path) -> Optional[str]:
+    try:
+        return sha256_file(path)
+    except OSError:
+        return None
+
+
+def default_workers() -> int:
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def sha256_files(
+    paths: Iterable["os.PathLike[str] | str"], workers: Optional[int] = None
+) -> Dict[str, Optional[str]]:
+    """
+    ``{path: sha256}`` for many files hashed concurrently
+
+    Unreadable files map to ``None``; keys keep the input order.
+    """
+    paths = [os.fspath(p) for p in paths]
+    workers = default_workers() if workers is None else workers
+    if workers <= 1 or len(paths) <= 1:
+        return {p: _try_sha256(p) for p in paths}
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return dict(zip(paths, pool.map(_try_sha256, paths)))
@@ -0,0 +1,276 @@
+# @Study:ST-019
+#!/usr/bin/env python3
+"""
+Persistent per-file scan cache shared by the governance tools
+
+Derived facts (``@Study`` tags, keyword hits, line counts, AST metrics,
+security findings, ...) are stored in SQLite under governance/out/, keyed
+by the file's path and validated against its size, mtime and inode; when
+those changed but the SHA-256 of the content did not (checkout, touch),
+the facts are kept. A tool only reads files whose facts are missing or stale:
+
+    with ScanCache() as cache:
+        for rel in walk("."):
+            entry = cache.entry(rel)
+            tags = entry.get("tagger.head_tags", version)
+            if tags is None:
+                tags = entry.put("tagger.head_tags", version, parse(entry.text()))
+
+``version`` fingerprints whatever the fact depends on besides the file
+(analyzer revision, rule files), so changing a rule re-derives its facts.
+Set ``GOVERNANCE_SCAN_CACHE=off`` to run without a cache file.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.hashing import sha256_file, sha256_files
+
+DEFAULT_PATH = ROOT / "governance" / "out" / "scan_cache.sqlite"
+
+# Bumped whenever the tables change; older cache files are rebuilt
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS facts (
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (path, kind)
+);
+"""
+
+
+def fingerprint(*parts: Any) -> str:
+    """Short stable hash of JSON-serialisable inputs (for fact versions)"""
+    blob = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+class Entry:
+    """One file as seen by this run; content is read at most once"""
+
+    __slots__ = ("cache", "path", "abs_path", "stat", "_fresh", "_data", "_sha")
+
+    def __init__(self, cache: "ScanCache", path: str, stat: Optional[Tuple[int, ...]]):
+        self.cache = cache
+        self.path = path
+        self.abs_path = cache.root / path
+        self.stat = stat
+        row = cache._files.get(path)
+        # None = undecided until a fact is requested
+        self._fresh: Optional[bool] = (
+            True if row is not None and stat is not None and row[:3] == stat else None
+        )
+        self._data: Optional[bytes] = None
+        self._sha: Optional[str] = row[3] if self._fresh else None
+
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = self.abs_path.read_bytes()
+        return self._data
+
+    def text(self) -> str:
+        return self.data().decode("utf-8", errors="ignore")
+
+    def sha256(self) -> str:
+        if self._sha is None:
+            if self._data is not None:
+                self._sha = hashlib.sha256(self._data).hexdigest()
+            else:
+                # Hashing alone never needs the content in memory
+                self._sha = sha256_file(self.abs_path)
+        return self._sha
+
+    def _validate(self) -> None:
+        # Decided once per entry: either the stored facts describe the
+        # current content, or they are dropped before anything is re-derived
+        if self._fresh is None:
+            row = self.cache._files.get(self.path)
+            try:
+                same = self.sha256() == (row[3] if row is not None else None)
+            except OSError:
+                same = False
+            if not same:
+                self.cache._invalidate(self.path)
+            if self.stat is not None and self._sha is not None:
+                self.cache._record(self.path, self.stat, self._sha)
+            self._fresh = True
+
+    def get(self, kind: str, version: str) -> Optional[Any]:
+        """Cached fact, or ``None`` if missing, stale or from another version"""
+        self._validate()
+        hit = self.cache._facts(kind).get(self.path)
+        if hit is None or hit[0] != version:
+            return None
+        self.cache.hits += 1
+        return json.loads(hit[1])
+
+    def put(self, kind: str, version: str, value: Any) -> Any:
+        """Store a fact derived from the current content and return it"""
+        self._validate()
+        self.cache.misses += 1
+        self.cache._store(self.path, kind, version, value)
+        return value
+
+
+class ScanCache:
+    """
+    SQLite-backed store of per-file facts
+
+    All rows a run needs are loaded with one query per table/kind and
+    writes are batched into a single transaction on :meth:`close`, so an
+    unchanged tree costs one ``stat`` and one dict lookup per file.
+    """
+
+    def __init__(self, path: Optional[os.PathLike] = None, root: Path = ROOT):
+        if path is None:
+            path = os.getenv("GOVERNANCE_SCAN_CACHE") or DEFAULT_PATH
+        if str(path).lower() in {"off", "0", "false", ":memory:"}:
+            path = ":memory:"
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(str(path), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self._db:
+                self._db.execute("DROP TABLE IF EXISTS files")
+                self._db.execute("DROP TABLE IF EXISTS facts")
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+        self._files: Dict[str, Tuple[int, int, int, str]] = {
+            p: (size, mtime, ino, sha)
+            for p, size, mtime, ino, sha in self._db.execute(
+                "SELECT path, size, mtime_ns, ino, sha256 FROM files"
+            )
+        }
+        self._loaded: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self._dirty_files: Dict[str, Tuple[int, int, int, str]] = {}
+        self._dirty_facts: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._stale: set = set()
+
+    def __enter__(self) -> "ScanCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def key(self, path: os.PathLike) -> str:
+        """
+        Cache key of ``path``: posix and relative to the cache root
+
+        Relative paths are taken as relative to the root already; callers
+        holding cwd-relative paths pass them absolute, so every tool keys a
+        file the same way wherever it is run from.
+        """
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        return Path(path).as_posix()
+
+    def entry(self, path: os.PathLike) -> Entry:
+        """``path`` as accepted by :meth:`key`"""
+        path = self.key(path)
+        try:
+            st = os.stat(self.root / path)
+            stat: Optional[Tuple[int, ...]] = (st.st_size, st.st_mtime_ns, st.st_ino)
+        except OSError:
+            stat = None
+        return Entry(self, path, stat)
+
+    def sha256(self, path: os.PathLike) -> Optional[str]:
+        """Content hash of ``path`` (``None`` if unreadable), read only if changed"""
+        entry = self.entry(path)
+        entry._validate()
+        return entry._sha
+
+    def sha256_many(
+        self, paths: Iterable[os.PathLike], workers: Optional[int] = None
+    ) -> Dict[os.PathLike, Optional[str]]:
+        """
+        :meth:`sha256` for many paths (keyed as given); only files whose size,
+        mtime or inode changed are hashed, concurrently and without loading
+        them in memory
+        """
+        paths = list(paths)
+        entries = [self.entry(p) for p in paths]
+        todo = [e for e in entries if e._fresh is None and e.stat is not None]
+        hashes = sha256_files([e.abs_path for e in todo], workers)
+        for e in todo:
+            e._sha = hashes[os.fspath(e.abs_path)]
+        out = {}
+        for p, e in zip(paths, entries):
+            e._validate()
+            out[p] = e._sha
+        return out
+
+    def _facts(self, kind: str) -> Dict[str, Tuple[str, str]]:
+        facts = self._loaded.get(kind)
+        if facts is None:
+            facts = self._loaded[kind] = {
+                p: (v, d)
+                for p, v, d in self._db.execute(
+                    "SELECT path, version, data FROM facts WHERE kind = ?", (kind,)
+                )
+                if p not in self._stale
+            }
+        return facts
+
+    def _record(self, path: str, stat: Tuple[int, ...], sha: str) -> None:
+        row = (*stat, sha)
+        self._files[path] = row
+        self._dirty_files[path] = row
+
+    def _invalidate(self, path: str) -> None:
+        self._stale.add(path)
+        for facts in self._loaded.values():
+            facts.pop(path, None)
+        for key in [k for k in self._dirty_facts if k[0] == path]:
+            del self._dirty_facts[key]
+
+    def _store(self, path: str, kind: str, version: str, value: Any) -> None:
+        data = json.dumps(value, sort_keys=True)
+        self._facts(kind)[path] = (version, data)
+        self._dirty_facts[(path, kind)] = (version, data)
+
+    def flush(self) -> None:
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM facts WHERE path = ?", [(p,) for p in self._stale]
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                [(p, *row) for p, row in self._dirty_files.items()],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?)",
+                [(p, k, v, d) for (p, k), (v, d) in self._dirty_facts.items()],
+            )
+        self._stale.clear()
+        self._dirty_files.clear()
+        self._dirty_facts.clear()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._db.close()
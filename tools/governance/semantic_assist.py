@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
 
+import os
 import pathlib
 import re
 import sys
 import yaml
 
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.changes import changed_since, changed_since_arg
+from tools.governance.scan_cache import ScanCache, fingerprint
+from tools.governance.walker import DEFAULT_PRUNE, walk
+
+# Scan-cache fact: studies whose keywords occur in a file
+KEYWORD_HITS = "semantic_assist.keyword_hits"
+KEYWORD_HITS_VERSION = "1"
+
+# CI workflows are never tagged (the old ``".git" in path`` test skipped them)
+PRUNE = DEFAULT_PRUNE | {".github"}
+
 COMMENT = {
     ".py": "#",
     ".js": "//",
@@ -45,37 +61,158 @@ def apply_tag(path: pathlib.Path, st: str, apply=False):
     return True
 
 
-root = pathlib.Path(".")
-rules = yaml.safe_load(pathlib.Path("governance/studies/boost_rules.yaml").read_text())[
-    "rules"
-]
-apply = "--apply" in sys.argv
-limit = 200
+class KeywordMatcher:
+    """
+    All keywords of all studies in one case-insensitive automaton
 
-for st, cfg in rules.items():
-    kws = [re.compile(re.escape(k), re.I) for k in cfg.get("keywords", [])]
-    matches = []
-    for p in root.rglob("*"):
-        if not p.is_file() or ".git" in p.as_posix():
-            continue
+    The keywords are folded into a trie-shaped regex, so the cost per text
+    position is bounded by the keyword length rather than the number of
+    keywords. A zero-width lookahead reports the longest keyword starting
+    at every position, and each keyword also credits the shorter keywords
+    it contains ("roadmap v2" is also "roadmap"), so overlapping and nested
+    hits are all found in a single pass.
+    """
+
+    def __init__(self, keywords_by_study):
+        owners = {}
+        for st, kws in keywords_by_study.items():
+            for k in kws:
+                if k:
+                    owners.setdefault(k.lower(), set()).add(st)
+        self.studies = list(keywords_by_study)
+        trie = _build_trie(owners)
+        # keyword -> studies of every keyword it contains (itself included)
+        self._credits = {k: frozenset(_contained(trie, k, owners)) for k in owners}
+        self._regex = re.compile(f"(?=({_trie_regex(trie)}))", re.I) if owners else None
+
+    def studies_in(self, text, wanted=None):
+        """Studies with a keyword in ``text``; stops once ``wanted`` are all hit"""
+        found = set()
+        if self._regex is None:
+            return found
+        wanted = set(self.studies if wanted is None else wanted)
+        for m in self._regex.finditer(text):
+            credits = self._credits.get(m.group(1).lower())
+            if credits is None:
+                # Case folding changed the match's spelling; resolve it slowly
+                credits = {
+                    st
+                    for k, sts in self._credits.items()
+                    if re.fullmatch(re.escape(k), m.group(1), re.I)
+                    for st in sts
+                }
+            found |= credits
+            if wanted <= found:
+                break
+        return found
+
+
+def _build_trie(words):
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = w
+    return trie
+
+
+def _contained(trie, word, owners):
+    """Studies of every keyword occurring inside ``word``"""
+    studies = set()
+    for i in range(len(word)):
+        node = trie
+        for ch in word[i:]:
+            node = node.get(ch)
+            if node is None:
+                break
+            if "" in node:
+                studies |= owners[node[""]]
+    return studies
+
+
+def _trie_regex(node):
+    """Regex for a trie: one branch per next character, longest match first"""
+    branches = [
+        re.escape(ch) + _trie_regex(child)
+        for ch, child in sorted((k, v) for k, v in node.items() if k)
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # A keyword ends here: greedily try the longer ones, else stop
+        return f"(?:{body})?"
+    return body
+
+
+def scan(rules, root=".", limit=200, cache=None, changes=None):
+    """
+    One pass over the tree: each candidate file is read once and matched
+    against every study's keywords; each study keeps its first ``limit``
+    files. With a :class:`ScanCache` unchanged files are not read at all; with a ``ChangeSet`` only changed files are seen.
+    """
+    keywords = {st: cfg.get("keywords", []) for st, cfg in rules.items()}
+    matcher = KeywordMatcher(keywords)
+    version = fingerprint(KEYWORD_HITS_VERSION, keywords)
+    matches = {st: [] for st in rules}
+    open_studies = set(rules)
+    tree = walk(root, PRUNE) if changes is None else changes.walk(root, PRUNE)
+    for rel in tree:
+        if not open_studies:
+            break
+        p = pathlib.Path(root, rel)
         if p.suffix.lower() not in COMMENT:
             continue
-        try:
-            txt = p.read_text(encoding="utf-8", errors="ignore")
-        except:
-            continue
-        if any(k.search(txt) for k in kws):
-            matches.append(p)
-            if len(matches) >= limit:
-                break
-    touched = 0
-    for m in matches:
-        changed = apply_tag(m, st, apply=apply)
-        if changed:
-            touched += 1
-    print(
-        f"{'APPLY' if apply else 'DRY'} | {st} | candidates={len(matches)} | tagged={touched}"
-    )
+        if cache is None:
+            try:
+                txt = p.read_text(encoding="utf-8", errors="ignore")
+            except:
+                continue
+            hits = matcher.studies_in(txt, open_studies)
+        else:
+            entry = cache.entry(os.path.abspath(p))
+            hits = entry.get(KEYWORD_HITS, version)
+            if hits is None:
+                try:
+                    txt = entry.text()
+                except:
+                    continue
+                # Every study, not just the open ones, so the fact is complete
+                hits = entry.put(KEYWORD_HITS, version, sorted(matcher.studies_in(txt)))
+        for st in sorted(set(hits) & open_studies):
+            matches[st].append(p)
+            if len(matches[st]) >= limit:
+                open_studies.discard(st)
+    return matches
+
+
+def main():
+    rules = yaml.safe_load(
+        pathlib.Path("governance/studies/boost_rules.yaml").read_text()
+    )["rules"]
+    apply = "--apply" in sys.argv
+    ref = changed_since_arg()
+    changes = changed_since(ref) if ref else None
+    limit = 200
+
+    with ScanCache() as cache:
+        found = scan(rules, limit=limit, cache=cache, changes=changes)
+    for st, matches in found.items():
+        touched = 0
+        for m in matches:
+            changed = apply_tag(m, st, apply=apply)
+            if changed:
+                touched += 1
+        print(
+            f"{'APPLY' if apply else 'DRY'} | {st} | candidates={len(matches)} | tagged={touched}"
+        )
+
+    if changes is not None:
+        print(f"Scoped to {len(changes)} files changed since {ref}")
+    if not apply:
+        print("Run with --apply to write changes.")
+
 
-if not apply:
-    print("Run with --apply to write changes.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# @Study:ST-019
+#!/usr/bin/env python3
+"""
+Inverted @Study index: study -> files and file -> studies
+
+Built from the header tags ``tagger.py`` writes, reusing the tagger's
+scan-cache facts, so a refresh only reads files that changed. The result
+is saved to governance/out/study_index.json; ``--cached`` answers from
+that file without touching the tree.
+
+    python3 tools/governance/study_index.py files ST-011
+    python3 tools/governance/study_index.py studies src/backend/main.py
+    python3 tools/governance/study_index.py untagged src/
+    python3 tools/governance/study_index.py orphans
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import sys
+from typing import Dict, Iterable, List, Optional
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.scan_cache import ScanCache
+from tools.governance.tagger import COMMENT, HEAD_TAGS, HEAD_TAGS_VERSION, head_tags
+from tools.governance.walker import walk
+
+INDEX_PATH = ROOT / "governance" / "out" / "study_index.json"
+REGISTRY = ROOT / "governance" / "studies" / "registry.json"
+
+# Tagged files that document rather than implement a study
+DOC_SUFFIXES = {".md", ".txt"}
+
+
+class StudyIndex:
+    """Both directions of the file <-> study relation, kept in memory"""
+
+    def __init__(self, files: Dict[str, List[str]]):
+        self.files = files
+        self.studies: Dict[str, List[str]] = {}
+        for path in sorted(files):
+            for st in files[path]:
+                self.studies.setdefault(st, []).append(path)
+
+    @classmethod
+    def build(cls, root: str = ".", cache: Optional[ScanCache] = None) -> "StudyIndex":
+        """Index every taggable file; with a cache only changed files are read"""
+        files = {}
+        for rel in walk(root):
+            if pathlib.PurePosixPath(rel).suffix.lower() not in COMMENT:
+                continue
+            if cache is None:
+                try:
+                    txt = pathlib.Path(root, rel).read_text("utf-8", errors="ignore")
+                except OSError:
+                    continue
+                files[rel] = head_tags(txt)
+                continue
+            entry = cache.entry(os.path.join(os.path.abspath(root), rel))
+            tags = entry.get(HEAD_TAGS, HEAD_TAGS_VERSION)
+            if tags is None:
+                try:
+                    txt = entry.text()
+                except OSError:
+                    continue
+                tags = entry.put(HEAD_TAGS, HEAD_TAGS_VERSION, head_tags(txt))
+            files[rel] = tags
+        return cls(files)
+
+    @classmethod
+    def load(cls, path: pathlib.Path = INDEX_PATH) -> "StudyIndex":
+        return cls(json.loads(pathlib.Path(path).read_text("utf-8"))["files"])
+
+    def save(self, path: pathlib.Path = INDEX_PATH) -> None:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"files": self.files}, sort_keys=True), "utf-8")
+
+    def files_for(self, study: str) -> List[str]:
+        return self.studies.get(study, [])
+
+    def studies_for(self, path: str) -> List[str]:
+        return self.files.get(path, [])
+
+    def code_files_for(self, study: str) -> List[str]:
+        return [p for p in self.files_for(study) if not is_doc(p)]
+
+    def untagged(self, prefix: str = "") -> List[str]:
+        return sorted(
+            p for p, sts in self.files.items() if not sts and p.startswith(prefix)
+        )
+
+    def orphans(self, study_ids: Iterable[str]) -> List[str]:
+        """Studies no code file is tagged with"""
+        return [st for st in study_ids if not self.code_files_for(st)]
+
+
+def is_doc(path: str) -> bool:
+    return pathlib.PurePosixPath(path).suffix.lower() in DOC_SUFFIXES
+
+
+def registry_ids(path: pathlib.Path = REGISTRY) -> List[str]:
+    studies = json.loads(pathlib.Path(path).read_text("utf-8")).get("studies", [])
+    return [s["id"] for s in studies if s.get("id")]
+
+
+def refresh(root: str = ".") -> StudyIndex:
+    """Incrementally rebuild the index and save it"""
+    with ScanCache() as cache:
+        index = StudyIndex.build(root, cache)
+    index.save()
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--cached", action="store_true", help="query the saved index, no refresh"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("files", help="files tagged with a study").add_argument("study")
+    sub.add_parser("studies", help="studies a file is tagged with").add_argument("path")
+    sub.add_parser("untagged", help="taggable files without tags").add_argument(
+        "prefix", nargs="?", default=""
+    )
+    sub.add_parser("orphans", help="registry studies with no tagged code")
+    args = parser.parse_args(argv)
+
+    index = StudyIndex.load() if args.cached else refresh()
+
+    if args.command == "files":
+        rows = index.files_for(args.study)
+    elif args.command == "studies":
+        rows = index.studies_for(pathlib.PurePath(args.path).as_posix())
+    elif args.command == "untagged":
+        rows = index.untagged(args.prefix)
+    else:
+        rows = index.orphans(registry_ids())
+    for row in rows:
+        print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
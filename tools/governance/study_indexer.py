@@ -6,13 +6,30 @@
 
 # Study Indexer: Automatically populate registry.json with existing studies
 
-import json, hashlib, pathlib, re
+import json, os, pathlib, re, sys
 from datetime import date
 
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.hashing import sha256_file
+from tools.governance.scan_cache import ScanCache
+
+# Scan-cache fact: title and content hash of a study file
+STUDY_FACTS = "study_indexer.study"
+STUDY_FACTS_VERSION = "2"
+
 
 def index_studies():
     """Index all studies and populate registry.json"""
 
+    with ScanCache() as cache:
+        _index_studies(cache)
+
+
+def _index_studies(cache=None):
+
     root = pathlib.Path(".")
     studies_dir = root / "studies"
 
@@ -20,8 +37,7 @@ def index_studies():
         print("❌ Studies directory not found")
         return
 
-    studies = []
-    study_id = 1
+    found = []
 
     # Index master studies
     master_dir = studies_dir / "master_studies"
@@ -33,9 +49,7 @@ def index_studies():
                 "DEVELOPMENT_ROADMAP.md",
                 "BUSINESS_ANALYSIS.md",
             ]:
-                study = create_study_entry(file_path, f"ST-{study_id:03d}", "master")
-                studies.append(study)
-                study_id += 1
+                found.append((file_path, "master"))
 
     # Index business analysis
     biz_dir = studies_dir / "business_analysis"
@@ -45,35 +59,27 @@ def index_studies():
                 "market" in file_path.name.lower()
                 or "operational" in file_path.name.lower()
             ):
-                study = create_study_entry(file_path, f"ST-{study_id:03d}", "business")
-                studies.append(study)
-                study_id += 1
-
-    # Index technical specs
-    tech_dir = studies_dir / "technical_specs"
-    if tech_dir.exists():
-        for file_path in sorted(tech_dir.glob("*.md")):
-            study = create_study_entry(file_path, f"ST-{study_id:03d}", "technical")
-            studies.append(study)
-            study_id += 1
-
-    # Index implementation phases
-    impl_dir = studies_dir / "implementation_phases"
-    if impl_dir.exists():
-        for file_path in sorted(impl_dir.glob("*.md")):
-            study = create_study_entry(
-                file_path, f"ST-{study_id:03d}", "implementation"
-            )
-            studies.append(study)
-            study_id += 1
-
-    # Index compliance
-    comp_dir = studies_dir / "compliance_governance"
-    if comp_dir.exists():
-        for file_path in sorted(comp_dir.glob("*.md")):
-            study = create_study_entry(file_path, f"ST-{study_id:03d}", "compliance")
-            studies.append(study)
-            study_id += 1
+                found.append((file_path, "business"))
+
+    # Index technical specs, implementation phases and compliance
+    for dirname, category in [
+        ("technical_specs", "technical"),
+        ("implementation_phases", "implementation"),
+        ("compliance_governance", "compliance"),
+    ]:
+        sub_dir = studies_dir / dirname
+        if sub_dir.exists():
+            for file_path in sorted(sub_dir.glob("*.md")):
+                found.append((file_path, category))
+
+    # Hash every changed study up front, concurrently
+    if cache is not None:
+        cache.sha256_many(os.path.abspath(file_path) for file_path, _ in found)
+
+    studies = [
+        create_study_entry(file_path, f"ST-{i:03d}", category, cache)
+        for i, (file_path, category) in enumerate(found, 1)
+    ]
 
     # Save registry
     registry = {"version": date.today().isoformat(), "studies": studies}
@@ -86,22 +92,18 @@ def index_studies():
     print(f"📄 Registry saved: {registry_file}")
 
 
-def create_study_entry(file_path: pathlib.Path, study_id: str, category: str) -> dict:
-    """Create a study entry from file path"""
+def create_study_entry(
+    file_path: pathlib.Path, study_id: str, category: str, cache=None
+) -> dict:
+    """Create a study entry from file path (re-read only if it changed)"""
 
-    # Read file content
-    content = file_path.read_text(encoding="utf-8")
-
-    # Extract title from first heading
-    title_match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
-    title = (
-        title_match.group(1).strip()
-        if title_match
-        else file_path.stem.replace("_", " ")
-    )
-
-    # Calculate SHA256
-    sha256 = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    entry = cache.entry(os.path.abspath(file_path)) if cache is not None else None
+    facts = entry.get(STUDY_FACTS, STUDY_FACTS_VERSION) if entry else None
+    if facts is None:
+        facts = read_study(file_path, entry.sha256() if entry else None)
+        if entry is not None:
+            entry.put(STUDY_FACTS, STUDY_FACTS_VERSION, facts)
+    title, sha256 = facts["title"], facts["sha256"]
 
     # Determine owners and areas based on category
     owners_map = {
@@ -131,5 +133,26 @@ def create_study_entry(file_path: pathlib.Path, study_id: str, category: str) ->
     }
 
 
+def read_study(file_path: pathlib.Path, sha256: str = None) -> dict:
+    """Title and SHA256 of a study file, without loading it whole"""
+
+    # Extract title from first heading
+    title = None
+    with open(file_path, encoding="utf-8") as f:
+        for line in f:
+            title_match = re.match(r"#\s+(.+)$", line.rstrip("\n"))
+            if title_match:
+                title = title_match.group(1).strip()
+                break
+    if title is None:
+        title = file_path.stem.replace("_", " ")
+
+    # Calculate SHA256 of the file's bytes
+    if sha256 is None:
+        sha256 = sha256_file(file_path)
+
+    return {"title": title, "sha256": sha256}
+
+
 if __name__ == "__main__":
     index_studies()
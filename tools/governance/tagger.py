@@ -1,11 +1,23 @@
 # @Study:ST-019
 #!/usr/bin/env python3
 
+import os
 import sys
 import re
 import yaml
 import pathlib
-import fnmatch
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.changes import changed_since, changed_since_arg
+from tools.governance.scan_cache import ScanCache
+from tools.governance.walker import GlobMatcher, walk
+
+# Scan-cache fact: @Study ids in a file's first 25 lines
+HEAD_TAGS = "tagger.head_tags"
+HEAD_TAGS_VERSION = "1"
 
 COMMENT = {
     ".py": "#",
@@ -34,15 +46,21 @@ def comment_line(suffix, text):
     return f"{c} {text}"
 
 
-def ensure_tag(path, studies, apply=False):
+def head_tags(txt):
+    head = "\n".join(txt.splitlines()[:25])
+    return sorted(set(re.findall(r"@Study:(ST-\d{3})", head)))
+
+
+def ensure_tag(path, studies, apply=False, txt=None):
     suf = path.suffix.lower()
     tag = " ".join([f"@Study:{s}" for s in studies])
     header = comment_line(suf, tag)
 
-    try:
-        txt = path.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
-        return False, "skip(read)"
+    if txt is None:
+        try:
+            txt = path.read_text(encoding="utf-8", errors="ignore")
+        except Exception:
+            return False, "skip(read)"
 
     lines = txt.splitlines()
     head = "\n".join(lines[:25])
@@ -87,33 +105,58 @@ def load_map():
     return cfg.get("patterns", [])
 
 
-def match_files(glob):
-    root = pathlib.Path(".")
-    for p in root.rglob("*"):
-        if p.is_file() and not any(seg.startswith(".git") for seg in p.parts):
-            try:
-                if fnmatch.fnmatch(str(p).replace("\\", "/"), glob):
-                    yield p
-            except Exception:
-                continue
+def match_files(patterns, root=".", changes=None):
+    """
+    Yield ``(path, studies)`` for every file matched by any rule
+
+    One walk for all rules: each file is visited once and gets the union of
+    the studies of every rule whose glob matches it, in rule order. With a
+    :class:`~tools.governance.changes.ChangeSet` only its files are visited.
+    """
+    matcher = GlobMatcher([rule["glob"] for rule in patterns])
+    for rel in walk(root) if changes is None else changes.walk(root):
+        if pathlib.PurePosixPath(rel).suffix.lower() not in COMMENT:
+            continue
+        hits = matcher.match(rel)
+        if not hits:
+            continue
+        studies = []
+        for i in hits:
+            for st in patterns[i]["studies"]:
+                if st not in studies:
+                    studies.append(st)
+        yield pathlib.Path(root, rel), studies
 
 
 def main():
     apply = "--apply" in sys.argv
+    ref = changed_since_arg()
+    changes = changed_since(ref) if ref else None
     patterns = load_map()
     touched = 0
 
-    for rule in patterns:
-        glb = rule["glob"]
-        studies = rule["studies"]
-        for f in match_files(glb):
-            if f.suffix.lower() not in COMMENT:
-                continue
-            changed, status = ensure_tag(f, studies, apply=apply)
+    with ScanCache() as cache:
+        for f, studies in match_files(patterns, changes=changes):
+            entry = cache.entry(os.path.abspath(f))
+            tags = entry.get(HEAD_TAGS, HEAD_TAGS_VERSION)
+            if tags is not None and set(tags) >= set(studies):
+                # Unchanged and already tagged: nothing to read
+                changed, status = False, "ok(already)"
+            else:
+                try:
+                    txt = entry.text()
+                except Exception:
+                    changed, status = False, "skip(read)"
+                else:
+                    changed, status = ensure_tag(f, studies, apply=apply, txt=txt)
+                    if not (apply and changed):
+                        entry.put(HEAD_TAGS, HEAD_TAGS_VERSION, head_tags(txt))
             if changed:
                 touched += 1
             print(f"{'APPLY' if apply else 'DRY'} | {status:8} | {f}")
 
+    if changes is not None:
+        print(f"==> Scoped to {len(changes)} files changed since {ref}")
     print(f"==> Files {'modified' if apply else 'would change'}: {touched}")
     if not apply:
         print("Run with --apply to write changes.")
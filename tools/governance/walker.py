@@ -0,0 +1,232 @@
+# @Study:ST-019
+#!/usr/bin/env python3
+"""
+Shared repository walker for the governance tools
+
+One ``os.scandir`` pass over the tree that prunes VCS metadata,
+dependency/virtualenv directories and anything matched by ``.gitignore``
+(root and nested) *before* descending, plus a matcher that tests a path
+against many globs in a single regex call.
+
+    matcher = GlobMatcher(["src/backend/**", "tests/**"])
+    for path in walk("."):
+        hits = matcher.match(path)   # indices of the matching globs
+"""
+
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Never worth descending into
+DEFAULT_PRUNE = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        "node_modules",
+        "__pycache__",
+        ".venv",
+        "venv",
+        ".tox",
+        ".nox",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+    }
+)
+
+
+def _translate(pattern: str, slash_is_special: bool) -> str:
+    """
+    Glob → regex body
+
+    ``slash_is_special=False`` keeps :mod:`fnmatch` semantics (``*`` crosses
+    ``/``), as used by tagging_map.yaml; ``True`` gives .gitignore semantics
+    where only ``**`` crosses directories.
+    """
+    star = "[^/]*" if slash_is_special else ".*"
+    one = "[^/]" if slash_is_special else "."
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                i += 2
+                if slash_is_special and pattern.startswith("/", i):
+                    # "**/" matches zero or more whole directories
+                    i += 1
+                    out.append("(?:.*/)?")
+                else:
+                    out.append(".*")
+                continue
+            out.append(star)
+        elif c == "?":
+            out.append(one)
+        elif c == "[":
+            j = pattern.find("]", i + 2 if pattern[i + 1 : i + 2] in "!]" else i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : j].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class GlobMatcher:
+    """
+    Many globs compiled into one regex
+
+    Each glob sits in its own optional lookahead group anchored at the start,
+    so a single ``match`` reports every glob that matches the path.
+    """
+
+    def __init__(self, globs: Sequence[str]):
+        self.globs = list(globs)
+        parts = [
+            f"(?:(?=(?P<g{i}>{_translate(g, False)})\\Z))?"
+            for i, g in enumerate(self.globs)
+        ]
+        self._regex = re.compile("".join(parts), re.S)
+
+    def match(self, path: str) -> List[int]:
+        """Indices of the globs matching ``path`` (posix, relative)"""
+        m = self._regex.match(path)
+        return [i for i, g in enumerate(m.groups()) if g is not None]
+
+
+class IgnoreRules:
+    """Compiled .gitignore rules; the last matching rule wins (``!`` re-includes)"""
+
+    def __init__(
+        self, rules: Optional[List[Tuple[str, "re.Pattern", bool, bool]]] = None
+    ):
+        # (base dir, regex, negated, directories only)
+        self.rules = rules or []
+
+    @staticmethod
+    def parse(text: str, base: str = "") -> List[Tuple[str, "re.Pattern", bool, bool]]:
+        rules = []
+        for raw in text.splitlines():
+            line = raw.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # A slash anywhere but the end anchors the pattern to its .gitignore
+            anchored = "/" in line
+            line = line.lstrip("/")
+            prefix = "" if anchored else "(?:.*/)?"
+            regex = re.compile(f"{prefix}{_translate(line, True)}\\Z", re.S)
+            rules.append((base, regex, negated, dir_only))
+        return rules
+
+    def extended(self, text: str, base: str) -> "IgnoreRules":
+        return IgnoreRules(self.rules + self.parse(text, base))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        result = False
+        for base, regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(base + "/"):
+                    continue
+                rel = path[len(base) + 1 :]
+            else:
+                rel = path
+            if regex.match(rel):
+                result = not negated
+        return result
+
+
+def load_gitignore(root: str = ".") -> IgnoreRules:
+    """Rules from the root ``.gitignore`` (nested ones are read by :func:`walk`)"""
+    try:
+        with open(os.path.join(root, ".gitignore"), encoding="utf-8") as f:
+            return IgnoreRules(IgnoreRules.parse(f.read()))
+    except OSError:
+        return IgnoreRules()
+
+
+def is_ignored(
+    path: str,
+    rules: Optional[IgnoreRules] = None,
+    prune: Iterable[str] = DEFAULT_PRUNE,
+) -> bool:
+    """Would :func:`walk` skip ``path``? (checks the path and its parents)"""
+    rules = rules if rules is not None else load_gitignore()
+    prune = frozenset(prune)
+    parts = path.split("/")
+    for i in range(1, len(parts) + 1):
+        is_dir = i < len(parts)
+        if is_dir and parts[i - 1] in prune:
+            return True
+        if rules.ignored("/".join(parts[:i]), is_dir):
+            return True
+    return False
+
+
+def walk(
+    root: str = ".",
+    prune: Iterable[str] = DEFAULT_PRUNE,
+    gitignore: bool = True,
+) -> Iterator[str]:
+    """
+    Yield every non-ignored regular file under ``root`` once
+
+    Paths are posix and relative to ``root``, in a stable order (each
+    directory's files, sorted, before its subdirectories). Pruned and
+    git-ignored directories are never entered, and neither is any
+    virtualenv (a directory holding ``pyvenv.cfg``), whatever its name.
+    Symlinked directories are not followed.
+    """
+    prune = frozenset(prune)
+    base_rules = IgnoreRules()
+    stack: List[Tuple[str, IgnoreRules]] = [("", base_rules)]
+    while stack:
+        rel_dir, rules = stack.pop()
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        names = {e.name for e in entries}
+        if rel_dir and "pyvenv.cfg" in names:
+            continue
+        if gitignore and ".gitignore" in names:
+            try:
+                with open(os.path.join(abs_dir, ".gitignore"), encoding="utf-8") as f:
+                    rules = rules.extended(f.read(), rel_dir)
+            except OSError:
+                pass
+        subdirs = []
+        for entry in entries:
+            path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in prune or rules.ignored(path, True):
+                    continue
+                subdirs.append(path)
+            elif entry.is_file() and not rules.ignored(path, False):
+                yield path
+        # Reversed so the stack pops them in sorted order
+        stack.extend((d, rules) for d in reversed(subdirs))
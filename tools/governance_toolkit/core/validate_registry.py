@@ -2,8 +2,15 @@
 
 import json
 import sys
-import hashlib
 import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.hashing import sha256_file
+from tools.governance.scan_cache import ScanCache
 
 REG = "governance/studies/registry.json"
 
@@ -11,11 +18,23 @@ CHK = "governance/studies/meta/checksums.csv"
 
 
 def sha(path):
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for b in iter(lambda: f.read(65536), b""):
-            h.update(b)
-    return h.hexdigest()
+    return sha256_file(path)
+
+
+def canonical_hashes(studies, checksums):
+    """
+    SHA-256 of every checksummed canonical file, hashed concurrently;
+    files unchanged since the last run (inode/size/mtime) are not re-read
+    """
+    paths = [
+        s["canonical_path"]
+        for s in studies
+        if s.get("canonical_path") in checksums and os.path.exists(s["canonical_path"])
+    ]
+    rel = {p: Path(os.path.relpath(os.path.abspath(p), ROOT)).as_posix() for p in paths}
+    with ScanCache() as cache:
+        hashes = cache.sha256_many(rel.values())
+    return {p: hashes[r] for p, r in rel.items()}
 
 
 def load_checksums():
@@ -43,13 +62,14 @@ def main():
         sys.exit("registry: lock.enabled is false")
 
     checksums = load_checksums()
+    hashes = canonical_hashes(data["studies"], checksums)
     for s in data["studies"]:
         cp = s.get("canonical_path")
         assert cp, "missing canonical_path"
         if not os.path.exists(cp):
             sys.exit(f"missing file: {cp}")
         if cp in checksums:
-            if sha(cp) != checksums[cp]:
+            if hashes[cp] != checksums[cp]:
                 sys.exit(f"checksum mismatch: {cp}")
         # aliases are strings, not dicts - they should exist as symlinks or be removed
         for al in s.get("aliases", []):
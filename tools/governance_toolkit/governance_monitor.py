@@ -12,7 +12,13 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.scan_cache import ScanCache
 
 # إعداد التسجيل
 logging.basicConfig(
@@ -32,7 +38,7 @@ class GovernanceMonitor:
     """
 
     def __init__(self):
-        self.project_root = Path(__file__).parent.parent
+        self.project_root = ROOT
         self.studies_path = self.project_root / "studies"
         self.governance_path = self.project_root / "governance" / "active"
         self.logs_path = self.project_root / "logs"
@@ -57,15 +63,11 @@ class GovernanceMonitor:
             logger.warning(f"Studies index not found: {index_file}")
             return {}
 
-        # تحليل الملف واستخراج الروابط
-        with open(index_file, "r", encoding="utf-8") as f:
-            content = f.read()
-
         # استخراج المعلومات الأساسية (يمكن تحسين هذا التحليل)
         return {
             "path": str(index_file),
             "last_modified": datetime.fromtimestamp(index_file.stat().st_mtime),
-            "content_hash": hash(content),
+            "content_hash": self._content_hash(index_file),
         }
 
     def _load_governance_framework(self) -> Dict[str, Any]:
@@ -75,15 +77,17 @@ class GovernanceMonitor:
             logger.warning(f"Governance framework not found: {framework_file}")
             return {}
 
-        with open(framework_file, "r", encoding="utf-8") as f:
-            content = f.read()
-
         return {
             "path": str(framework_file),
             "last_modified": datetime.fromtimestamp(framework_file.stat().st_mtime),
-            "content_hash": hash(content),
+            "content_hash": self._content_hash(framework_file),
         }
 
+    def _content_hash(self, path: Path) -> Optional[str]:
+        """بصمة SHA-256 للمحتوى - يُعاد قراءة الملف فقط إذا تغيّر"""
+        with ScanCache(root=self.project_root) as cache:
+            return cache.sha256(path.relative_to(self.project_root).as_posix())
+
     def run_compliance_check(self) -> Dict[str, Any]:
         """
         تشغيل فحص شامل للامتثال
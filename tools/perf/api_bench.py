@@ -0,0 +1,363 @@
+# @Study:ST-004 @Study:ST-008
+#!/usr/bin/env python3
+"""
+API benchmark harness - قياس أداء الـ API مقابل أهداف slo.yaml
+
+Drives the real FastAPI ``app`` either in-process (ASGI transport) or over
+a local socket (uvicorn on 127.0.0.1), closed-loop at a fixed concurrency
+or open-loop at a fixed arrival rate, with a weighted payload mix. Reports
+throughput and p50/p95/p99/p99.9 latency and fails when results break the
+SLO or regress against a stored baseline.
+
+    python3 tools/perf/api_bench.py --requests 2000 --concurrency 32
+    python3 tools/perf/api_bench.py --rate 500 --duration 10 --transport socket
+    python3 tools/perf/api_bench.py --update-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_BASELINE = ROOT / "tools" / "perf" / "baseline.json"
+DEFAULT_SLO = ROOT / "governance" / "slo" / "slo.yaml"
+
+# name -> (method, path, payload factory)
+SCENARIOS = {
+    # A fresh garment every time: cache miss, goes through admission + job pool
+    "tryon-unique": (
+        "POST",
+        "/api/v1/try-on",
+        lambda rng, i: {
+            "image_url": f"https://example.com/bench/{rng.getrandbits(64):x}.jpg",
+            "model": "base-v1",
+            "options": {"mask": None},
+        },
+    ),
+    # The same catalog item over and over: cache hit / coalesced
+    "tryon-repeat": (
+        "POST",
+        "/api/v1/try-on",
+        lambda rng, i: {
+            "image_url": "https://example.com/bench/catalog-item.jpg",
+            "model": "base-v1",
+            "options": {"mask": None},
+        },
+    ),
+    "health": ("GET", "/health", lambda rng, i: None),
+}
+
+DEFAULT_MIX = "tryon-unique=0.7,tryon-repeat=0.25,health=0.05"
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """``"a=0.7,b=0.3"`` → ``[("a", 0.7), ("b", 0.3)]``"""
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario: {name}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))  # ceil
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class Sample:
+    scenario: str
+    status: int
+    latency: float
+
+
+@dataclass
+class BenchResult:
+    samples: List[Sample] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-scenario and overall throughput / latency / status breakdown"""
+        groups: Dict[str, List[Sample]] = {"all": self.samples}
+        for s in self.samples:
+            groups.setdefault(s.scenario, []).append(s)
+        out = {}
+        for name, samples in groups.items():
+            lat = sorted(s.latency for s in samples)
+            statuses: Dict[str, int] = {}
+            for s in samples:
+                statuses[str(s.status)] = statuses.get(str(s.status), 0) + 1
+            errors = sum(1 for s in samples if s.status >= 500 or s.status == 0)
+            out[name] = {
+                "requests": len(samples),
+                "throughput_rps": (
+                    len(samples) / self.wall_time if self.wall_time else 0
+                ),
+                "p50_ms": percentile(lat, 50) * 1000,
+                "p95_ms": percentile(lat, 95) * 1000,
+                "p99_ms": percentile(lat, 99) * 1000,
+                "p999_ms": percentile(lat, 99.9) * 1000,
+                "max_ms": (lat[-1] if lat else 0) * 1000,
+                "error_rate": errors / len(samples) if samples else 0,
+                "statuses": statuses,
+            }
+        return out
+
+
+class _SocketServer:
+    """uvicorn on an ephemeral localhost port, in a background thread"""
+
+    def __init__(self, app):
+        import uvicorn
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]
+        sock.close()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(5)
+
+
+def _load_app(seed: Optional[int]):
+    from src.backend import main
+
+    main.seed_simulation(seed)
+    return main.app
+
+
+async def _run(
+    client,
+    mix: List[Tuple[str, float]],
+    requests: int,
+    concurrency: int,
+    rate: Optional[float],
+    duration: Optional[float],
+    seed: Optional[int],
+) -> BenchResult:
+    rng = random.Random(seed)
+    names = [name for name, _ in mix]
+    weights = [w for _, w in mix]
+    result = BenchResult()
+
+    async def one(i: int, scheduled: float) -> None:
+        name = rng.choices(names, weights)[0]
+        method, path, make_payload = SCENARIOS[name]
+        payload = make_payload(rng, i)
+        try:
+            resp = await client.request(method, path, json=payload)
+            status = resp.status_code
+        except Exception:
+            status = 0
+        # Measured from the scheduled start so open-loop runs do not hide
+        # queueing behind the client (coordinated omission)
+        result.samples.append(Sample(name, status, time.perf_counter() - scheduled))
+
+    start = time.perf_counter()
+    if rate:
+        # Open loop: Poisson arrivals at ``rate``/s regardless of completions
+        total = int(rate * duration) if duration else requests
+        tasks = []
+        next_at = start
+        for i in range(total):
+            next_at += rng.expovariate(rate)
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i, next_at)))
+        await asyncio.gather(*tasks)
+    else:
+        # Closed loop: ``concurrency`` workers issuing back-to-back requests
+        counter = iter(range(requests))
+
+        async def worker():
+            for i in counter:
+                await one(i, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall_time = time.perf_counter() - start
+    return result
+
+
+def run_benchmark(
+    transport: str = "inprocess",
+    mix: str = DEFAULT_MIX,
+    requests: int = 1000,
+    concurrency: int = 16,
+    rate: Optional[float] = None,
+    duration: Optional[float] = None,
+    seed: Optional[int] = 1234,
+) -> BenchResult:
+    """Run one benchmark against the real app and return the raw samples"""
+    import httpx
+
+    app = _load_app(seed)
+    parsed = parse_mix(mix)
+    limits = httpx.Limits(max_connections=max(concurrency, 100))
+
+    async def go(**client_kwargs):
+        async with httpx.AsyncClient(timeout=30, limits=limits, **client_kwargs) as c:
+            return await _run(c, parsed, requests, concurrency, rate, duration, seed)
+
+    if transport == "socket":
+        with _SocketServer(app) as base_url:
+            return asyncio.run(go(base_url=base_url))
+    return asyncio.run(
+        go(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    )
+
+
+def load_slo(path: Path = DEFAULT_SLO) -> Dict[str, float]:
+    """Latency budget (s) and allowed error rate from slo.yaml"""
+    from src.backend.admission import load_latency_budget
+
+    slo = {"api_latency_p95": load_latency_budget(path), "max_error_rate": 0.001}
+    try:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            name, _, value = line.partition(":")
+            if name.strip() == "availability":
+                slo["max_error_rate"] = 1 - float(value.strip().rstrip("%")) / 100
+    except (OSError, ValueError):
+        pass
+    return slo
+
+
+def check(
+    summary: Dict[str, Any],
+    slo: Dict[str, float],
+    baseline: Optional[Dict[str, Any]] = None,
+    tolerance: float = 0.2,
+) -> List[str]:
+    """Return human-readable failures (empty when the run passes)"""
+    failures = []
+    overall = summary["all"]
+    budget_ms = slo["api_latency_p95"] * 1000
+    if overall["p95_ms"] > budget_ms:
+        failures.append(
+            f"SLO: p95 {overall['p95_ms']:.1f}ms > api_latency_p95 {budget_ms:.0f}ms"
+        )
+    if overall["error_rate"] > slo["max_error_rate"]:
+        failures.append(
+            f"SLO: error rate {overall['error_rate']:.4f} > {slo['max_error_rate']:.4f}"
+        )
+    for name, base in (baseline or {}).items():
+        cur = summary.get(name)
+        if cur is None:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if key in base and cur[key] > base[key] * (1 + tolerance):
+                failures.append(
+                    f"regression: {name} {key} {cur[key]:.2f} > "
+                    f"baseline {base[key]:.2f} (+{tolerance:.0%})"
+                )
+        if "throughput_rps" in base and cur["throughput_rps"] < base[
+            "throughput_rps"
+        ] * (1 - tolerance):
+            failures.append(
+                f"regression: {name} throughput {cur['throughput_rps']:.0f}/s < "
+                f"baseline {base['throughput_rps']:.0f}/s (-{tolerance:.0%})"
+            )
+    return failures
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"{'scenario':<14} {'reqs':>6} {'rps':>8} {'p50':>8} {'p95':>8} "
+        f"{'p99':>8} {'p99.9':>8} {'err':>7}  statuses"
+    ]
+    for name, s in summary.items():
+        lines.append(
+            f"{name:<14} {s['requests']:>6} {s['throughput_rps']:>8.0f} "
+            f"{s['p50_ms']:>7.2f}m {s['p95_ms']:>7.2f}m {s['p99_ms']:>7.2f}m "
+            f"{s['p999_ms']:>7.2f}m {s['error_rate']:>7.4f}  {s['statuses']}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--transport", choices=("inprocess", "socket"), default="inprocess")
+    ap.add_argument("--mix", default=DEFAULT_MIX)
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--rate", type=float, help="open-loop arrivals per second")
+    ap.add_argument("--duration", type=float, help="open-loop run length (s)")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--slo", type=Path, default=DEFAULT_SLO)
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--out", type=Path, help="write the JSON summary here")
+    args = ap.parse_args(argv)
+
+    result = run_benchmark(
+        transport=args.transport,
+        mix=args.mix,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        duration=args.duration,
+        seed=args.seed,
+    )
+    summary = result.summary()
+    print(format_summary(summary))
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(summary, indent=2))
+
+    if args.update_baseline:
+        keep = ("p95_ms", "p99_ms", "throughput_rps")
+        args.baseline.write_text(
+            json.dumps(
+                {n: {k: round(s[k], 3) for k in keep} for n, s in summary.items()},
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"📄 Baseline saved: {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    failures = check(summary, load_slo(args.slo), baseline, args.tolerance)
+    if failures:
+        print("❌ Benchmark gate failed:")
+        for f in failures:
+            print(f"  - {f}")
+        return 1
+    print("✅ Benchmark within SLO and baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
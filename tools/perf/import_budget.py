@@ -0,0 +1,159 @@
+# @Study:ST-004 @Study:ST-008
+#!/usr/bin/env python3
+"""
+Import-time budget check - ميزانية زمن الإقلاع
+
+Imports the API module in a fresh interpreter under ``-X importtime``, then
+builds the app with its factory, and reports the most expensive imports.
+Fails when either phase exceeds the budget in
+governance/budgets/startup.yaml:
+
+    import_ms   ``import src.backend.main`` (what every worker/tool pays)
+    startup_ms  import + ``create_app()`` (what a new API replica pays)
+
+    python3 tools/perf/import_budget.py
+    python3 tools/perf/import_budget.py --top 25 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_BUDGET = ROOT / "governance" / "budgets" / "startup.yaml"
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module} as m
+t1 = time.perf_counter()
+getattr(m, {factory!r})()
+t2 = time.perf_counter()
+sys.stdout.write(json.dumps({{"import_ms": (t1 - t0) * 1e3, "startup_ms": (t2 - t0) * 1e3}}))
+"""
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Parse ``-X importtime`` lines (``import time: self | cumulative | name``)"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                module=stripped,
+                self_us=int(parts[0]),
+                cumulative_us=int(parts[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records
+
+
+def measure(
+    module: str = "src.backend.main",
+    factory: str = "create_app",
+    env: Optional[Dict[str, str]] = None,
+) -> Dict:
+    """One cold start in a fresh interpreter"""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            PROBE.format(module=module, factory=factory),
+        ],
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=str(ROOT), **(env or {})),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(proc.stdout)
+    timings["imports"] = parse_importtime(proc.stderr)
+    return timings
+
+
+def load_budget(path: Path = DEFAULT_BUDGET) -> Dict[str, float]:
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    return {k: float(data[k]) for k in ("import_ms", "startup_ms") if k in data}
+
+
+def top_packages(records: List[ImportRecord], n: int) -> List[ImportRecord]:
+    """Most expensive top-level imports (cumulative, includes their children)"""
+    roots = [r for r in records if r.depth == 0]
+    return sorted(roots, key=lambda r: r.cumulative_us, reverse=True)[:n]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--module", default="src.backend.main")
+    ap.add_argument("--factory", default="create_app")
+    ap.add_argument("--budget", type=Path, default=DEFAULT_BUDGET)
+    ap.add_argument("--repeat", type=int, default=3, help="keep the fastest run")
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--json", type=Path, help="write timings here")
+    args = ap.parse_args(argv)
+
+    runs = [measure(args.module, args.factory) for _ in range(max(1, args.repeat))]
+    # The fastest cold start is the least noisy estimate of the real cost
+    best = min(runs, key=lambda r: r["startup_ms"])
+    budget = load_budget(args.budget)
+
+    print(f"⏱️  import {args.module}: {best['import_ms']:.1f}ms")
+    print(f"⏱️  import + {args.factory}(): {best['startup_ms']:.1f}ms")
+    print(f"\n{'cumulative':>11} {'self':>9}  module")
+    for r in top_packages(best["imports"], args.top):
+        print(f"{r.cumulative_us / 1e3:>9.1f}ms {r.self_us / 1e3:>7.1f}ms  {r.module}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(
+            json.dumps(
+                {
+                    "import_ms": best["import_ms"],
+                    "startup_ms": best["startup_ms"],
+                    "budget": budget,
+                    "top": [
+                        r.__dict__ for r in top_packages(best["imports"], args.top)
+                    ],
+                },
+                indent=2,
+            )
+        )
+
+    failed = False
+    for phase in ("import_ms", "startup_ms"):
+        if phase in budget and best[phase] > budget[phase]:
+            print(f"❌ {phase} {best[phase]:.1f} > budget {budget[phase]:.0f}")
+            failed = True
+    if failed:
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,522 @@
+# @Study:ST-019
+#!/usr/bin/env python3
+"""
+Preflight orchestrator - فحص ما قبل الدمج بالتوازي
+
+The preflight checks form a small dependency graph: only the coverage gate
+needs the governance monitor's ``coverage.json``; everything else is
+independent. Steps are scheduled as soon as their dependencies finish and
+run concurrently as asyncio subprocesses (or in a worker thread for the
+in-process steps), so wall time is bounded by the longest chain rather
+than by the sum of all steps.
+
+The in-process steps read a :class:`Snapshot` (paths and sizes) of just
+the directories they need, taken with the governance walker the first
+time a step asks for it; the subprocess tools share the persistent scan
+cache. Hygiene runs
+``tools/hygiene/repo_hygiene.sh`` itself, so its rules live in one place.
+
+Writes the same ``governance/out/preflight_report.md`` as before plus
+``governance/out/preflight_report.json`` with per-step timings.
+
+    python3 tools/preflight/preflight.py
+    python3 tools/preflight/preflight.py --jobs 4 --skip pytest
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.hashing import sha256_files
+from tools.governance.walker import walk
+
+REPORT = "governance/out/preflight_report.md"
+JSON_REPORT = "governance/out/preflight_report.json"
+COVERAGE_THRESHOLD = os.environ.get("COVERAGE_THRESHOLD", "0.95")
+
+STUDIES_DIR = "governance/studies"
+# Directories read by the in-process steps
+SNAPSHOT_DIRS = (STUDIES_DIR,)
+
+
+@dataclass
+class Snapshot:
+    """One walk of the directories the in-process steps read"""
+
+    root: Path
+    files: Dict[str, int]
+
+    @classmethod
+    def take(cls, root: Path = ROOT, dirs: Sequence[str] = SNAPSHOT_DIRS) -> "Snapshot":
+        """Every file below ``dirs`` with its size, pruned like :func:`walk`"""
+        files: Dict[str, int] = {}
+        for top in dirs:
+            for rel in walk(str(root / top)):
+                path = f"{top}/{rel}"
+                try:
+                    files[path] = os.stat(root / path, follow_symlinks=False).st_size
+                except OSError:
+                    continue
+        return cls(root, files)
+
+    def under(self, prefix: str, max_depth: Optional[int] = None) -> List[str]:
+        """Files below ``prefix``, at most ``max_depth`` levels deep"""
+        prefix = prefix.rstrip("/") + "/"
+        out = []
+        for rel in self.files:
+            if not rel.startswith(prefix):
+                continue
+            if max_depth is not None and rel[len(prefix) :].count("/") >= max_depth:
+                continue
+            out.append(rel)
+        return sorted(out)
+
+
+@dataclass
+class Outcome:
+    """Result of a step; ``lines`` go to the report under the step's section"""
+
+    status: str  # "pass" | "fail" | "note" | "skipped"
+    lines: List[str] = field(default_factory=list)
+    returncode: Optional[int] = None
+    output: str = ""
+
+
+Action = Union[str, Sequence[str], Callable[[Snapshot], Outcome]]
+
+
+@dataclass
+class Step:
+    """
+    A preflight step
+
+    ``run`` is a shell string, an argv list, or a callable taking the
+    snapshot. ``ok`` is the report line on success; a step whose
+    ``requires`` executable is missing, or whose ``when`` path does not
+    exist, is reported with ``skip_note`` instead. ``soft`` steps never
+    fail the preflight (their old shell form ended in ``|| true``).
+    """
+
+    name: str
+    section: str
+    run: Action
+    deps: Tuple[str, ...] = ()
+    ok: str = ""
+    requires: Optional[str] = None
+    when: Optional[str] = None
+    skip_note: str = ""
+    soft: bool = False
+    env: Dict[str, str] = field(default_factory=dict)
+    report: Optional[Callable[[Outcome], List[str]]] = None
+
+
+@dataclass
+class StepResult:
+    step: Step
+    outcome: Outcome
+    start: float
+    duration: float
+
+
+def topological_order(steps: Sequence[Step]) -> List[Step]:
+    """Steps ordered so every dependency comes first; raises on cycles"""
+    by_name = {s.name: s for s in steps}
+    for s in steps:
+        for dep in s.deps:
+            if dep not in by_name:
+                raise ValueError(f"step {s.name!r} depends on unknown step {dep!r}")
+    order: List[Step] = []
+    state: Dict[str, int] = {}
+
+    def visit(s: Step, path: Tuple[str, ...]) -> None:
+        if state.get(s.name) == 2:
+            return
+        if state.get(s.name) == 1:
+            raise ValueError("dependency cycle: " + " -> ".join(path + (s.name,)))
+        state[s.name] = 1
+        for dep in s.deps:
+            visit(by_name[dep], path + (s.name,))
+        state[s.name] = 2
+        order.append(s)
+
+    for s in steps:
+        visit(s, ())
+    return order
+
+
+# ==== Steps ====
+
+
+def studies_integrity(snapshot: Snapshot) -> Outcome:
+    """``sha256sum``-format index of the studies, hashed in parallel"""
+    paths = [p for p in snapshot.under(STUDIES_DIR, 3) if "/out/" not in p]
+    digests = sha256_files([snapshot.root / p for p in paths])
+    out = snapshot.root / "governance/out/studies.sha256"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(
+        "".join(f"{digests[str(snapshot.root / p)]}  {p}\n" for p in paths),
+        encoding="utf-8",
+    )
+    return Outcome("pass", output=f"{len(paths)} files")
+
+
+def study_coverage(outcome: Outcome) -> List[str]:
+    try:
+        with open(ROOT / "governance/out/coverage.json", encoding="utf-8") as f:
+            actual = json.load(f)["total"]
+    except (OSError, ValueError, KeyError):
+        actual = 0
+    return [f"- Study coverage: {actual}"]
+
+
+def default_steps(coverage_threshold: str = COVERAGE_THRESHOLD) -> List[Step]:
+    """The preflight graph, in report order"""
+    return [
+        Step(
+            "hygiene",
+            "Hygiene",
+            ["bash", "tools/hygiene/repo_hygiene.sh"],
+            ok="Hygiene PASS",
+        ),
+        Step(
+            "governance_monitor",
+            "Governance",
+            ["python3", "tools/governance_toolkit/governance_monitor.py"],
+            soft=True,
+            report=study_coverage,
+        ),
+        Step(
+            "coverage_gate",
+            "Governance",
+            ["bash", "tools/quality/coverage_gate.sh"],
+            deps=("governance_monitor",),
+            ok=f"Coverage ≥ {coverage_threshold}",
+            env={"COVERAGE_THRESHOLD": coverage_threshold},
+        ),
+        Step(
+            "compliance",
+            "Compliance",
+            ["python3", "tools/compliance/compliance_checker.py"],
+            ok="Compliance PASS",
+        ),
+        Step(
+            "security_ops",
+            "Security OPS",
+            ["python3", "scripts/devops/security/security_ops.py", "check"],
+            ok="Security Ops PASS",
+            requires="python3",
+            skip_note="python3 not found—skipping security_ops.py",
+        ),
+        Step(
+            "pytest",
+            "Tests (Python)",
+            ["pytest", "-q", "--maxfail=1", "--disable-warnings"],
+            ok="PyTests run successfully",
+            requires="pytest",
+            skip_note="pytest not found—skipping",
+        ),
+        Step(
+            "frontend",
+            "Tests (Frontend)",
+            lambda snapshot: Outcome(
+                "note", ["ℹ️  Frontend tests skipped - dependencies need setup"]
+            ),
+        ),
+        Step(
+            "terraform",
+            "IaC Validation",
+            "cd infrastructure/terraform"
+            " && { command -v terraform >/dev/null 2>&1"
+            " && terraform fmt -check && terraform validate || true; }"
+            " && { command -v tflint >/dev/null 2>&1 && tflint || true; }"
+            " && { command -v tfsec >/dev/null 2>&1 && tfsec --soft-fail || true; }",
+            ok="Terraform validation done",
+            when="infrastructure/terraform",
+            skip_note="No Terraform dir",
+            soft=True,
+        ),
+        Step(
+            "helm",
+            "IaC Validation",
+            "command -v helm >/dev/null 2>&1"
+            " && helm lint infrastructure/helm/modamoda || true",
+            ok="Helm lint done",
+            when="infrastructure/helm",
+            skip_note="No Helm dir",
+            soft=True,
+        ),
+        Step(
+            "container",
+            "Container Scan",
+            "if command -v hadolint >/dev/null 2>&1; then hadolint Dockerfile || true; fi;"
+            " if command -v syft >/dev/null 2>&1; then"
+            " syft dir:. -o cyclonedx-json > governance/out/sbom.json || true; fi;"
+            " if command -v grype >/dev/null 2>&1; then grype -q dir:. || true; fi",
+            ok="Container checks done",
+            when="Dockerfile",
+            skip_note="No Dockerfile—skipping container checks",
+            soft=True,
+        ),
+        Step(
+            "studies_integrity",
+            "Studies Integrity",
+            studies_integrity,
+            ok="SHA256 index created",
+        ),
+    ]
+
+
+# ==== Runner ====
+
+
+class Orchestrator:
+    """Runs a step graph with at most ``jobs`` steps in flight"""
+
+    def __init__(
+        self,
+        steps: Sequence[Step],
+        root: Path = ROOT,
+        jobs: Optional[int] = None,
+        snapshot: Optional[Snapshot] = None,
+        progress: Callable[[str], None] = print,
+        verbose: bool = False,
+    ):
+        self.steps = topological_order(steps)
+        self.report_order = list(steps)
+        self.root = root
+        # Steps are mostly subprocesses waiting on I/O: by default all ready
+        # steps run at once, ``jobs`` caps that
+        self.jobs = jobs or len(self.steps) or 1
+        self._snapshot = snapshot
+        self._snapshot_lock = threading.Lock()
+        self.progress = progress
+        self.verbose = verbose
+        self.results: Dict[str, StepResult] = {}
+        self.t0 = 0.0
+
+    @property
+    def snapshot(self) -> Snapshot:
+        # Taken by the first in-process step to run, from a worker thread
+        with self._snapshot_lock:
+            if self._snapshot is None:
+                self._snapshot = Snapshot.take(self.root)
+            return self._snapshot
+
+    def run(self) -> Dict[str, StepResult]:
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> Dict[str, StepResult]:
+        self.t0 = time.monotonic()
+        limit = asyncio.Semaphore(self.jobs)
+        done = {s.name: asyncio.Event() for s in self.steps}
+
+        async def run_one(step: Step) -> None:
+            try:
+                for dep in step.deps:
+                    await done[dep].wait()
+                failed = [
+                    d for d in step.deps if self.results[d].outcome.status == "fail"
+                ]
+                if failed:
+                    outcome = Outcome("skipped", output=f"dependency failed: {failed}")
+                    self._record(step, outcome, time.monotonic())
+                    return
+                async with limit:
+                    start = time.monotonic()
+                    self.progress(f"▶ {step.name}")
+                    outcome = await self._execute(step)
+                    self._record(step, outcome, start)
+            finally:
+                done[step.name].set()
+
+        await asyncio.gather(*(run_one(s) for s in self.steps))
+        return self.results
+
+    def _record(self, step: Step, outcome: Outcome, start: float) -> None:
+        end = time.monotonic()
+        self.results[step.name] = StepResult(
+            step, outcome, start - self.t0, end - start
+        )
+        icon = {"pass": "✅", "fail": "❌", "note": "ℹ️ ", "skipped": "⏭"}
+        self.progress(
+            f"{icon[outcome.status]} {step.name} ({end - start:.2f}s)"
+            + (f" rc={outcome.returncode}" if outcome.returncode else "")
+        )
+        if outcome.output and (self.verbose or outcome.status == "fail"):
+            tail = outcome.output.rstrip().splitlines()[-40:]
+            self.progress("\n".join(f"  [{step.name}] {line}" for line in tail))
+
+    async def _execute(self, step: Step) -> Outcome:
+        if step.requires and shutil.which(step.requires) is None:
+            return Outcome("note", [f"ℹ️  {step.skip_note}"])
+        if step.when and not (self.root / step.when).exists():
+            return Outcome("note", [f"ℹ️  {step.skip_note}"])
+
+        if callable(step.run):
+            try:
+                outcome = await asyncio.to_thread(step.run, self.snapshot)
+            except Exception as e:  # a broken step must not stop the others
+                outcome = Outcome("fail", output=f"{type(e).__name__}: {e}")
+        else:
+            outcome = await self._subprocess(step)
+
+        if outcome.status == "fail" and step.soft:
+            outcome.status = "pass"
+        if step.report is not None:
+            outcome.lines = step.report(outcome)
+        elif outcome.status == "pass" and step.ok:
+            outcome.lines = [f"✅ {step.ok}"]
+        return outcome
+
+    async def _subprocess(self, step: Step) -> Outcome:
+        env = {**os.environ, **step.env}
+        kwargs = dict(
+            cwd=self.root,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            stdin=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            if isinstance(step.run, str):
+                proc = await asyncio.create_subprocess_exec(
+                    "bash", "-c", step.run, **kwargs
+                )
+            else:
+                proc = await asyncio.create_subprocess_exec(*step.run, **kwargs)
+        except OSError as e:
+            return Outcome("fail", returncode=127, output=str(e))
+
+        chunks: List[str] = []
+        assert proc.stdout is not None
+        async for raw in proc.stdout:
+            line = raw.decode("utf-8", "replace")
+            chunks.append(line)
+            if self.verbose:
+                self.progress(f"  [{step.name}] {line.rstrip()}")
+        rc = await proc.wait()
+        return Outcome(
+            "pass" if rc == 0 else "fail", returncode=rc, output="".join(chunks)
+        )
+
+    # ==== Reports ====
+
+    def failed(self) -> List[str]:
+        return [
+            name
+            for name, r in self.results.items()
+            if r.outcome.status in ("fail", "skipped")
+        ]
+
+    def markdown(self, started: str, finished: str, coverage_threshold: str) -> str:
+        lines = [
+            "# Preflight Report",
+            f"- Started: {started}",
+            f"- Coverage Gate: {coverage_threshold}",
+        ]
+        section = None
+        for step in self.report_order:
+            if step.section != section:
+                section = step.section
+                lines += ["", f"## {section}"]
+            r = self.results.get(step.name)
+            if r is None:
+                continue
+            lines += r.outcome.lines
+            if r.outcome.status == "fail":
+                lines.append(f"❌ {step.name} FAILED (rc={r.outcome.returncode})")
+            elif r.outcome.status == "skipped":
+                lines.append(f"⏭ {step.name} skipped ({r.outcome.output})")
+        lines += ["", "---", f"- Finished: {finished}"]
+        return "\n".join(lines) + "\n"
+
+    def as_json(self, started: str, finished: str, wall: float) -> Dict:
+        return {
+            "started": started,
+            "finished": finished,
+            "wall_seconds": round(wall, 3),
+            "serial_seconds": round(sum(r.duration for r in self.results.values()), 3),
+            "jobs": self.jobs,
+            "files_indexed": len(self._snapshot.files) if self._snapshot else 0,
+            "ok": not self.failed(),
+            "steps": [
+                {
+                    "name": s.name,
+                    "section": s.section,
+                    "deps": list(s.deps),
+                    "status": self.results[s.name].outcome.status,
+                    "returncode": self.results[s.name].outcome.returncode,
+                    "start_offset": round(self.results[s.name].start, 3),
+                    "duration": round(self.results[s.name].duration, 3),
+                }
+                for s in self.report_order
+                if s.name in self.results
+            ],
+        }
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run the preflight checks concurrently")
+    ap.add_argument("--jobs", "-j", type=int, default=None, help="steps in flight")
+    ap.add_argument("--skip", action="append", default=[], metavar="STEP")
+    ap.add_argument("--only", action="append", default=[], metavar="STEP")
+    ap.add_argument("--report", default=REPORT)
+    ap.add_argument("--json", default=JSON_REPORT, metavar="PATH")
+    ap.add_argument("--verbose", "-v", action="store_true", help="stream step output")
+    args = ap.parse_args(list(argv) if argv is not None else None)
+
+    steps = default_steps(COVERAGE_THRESHOLD)
+    wanted = set(args.only) or {s.name for s in steps}
+    wanted -= set(args.skip)
+    steps = [s for s in steps if s.name in wanted]
+    # Dependencies outside the selection are treated as already satisfied
+    steps = [
+        Step(**{**s.__dict__, "deps": tuple(d for d in s.deps if d in wanted)})
+        for s in steps
+    ]
+
+    started, t0 = utc_now(), time.monotonic()
+    orchestrator = Orchestrator(steps, jobs=args.jobs, verbose=args.verbose)
+    orchestrator.run()
+    wall = time.monotonic() - t0
+    finished = utc_now()
+
+    report = ROOT / args.report
+    report.parent.mkdir(parents=True, exist_ok=True)
+    report.write_text(
+        orchestrator.markdown(started, finished, COVERAGE_THRESHOLD), encoding="utf-8"
+    )
+    payload = orchestrator.as_json(started, finished, wall)
+    (ROOT / args.json).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    print(
+        f"⏱  wall {wall:.2f}s vs {payload['serial_seconds']:.2f}s serial"
+        f" ({len(steps)} steps, {orchestrator.jobs} jobs)"
+    )
+    failed = orchestrator.failed()
+    if failed:
+        print(f"❌ Preflight failed: {', '.join(failed)} — see {args.report}")
+        return 1
+    print(f"✅ Preflight OK — see {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 
-import sys, xml.etree.ElementTree as ET
+import argparse, fnmatch, functools, os, re, sys, xml.etree.ElementTree as ET
+from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.changes import changed_since
 
 # خرائط عتبات لكل نمط حزمة
+# "backend" = prefix, "backend.*" = glob, "re:^backend\.(api|jobs)$" = regex
 
 THRESHOLDS = {
     "backend": 0.70,  # Backend code coverage
@@ -11,65 +18,363 @@ THRESHOLDS = {
 }
 
 
-def read_coverage(path="coverage.xml"):
+@functools.lru_cache(maxsize=None)
+def repo_path(filename, sources=()):
+    """Repo-relative posix path of a Cobertura class filename"""
+
+    candidates = []
+
+    for src in sources or [""]:
+
+        path = os.path.normpath(os.path.join(src, filename))
+
+        if os.path.isabs(path):
+
+            path = os.path.relpath(path, ROOT)
+
+        if not path.startswith(".."):
+
+            candidates.append(Path(path).as_posix())
+
+    # With several <source> roots, the one that holds the file wins
+    existing = [c for c in candidates if (ROOT / c).exists()]
+
+    return (existing or candidates or [Path(filename).as_posix()])[0]
+
+
+class LineHits:
+    """Measured and hit line numbers of one file, as two bitmaps"""
+
+    __slots__ = ("measured", "hit")
+
+    def __init__(self, measured=None, hit=None):
+
+        self.measured = measured if measured is not None else bytearray()
+
+        self.hit = hit if hit is not None else bytearray()
+
+    def add(self, number, hits):
+
+        i, bit = number >> 3, 1 << (number & 7)
+
+        if i >= len(self.measured):
+
+            grow = bytes(i + 1 - len(self.measured))
+
+            self.measured += grow
+
+            self.hit += grow
+
+        self.measured[i] |= bit
+
+        if hits:
+
+            self.hit[i] |= bit
+
+    def _has(self, bitmap, number):
+
+        i = number >> 3
+
+        return i < len(bitmap) and bool(bitmap[i] & (1 << (number & 7)))
+
+    def is_measured(self, number):
+
+        return self._has(self.measured, number)
+
+    def is_hit(self, number):
+
+        return self._has(self.hit, number)
+
+    def counts(self, lines=None):
+        """``(covered, valid)`` over all lines, or over ``lines`` only"""
+
+        if lines is None:
+
+            return (
+                int.from_bytes(self.hit, "little").bit_count(),
+                int.from_bytes(self.measured, "little").bit_count(),
+            )
+
+        valid = [n for n in lines if self.is_measured(n)]
+
+        return sum(1 for n in valid if self.is_hit(n)), len(valid)
+
+    def missing(self, lines):
+        """Measured but never hit, among ``lines``"""
+
+        return sorted(n for n in lines if self.is_measured(n) and not self.is_hit(n))
+
+
+def iter_classes(path="coverage.xml", select=None):
+    """
+    Yield ``(package, file, LineHits)`` per ``<class>`` of a Cobertura report
+
+    Parsed with ``iterparse``; finished classes and packages are dropped
+    from the tree as they end, so memory is bounded by the largest single
+    class, not the report. Only ``<class><lines>`` count (the ``<method>``
+    copies of the same lines are skipped). Classes whose repo-relative
+    file fails ``select`` yield ``None`` hits and cost no per-line work.
+    """
+
+    sources = ()
+
+    package = cls_key = classes = packages = None
+
+    measured = hit = None
+
+    in_lines = in_methods = False
+
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+
+        tag = elem.tag
+
+        if event == "start":
+
+            if tag == "line":
+
+                if in_lines:
+
+                    n = int(elem.get("number", "0"))
+
+                    i, bit = n >> 3, 1 << (n & 7)
+
+                    if i >= len(measured):
+
+                        grow = bytes(i + 1 - len(measured))
+
+                        measured += grow
+
+                        hit += grow
+
+                    measured[i] |= bit
+
+                    if elem.get("hits", "0") != "0":
+
+                        hit[i] |= bit
+
+            elif tag == "lines":
+
+                in_lines = measured is not None and not in_methods
+
+            elif tag == "methods":
+
+                in_methods = True
+
+            elif tag == "class":
+
+                cls_key = repo_path(elem.get("filename", ""), sources)
+
+                if select is None or select(cls_key):
+
+                    measured, hit = bytearray(), bytearray()
+
+            elif tag == "classes":
 
-    tree = ET.parse(path)
+                classes = elem
 
-    root = tree.getroot()
+            elif tag == "package":
 
-    out = {}
+                package = elem.get("name", "")
 
-    for pkg in root.iterfind(".//packages/package"):
+            elif tag == "packages":
 
-        name = pkg.get("name", "")
+                packages = elem
 
-        lines_valid = 0
+            continue
 
-        lines_covered = 0
+        # end event: report, then drop finished elements from the tree
 
-        for cls in pkg.iterfind("./classes/class"):
+        if tag == "lines":
 
-            lines = cls.find("./lines")
+            in_lines = False
 
-            if lines is None:
-                continue
+            elem.clear()
 
-            for ln in lines.iter("line"):
+        elif tag == "methods":
 
-                lines_valid += 1
+            in_methods = False
 
-                if int(ln.get("hits", "0")) > 0:
+            elem.clear()
 
-                    lines_covered += 1
+        elif tag == "class":
 
-        out[name] = (lines_covered, lines_valid)
+            hits = LineHits(measured, hit) if measured is not None else None
 
-    return out
+            rel, cls_key, measured, hit = cls_key, None, None, None
+
+            classes.clear()
+
+            yield package, rel, hits
+
+        elif tag == "package":
+
+            packages.clear()
+
+        elif tag == "source" and elem.text:
+
+            sources += (elem.text.strip(),)
+
+
+class CoverageTotals:
+    """Covered/valid line counts per package and per file"""
+
+    def __init__(self):
+
+        self.packages = {}
+
+        self.files = {}
+
+    def add(self, table, key, covered, valid):
+
+        c, v = table.get(key, (0, 0))
+
+        table[key] = (c + covered, v + valid)
+
+
+def stream_coverage(path="coverage.xml", changes=None):
+    """
+    Package and file totals of a Cobertura report, in constant memory
+
+    With a ``ChangeSet`` only changed lines of changed files count and
+    packages without changed lines are left out.
+    """
+
+    totals = CoverageTotals()
+
+    select = None if changes is None else changes.__contains__
+
+    for package, rel, hits in iter_classes(path, select):
+
+        if hits is None:
+            continue
+
+        wanted = None if changes is None else changes.lines(rel)
+
+        covered, valid = hits.counts(wanted)
+
+        totals.add(totals.packages, package, covered, valid)
+
+        totals.add(totals.files, rel, covered, valid)
+
+    if changes is not None:
+
+        totals.packages = {k: cv for k, cv in totals.packages.items() if cv[1]}
+
+    return totals
+
+
+def read_coverage(path="coverage.xml", changes=None):
+    """
+    ``{package: (covered, valid)}``; with a ``ChangeSet`` only the lines
+    changed since its ref count, and untouched packages are left out.
+    """
+
+    return stream_coverage(path, changes).packages
+
+
+def matches(pattern, name):
+    """Regex (``re:``), glob, or plain prefix match of a package name"""
+
+    if pattern.startswith("re:"):
+
+        return re.fullmatch(pattern[3:], name) is not None
+
+    if any(ch in pattern for ch in "*?["):
+
+        return fnmatch.fnmatchcase(name, pattern)
+
+    return name.startswith(pattern)
+
+
+def load_thresholds(path=None, overrides=()):
+    """THRESHOLDS, updated from a YAML mapping and ``PATTERN=RATIO`` pairs"""
+
+    thresholds = dict(THRESHOLDS)
+
+    if path:
+
+        import yaml
+
+        with open(path, encoding="utf-8") as f:
+            loaded = yaml.safe_load(f) or {}
+
+        thresholds.update({str(k): float(v) for k, v in loaded.items()})
+
+    for item in overrides:
+
+        pat, _, thr = item.rpartition("=")
+
+        if not pat:
+            raise SystemExit(f"--threshold expects PATTERN=RATIO, got {item!r}")
+
+        thresholds[pat] = float(thr)
+
+    return thresholds
 
 
 def ratio(c, v):
     return c / (v or 1)
 
 
-def main():
+def main(argv=None):
+
+    ap = argparse.ArgumentParser(description="Per-package coverage gate")
+
+    ap.add_argument("--coverage", default="coverage.xml")
 
-    cov = read_coverage()
+    ap.add_argument("--thresholds", help="YAML mapping of package pattern to ratio")
+
+    ap.add_argument(
+        "--threshold",
+        action="append",
+        default=[],
+        metavar="PATTERN=RATIO",
+        help="add/override a threshold (prefix, glob or re:regex)",
+    )
+
+    ap.add_argument("--changed-since", metavar="REF")
+
+    ap.add_argument(
+        "--files",
+        type=int,
+        default=0,
+        metavar="N",
+        help="list the N least covered files",
+    )
+
+    args = ap.parse_args(argv)
+
+    ref = args.changed_since
+
+    totals = stream_coverage(args.coverage, changes=changed_since(ref) if ref else None)
+
+    cov = totals.packages
+
+    if ref:
+
+        print(f"(scoped to lines changed since {ref})")
 
     fails = []
 
-    for pat, thr in THRESHOLDS.items():
+    for pat, thr in load_thresholds(args.thresholds, args.threshold).items():
 
-        # اجمع كل الحزم اللي اسمها يبدأ بالنمط
+        # اجمع كل الحزم المطابقة للنمط
 
         covered = valid = 0
 
         for name, (c, v) in cov.items():
 
-            if name.startswith(pat):
+            if matches(pat, name):
 
                 covered += c
                 valid += v
 
+        if ref and not valid:
+
+            print(f"[{pat}] no changed lines")
+
+            continue
+
         r = ratio(covered, valid)
 
         if r < thr:
@@ -78,6 +383,16 @@ def main():
 
         print(f"[{pat}] {r:.3f} (thr {thr:.2f})")
 
+    if args.files:
+
+        print("Least covered files:")
+
+        worst = sorted(totals.files.items(), key=lambda kv: ratio(*kv[1]))
+
+        for name, (c, v) in worst[: args.files]:
+
+            print(f"  {ratio(c, v):.3f} {c}/{v} {name}")
+
     if fails:
 
         print("❌ Package coverage gate failed:")
@@ -0,0 +1,223 @@
+# @Study:ST-004 @Study:ST-008
+#!/usr/bin/env python3
+
+# بوابة تغطية الأسطر المتغيرة فقط - Diff coverage gate
+
+import argparse, json, sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools.governance.changes import changed_since
+from tools.quality.coverage_packages_gate import iter_classes, matches, ratio
+
+FAIL_UNDER = 0.80
+
+
+def ranges(numbers):
+    """[1, 2, 3, 7, 9, 10] -> "1-3, 7, 9-10" """
+
+    out = []
+
+    for n in numbers:
+
+        if out and out[-1][1] == n - 1:
+
+            out[-1][1] = n
+
+        else:
+
+            out.append([n, n])
+
+    return ", ".join(f"{a}-{b}" if a != b else f"{a}" for a, b in out)
+
+
+def diff_coverage(path, changes):
+    """
+    Coverage of changed lines: ``(files, packages)``
+
+    ``files`` maps each changed file with measured changed lines to
+    ``{"package", "covered", "valid", "missing"}``; ``packages`` maps
+    package names to ``(covered, valid)``. Only classes of changed files
+    are indexed (as line bitmaps); the rest of the report is streamed past.
+    """
+
+    files, packages = {}, {}
+
+    for package, rel, hits in iter_classes(path, select=changes.__contains__):
+
+        if hits is None:
+            continue
+
+        lines = changes.lines(rel)
+
+        if lines is None:
+
+            lines = [n for n in range(len(hits.measured) * 8) if hits.is_measured(n)]
+
+        covered, valid = hits.counts(lines)
+
+        if not valid:
+            continue
+
+        f = files.setdefault(
+            rel, {"package": package, "covered": 0, "valid": 0, "missing": []}
+        )
+
+        f["covered"] += covered
+
+        f["valid"] += valid
+
+        f["missing"] = sorted(set(f["missing"]) | set(hits.missing(lines)))
+
+        c, v = packages.get(package, (0, 0))
+
+        packages[package] = (c + covered, v + valid)
+
+    return files, packages
+
+
+def parse_thresholds(items):
+
+    out = {}
+
+    for item in items:
+
+        pat, _, thr = item.rpartition("=")
+
+        if not pat:
+            raise SystemExit(f"threshold expects PATTERN=RATIO, got {item!r}")
+
+        out[pat] = float(thr)
+
+    return out
+
+
+def main(argv=None):
+
+    ap = argparse.ArgumentParser(description="Coverage of lines changed since REF")
+
+    ap.add_argument("--coverage", default="coverage.xml")
+
+    ap.add_argument("--changed-since", metavar="REF", default="origin/main")
+
+    ap.add_argument("--fail-under", type=float, default=FAIL_UNDER)
+
+    ap.add_argument(
+        "--package-threshold",
+        action="append",
+        default=[],
+        metavar="PATTERN=RATIO",
+        help="package prefix, glob or re:regex",
+    )
+
+    ap.add_argument(
+        "--file-threshold",
+        action="append",
+        default=[],
+        metavar="PATTERN=RATIO",
+        help="file path prefix, glob or re:regex",
+    )
+
+    ap.add_argument("--json", metavar="PATH", help="write the report as JSON")
+
+    args = ap.parse_args(argv)
+
+    changes = changed_since(args.changed_since)
+
+    files, packages = diff_coverage(args.coverage, changes)
+
+    covered = sum(c for c, _ in packages.values())
+
+    valid = sum(v for _, v in packages.values())
+
+    print(f"Diff coverage since {args.changed_since} ({changes.base[:12]}):")
+
+    for rel, f in sorted(files.items()):
+
+        missing = f" missing: {ranges(f['missing'])}" if f["missing"] else ""
+
+        print(
+            f"  {ratio(f['covered'], f['valid']):.3f} "
+            f"{f['covered']}/{f['valid']} {rel}{missing}"
+        )
+
+    fails = []
+
+    file_table = {rel: (f["covered"], f["valid"]) for rel, f in files.items()}
+
+    checks = [
+        (parse_thresholds(args.package_threshold), packages),
+        (parse_thresholds(args.file_threshold), file_table),
+    ]
+
+    for thresholds, table in checks:
+
+        for pat, thr in thresholds.items():
+
+            hits = [cv for name, cv in table.items() if matches(pat, name)]
+
+            c, v = sum(h[0] for h in hits), sum(h[1] for h in hits)
+
+            if not v:
+
+                print(f"[{pat}] no changed lines")
+
+                continue
+
+            if ratio(c, v) < thr:
+
+                fails.append((pat, ratio(c, v), thr))
+
+            print(f"[{pat}] {ratio(c, v):.3f} (thr {thr:.2f})")
+
+    if valid:
+
+        if ratio(covered, valid) < args.fail_under:
+
+            fails.append(("total", ratio(covered, valid), args.fail_under))
+
+        print(f"TOTAL {covered}/{valid} {ratio(covered, valid):.3f}")
+
+    else:
+
+        print("TOTAL no measured changed lines")
+
+    if args.json:
+
+        Path(args.json).write_text(
+            json.dumps(
+                {
+                    "ref": args.changed_since,
+                    "base": changes.base,
+                    "covered": covered,
+                    "valid": valid,
+                    "files": files,
+                    "packages": {k: list(cv) for k, cv in packages.items()},
+                    "failures": [
+                        {"pattern": p, "ratio": r, "threshold": t} for p, r, t in fails
+                    ],
+                },
+                indent=2,
+                sort_keys=True,
+            )
+        )
+
+    if fails:
+
+        print("❌ Diff coverage gate failed:")
+
+        for pat, r, thr in fails:
+
+            print(f"  - {pat}: {r:.3f} < {thr:.2f}")
+
+        sys.exit(1)
+
+    print("✅ Diff coverage gate PASS")
+
+
+if __name__ == "__main__":
+
+    main()